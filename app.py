@@ -1,125 +1,121 @@
 import streamlit as st
-import streamlit_antd_components as sac
-import pandas as pd
-import numpy as np
-import tensorflow as tf
-import joblib
+import streamlit.components.v1 as components
+import streamlit_antd_components as sac # Usado no menu lateral de todas as páginas
 import database
 import planejador
-import calendar as pycalendar # Biblioteca nativa do Python
+import calendario
+import intervalos
+import relogio
+import retreino
+import metricas
+import os
 from datetime import datetime, timedelta
 import time
-import plotly.express as px # Biblioteca de gráficos
-
-def gerar_roteiro_estudo(minutos_totais):
-    """
-    Quebra o tempo total em blocos de foco e pausa.
-    Retorna uma lista de strings HTML para exibir.
-    """
-    roteiro = []
-    
-    # Se for pouco tempo (menos de 30min), é um tiro só
-    if minutos_totais <= 30:
-        roteiro.append(f"🔥 {minutos_totais} min Foco Total")
-    
-    # Se for tempo médio (entre 30 e 60), quebra em 2
-    elif minutos_totais <= 60:
-        bloco1 = int(minutos_totais * 0.6) # 60% do tempo
-        pausa = 5
-        bloco2 = minutos_totais - bloco1 - pausa
-        
-        roteiro.append(f"🔥 {bloco1} min Foco Intenso")
-        roteiro.append(f"☕ {pausa} min Descanso")
-        roteiro.append(f"🔥 {bloco2} min Foco Final")
-        
-    # Se for muito tempo (> 60), Pomodoro Clássico Adaptado
-    else:
-        # Tenta fazer blocos de 25 a 30 min
-        blocos = minutos_totais // 30
-        resto = minutos_totais % 30
-        
-        for i in range(blocos):
-            roteiro.append(f"🔥 25 min Foco")
-            roteiro.append(f"☕ 5 min Pausa")
-        
-        if resto > 0:
-            roteiro.append(f"🔥 {resto} min Fechamento")
-            
-    return roteiro
+# Pesados: só são importados quando a página que usa é aberta
+from dependencias import px, motor_ia # px = plotly.express (gráficos)
 
 # --- CONFIG ---
 st.set_page_config(layout="wide", page_title="Sentinela Dashboard", page_icon="🌑")
-database.inicializar_db()
+inicio_rerun = time.perf_counter() # Para o metricas.py (página Desempenho)
+
+@st.cache_resource
+def preparar_banco():
+    # Uma vez por processo, não a cada rerun
+    database.inicializar_db()
+preparar_banco()
+
+@st.cache_resource
+def iniciar_retreino():
+    # Processo separado que aprende com as sessões reais (ver retreino.py)
+    try:
+        return retreino.iniciar_em_segundo_plano()
+    except Exception as e:
+        print(f"Erro ao iniciar o retreino: {e}")
+        return None
+iniciar_retreino()
 
 if 'navegacao_atual' not in st.session_state:
     st.session_state['navegacao_atual'] = 'Dashboard'
 
-def carregar_css(nome_arquivo):
+# Perfil logado nesta sessão do navegador (cada aba/pessoa tem o seu)
+user_id = st.session_state.get('user_id')
+if user_id is not None and not database.usuario_existe(user_id):
+    user_id = st.session_state['user_id'] = None
+
+@st.cache_resource
+def ler_css(nome_arquivo):
     try:
         with open(nome_arquivo, encoding='utf-8') as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-    except: pass
+            return f.read()
+    except: return ""
+
+def carregar_css(nome_arquivo):
+    st.markdown(f'<style>{ler_css(nome_arquivo)}</style>', unsafe_allow_html=True)
 carregar_css("style.css")
 
+# Como a rede roda: "" = motor NumPy do .npz (padrão); "int8" ou "float16" = variante
+# TFLite da versão no ar (precisa do ai-edge-litert, do tflite-runtime ou do TensorFlow)
+VARIANTE_IA = os.environ.get("SENTINELA_VARIANTE_IA", "")
+
 @st.cache_resource
 def carregar_ia():
+    # Motor NumPy (pesos + scaler no .npz) com cache de previsões, um só para
+    # todas as sessões. Segue a versão no ar do registro (modelos.json) e troca
+    # sozinho quando outra versão é ativada, sem reiniciar o app.
     try:
-        model = tf.keras.models.load_model('sentinela_brain_v3.h5')
-        scaler = joblib.load('meu_scaler_v3.pkl')
-        return model, scaler
-    except: return None, None
-model, scaler = carregar_ia()
-
-# --- FUNÇÃO MÁGICA: GERA O CALENDÁRIO EM HTML PURO ---
-def renderizar_calendario_html(ano, mes, eventos):
-    cal = pycalendar.Calendar(firstweekday=0) # 0 = Segunda
-    dias_do_mes = cal.monthdayscalendar(ano, mes)
-    
-    nomes_dias = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
-    hoje = datetime.now()
-    
-    # HTML DO CABEÇALHO
-    html = '<div class="cyber-calendar-container">'
-    html += '<div class="calendar-header">'
-    for d in nomes_dias:
-        html += f'<div class="day-name">{d}</div>'
-    html += '</div>'
-    
-    # HTML DO GRID
-    html += '<div class="calendar-grid">'
-    
-    for semana in dias_do_mes:
-        for dia in semana:
-            if dia == 0:
-                # Dia vazio (mês anterior/próximo)
-                html += '<div class="day-cell" style="background: transparent; border: none;"></div>'
-            else:
-                # É hoje?
-                classe_hoje = "day-today" if (dia == hoje.day and mes == hoje.month and ano == hoje.year) else ""
-                
-                # HTML DA CÉLULA DO DIA
-                html += f'<div class="day-cell {classe_hoje}">'
-                html += f'<div class="day-number">{dia}</div>'
-                
-                # BUSCAR EVENTOS DESTE DIA
-                data_atual_str = f"{ano}-{mes:02d}-{dia:02d}"
-                
-                for ev in eventos:
-                    # O banco salva como '2025-11-26T19:00:00'. Pegamos só a data.
-                    if ev['start'].startswith(data_atual_str):
-                        titulo = ev['title']
-                        # Define cor CSS
-                        classe_cor = "evt-blue"
-                        if "Prova" in titulo: classe_cor = "evt-pink"
-                        elif "Estudar" in titulo: classe_cor = "evt-purple"
-                        elif "Codar" in titulo: classe_cor = "evt-cyan"
-                        
-                        html += f'<div class="event-pill {classe_cor}">{titulo[:15]}..</div>'
-                
-                html += '</div>' # Fecha day-cell
-                
-    html += '</div></div>' # Fecha grid e container
-    return html
+        previsor = motor_ia.Previsor(variante=VARIANTE_IA or None)
+        previsor.prever([0] * 11) # Já carrega o motor aqui e valida os arquivos
+        return previsor
+    except Exception as e:
+        print(f"Erro ao carregar IA: {e}")
+        return None
+
+def contexto_da_sessao(tarefa):
+    # Vetor da última previsão da Nova Sessão, se foi para esta tarefa (usado uma vez só)
+    contexto = st.session_state.pop('contexto_ia', None)
+    if contexto and contexto['tarefa'] == tarefa:
+        return contexto['vetor']
+    return None
+
+NOMES_DIAS = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+NOMES_LOCAIS = ["Casa", "Biblioteca", "Café/Rua"]
+NOMES_RUIDOS = ["Silencioso", "Moderado", "Barulhento"]
+
+def mostrar_melhores_horarios(previsor, cat, prazo, dif, inter, sono, jej, ref, top=5):
+    # Uma passada só da rede na grade dia × hora × local × ruído
+    for i, slot in enumerate(previsor.recomendar(cat, prazo, dif, inter, sono, jej, ref, top=top), start=1):
+        st.write(f"**{i}.** {NOMES_DIAS[slot['dia_semana']]} às {slot['hora_dia']:02d}h • "
+                 f"{NOMES_LOCAIS[slot['local']]} ({NOMES_RUIDOS[slot['ruido']]}) → "
+                 f"**{int(slot['minutos'])} min** de foco")
+
+def mostrar_desempenho():
+    # Tempos por operação (metricas.py), somando todas as sessões deste processo
+    ligado = st.checkbox("Medir tempos (SQL, banco, calendário, planejador, IA, gráficos)", value=metricas.ativo())
+    if ligado != metricas.ativo():
+        metricas.ativar() if ligado else metricas.desativar()
+        database.fechar_conexoes() # Conexões novas já vêm (ou deixam de vir) com a medição do SQL
+        st.experimental_rerun()
+    linhas = metricas.resumo()
+    if not linhas:
+        st.info("Nada medido ainda. Ligue a medição e navegue pelo app.")
+        return
+    st.dataframe([{
+        "Operação": l["operacao"],
+        "Chamadas": l["chamadas"],
+        "Total (ms)": round(l["total"] * 1e3, 1),
+        "p50 (ms)": round(l["p50"] * 1e3, 3),
+        "p95 (ms)": round(l["p95"] * 1e3, 3),
+        "p99 (ms)": round(l["p99"] * 1e3, 3),
+        "Máx (ms)": round(l["max"] * 1e3, 3),
+        "Linhas": l["linhas"],
+    } for l in linhas], use_container_width=True)
+    c_exp, c_baixar, c_zerar = st.columns(3)
+    if c_exp.button("💾 Exportar (Prometheus)"):
+        st.success(f"Gravado em {os.path.abspath(metricas.exportar_prometheus())}")
+    c_baixar.download_button("⬇️ Baixar .prom", metricas.texto_prometheus(), file_name=metricas.ARQUIVO_PROMETHEUS)
+    if c_zerar.button("🧹 Zerar"):
+        metricas.limpar()
+        st.experimental_rerun()
 
 def desenhar_card_lateral(titulo, data_obj, cor_classe, minutos_totais):
     dia = data_obj.strftime("%d")
@@ -136,8 +132,19 @@ def desenhar_card_lateral(titulo, data_obj, cor_classe, minutos_totais):
     """, unsafe_allow_html=True)
 
 # --- APP ---
-if not database.usuario_existe():
+if user_id is None:
     st.title("🛡️ Bem-vindo ao Sentinela")
+    usuarios = database.listar_usuarios()
+    if usuarios:
+        st.markdown("### Entrar com um perfil existente")
+        c_perfil, c_entrar = st.columns([3, 1])
+        with c_perfil:
+            escolhido = st.selectbox("Perfil", usuarios, format_func=lambda u: u[1], label_visibility="collapsed")
+        with c_entrar:
+            if st.button("Entrar", use_container_width=True):
+                st.session_state['user_id'] = escolhido[0]
+                st.experimental_rerun()
+        st.markdown("---")
     st.markdown("### Configuração de Perfil Neural")
     with st.container():
         nome = st.text_input("Como devemos te chamar?", placeholder="Ex: Felipe")
@@ -248,12 +255,16 @@ if not database.usuario_existe():
                 elif "Pede" in q5: pontos[3]+=1
                 
                 # VENCEDOR
-                ganhador_cod = np.argmax(pontos)
+                ganhador_cod = pontos.index(max(pontos)) # Primeiro com mais pontos
                 nomes_estilos = ["Leitura/Visual 👁️", "Visual/Dinâmico 🎥", "Auditivo 👂", "Cinestésico/Prático 🛠️"]
                 perfil_final = nomes_estilos[ganhador_cod]
                 
                 # SALVAR NO BANCO
-                database.salvar_perfil_usuario(nome, perfil_final, int(ganhador_cod))
+                novo_id = database.salvar_perfil_usuario(nome, perfil_final, int(ganhador_cod))
+                if novo_id is None:
+                    st.error("Não foi possível salvar o perfil.")
+                    st.stop()
+                st.session_state['user_id'] = novo_id
                 
                 st.balloons()
                 st.success(f"Perfil Identificado: **{perfil_final}**")
@@ -262,12 +273,15 @@ if not database.usuario_existe():
                 st.error("Por favor, preencha seu nome e a primeira pergunta.")
 
 else:
-    user = database.get_usuario()
+    user = database.get_usuario(user_id)
     with st.sidebar:
         st.write("")
         c1,c2,c3=st.columns([1,2,1])
         with c2: st.image("https://cdn-icons-png.flaticon.com/512/4140/4140048.png", width=100)
         st.markdown(f"<div style='text-align:center'><h3>{user['nome']}</h3><p style='color:#666'>{user['estilo_aprendizagem']}</p></div>", unsafe_allow_html=True)
+        if st.button("🔄 Trocar perfil", use_container_width=True):
+            st.session_state['user_id'] = None
+            st.experimental_rerun()
         
         # Mapeamento para o menu saber onde está
         mapa_nav = {'Dashboard':0, 'Cronômetro':1, 'Nova Sessão':2, 'Gerenciar Missões':3, 'Planejador':4, 'Configurações':5}
@@ -303,11 +317,10 @@ else:
             ano_atual = datetime.now().year
             st.caption(f"📅 {datetime.now().strftime('%B %Y')}")
 
-        df_concluidos = database.get_dados_concluidos()
+        # Já vem somado por tarefa (tabela de rollup), sem reagrupar o histórico todo
+        df_chart = database.get_foco_por_tarefa(user_id)
         
-        if not df_concluidos.empty:
-            # Agrupa por tarefa somando os minutos
-            df_chart = df_concluidos.groupby('tarefa_nome')['minutos_foco_realizado'].sum().reset_index()
+        if not df_chart.empty:
             
             # Cria coluna de Horas só para o texto bonito
             df_chart['Horas_Texto'] = df_chart['minutos_foco_realizado'].apply(lambda x: f"{int(x//60)}h {int(x%60)}m")
@@ -317,47 +330,58 @@ else:
             st.metric("🔥 Tempo Total de Foco", f"{int(total_min//60)}h {int(total_min%60)}m")
             
             # Gráfico em MINUTOS (Visualmente melhor)
-            fig = px.bar(
-                df_chart, 
-                x='tarefa_nome', 
-                y='minutos_foco_realizado', 
-                color='minutos_foco_realizado',
-                text='Horas_Texto', # Mostra o tempo formatado em cima da barra
-                color_continuous_scale=['#00D2FC', '#3F8CFF', '#6C5DD3', '#FF5275'], 
-                template='plotly_dark',
-                labels={'minutos_foco_realizado': 'Minutos', 'tarefa_nome': 'Missão'}
-            )
-            
-            fig.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)', 
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family="Inter", 
-                font_color="white", 
-                height=300, 
-                margin=dict(l=0, r=0, t=30, b=0),
-                showlegend=False
-            )
-            fig.update_traces(textposition='outside', marker_line_width=0, opacity=0.9)
+            with metricas.bloco("plotly.foco_por_tarefa"):
+                fig = px.bar(
+                    df_chart, 
+                    x='tarefa_nome', 
+                    y='minutos_foco_realizado', 
+                    color='minutos_foco_realizado',
+                    text='Horas_Texto', # Mostra o tempo formatado em cima da barra
+                    color_continuous_scale=['#00D2FC', '#3F8CFF', '#6C5DD3', '#FF5275'], 
+                    template='plotly_dark',
+                    labels={'minutos_foco_realizado': 'Minutos', 'tarefa_nome': 'Missão'}
+                )
+                
+                fig.update_layout(
+                    paper_bgcolor='rgba(0,0,0,0)', 
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    font_family="Inter", 
+                    font_color="white", 
+                    height=300, 
+                    margin=dict(l=0, r=0, t=30, b=0),
+                    showlegend=False
+                )
+                fig.update_traces(textposition='outside', marker_line_width=0, opacity=0.9)
             
-            st.plotly_chart(fig, use_container_width=True)
+            with metricas.bloco("plotly.enviar"):
+                st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("💡 Use o 'Cronômetro' para registrar suas primeiras horas de estudo e ver o gráfico!")
 
         col_cal, col_list = st.columns([3, 1.2])
 
         with col_cal:
-            # 1. PEGA EVENTOS
-            eventos = database.get_eventos()
-            # 2. GERA HTML PURO
-            html_calendario = renderizar_calendario_html(ano_atual, mes_atual, eventos)
+            # 1. PEGA SÓ OS EVENTOS DO MÊS MOSTRADO
+            primeiro_dia = datetime(ano_atual, mes_atual, 1)
+            proximo_mes = datetime(ano_atual + mes_atual // 12, mes_atual % 12 + 1, 1)
+            # 2. GERA HTML PURO (reaproveita o HTML do mês se a agenda não mudou)
+            html_calendario = calendario.renderizar_calendario_cache(
+                user_id, ano_atual, mes_atual, database.get_versao_agenda(user_id),
+                lambda: database.get_eventos_intervalo(user_id, primeiro_dia, proximo_mes)
+            )
             # 3. RENDERIZA
             st.markdown(html_calendario, unsafe_allow_html=True)
+            mais_cheio = database.get_indice_agenda(user_id).dia_mais_cheio(
+                intervalos.segundos(primeiro_dia), intervalos.segundos(proximo_mes))
+            if mais_cheio:
+                dia, minutos = mais_cheio
+                st.caption(f"📌 Dia mais cheio do mês: {dia.strftime('%d/%m')} ({minutos // 60}h {minutos % 60}m)")
 
         with col_list:
             st.markdown("### PRÓXIMAS MISSÕES")
-            if eventos:
-                evs = sorted(eventos, key=lambda x: x['start'])
-                for ev in evs[-4:]:
+            proximas = database.get_proximas_missoes(user_id, 4)
+            if proximas:
+                for ev in proximas:
                     dt = datetime.fromisoformat(ev['start'])
                     
                     # Cores
@@ -375,6 +399,7 @@ else:
                         st.session_state.cronometro_ativo = True
                         st.session_state.inicio_cronometro = datetime.now()
                         st.session_state.tarefa_atual = ev['title']
+                        st.session_state.evento_atual = int(ev['id']) # Sai da agenda ao salvar (conta na meta)
                         
                         # Salva a meta de tempo e inicia no modo FOCO
                         st.session_state.meta_minutos = minutos_reais
@@ -402,41 +427,39 @@ else:
                 df = database.get_tarefas()
                 tarefa_escolhida = st.selectbox("O que vamos estudar agora?", df['nome'])
             
-            st.info("A tela vai atualizar a cada segundo. Não feche a aba.")
+            st.info("O relógio roda no seu navegador. Pode trocar de aba sem problema.")
             if st.button("🔥 INICIAR SESSÃO", type="primary"):
                 st.session_state.cronometro_ativo = True
                 st.session_state.inicio_cronometro = datetime.now()
                 st.session_state.tarefa_atual = tarefa_escolhida
+                st.session_state.evento_atual = None
                 st.experimental_rerun()
         else:
             delta = datetime.now() - st.session_state.inicio_cronometro
-            minutos = int(delta.total_seconds() // 60)
-            segundos = int(delta.total_seconds() % 60)
-            tempo_str = f"{minutos:02d}:{segundos:02d}"
             
-            st.markdown(f"""
-            <div style="text-align: center; padding: 40px; background: #111; border: 2px solid #00D2FC; border-radius: 20px;">
-                <h2 style="color: #888; margin:0;">FOCADO EM: {st.session_state.tarefa_atual}</h2>
-                <h1 style="font-size: 100px; color: #00D2FC; margin: 0; font-family: monospace;">{tempo_str}</h1>
-            </div>
-            """, unsafe_allow_html=True)
+            # O navegador conta os segundos; o servidor só é chamado no PARAR
+            components.html(relogio.html_relogio(
+                delta.total_seconds(), True, "#00D2FC",
+                f"FOCADO EM: {st.session_state.tarefa_atual}", padding=40, fundo="#111"
+            ), height=260)
             
             st.write("")
             if st.button("🛑 PARAR E SALVAR", type="primary", use_container_width=True):
                 fim = datetime.now()
+                delta = fim - st.session_state.inicio_cronometro
                 min_totais = int(delta.total_seconds() / 60)
                 if min_totais < 1: min_totais = 1
                 
-                database.finalizar_missao_manual(st.session_state.tarefa_atual, min_totais, 
-                                                 st.session_state.inicio_cronometro.isoformat(), fim.isoformat())
+                database.finalizar_missao_manual(user_id, st.session_state.tarefa_atual, min_totais, 
+                                                 st.session_state.inicio_cronometro.isoformat(), fim.isoformat(),
+                                                 contexto_da_sessao(st.session_state.tarefa_atual),
+                                                 evento_id=st.session_state.get('evento_atual'))
+                st.session_state.evento_atual = None
                 st.session_state.cronometro_ativo = False
                 st.success(f"Parabéns! +{min_totais} minutos registrados.")
                 time.sleep(2)
                 st.experimental_rerun()
             
-            time.sleep(1)
-            st.experimental_rerun()
-            
     # === PÁGINA CRONÔMETRO (NOVA) ===
     elif st.session_state['navegacao_atual'] == 'Cronômetro':
         st.markdown("<h1 style='color: white; font-weight: 800;'>⏱️ Modo de Foco</h1>", unsafe_allow_html=True)
@@ -458,6 +481,7 @@ else:
                     st.session_state.cronometro_ativo = True
                     st.session_state.inicio_cronometro = datetime.now()
                     st.session_state.tarefa_atual = tarefa_generica
+                    st.session_state.evento_atual = None
                     st.session_state.meta_minutos = 60 # Padrão se for manual
                     st.session_state.modo_timer = 'Foco'
                     st.session_state.tempo_pausa_acumulado = 0
@@ -501,21 +525,11 @@ else:
                 cor_timer = "#FF5275" # Rosa/Vermelho
                 texto_status = "EM DESCANSO ☕"
 
-            # Formatação do Relógio Principal (Foco)
-            min_f = int(segundos_uteis // 60)
-            seg_f = int(segundos_uteis % 60)
-            str_foco = f"{min_f:02d}:{seg_f:02d}"
-            
-            # VISUAL DO TIMER
-            st.markdown(f"""
-            <div style="text-align: center; padding: 30px; background: #080808; border: 2px solid {cor_timer}; border-radius: 20px; box-shadow: 0 0 40px {cor_timer}40;">
-                <h3 style="color: {cor_timer}; margin:0; letter-spacing: 3px; text-transform: uppercase;">{texto_status}</h3>
-                <h2 style="color: #fff; margin:10px 0;">{st.session_state.tarefa_atual}</h2>
-                <h1 style="font-size: 100px; color: {cor_timer}; margin: 0; font-family: monospace; text-shadow: 0 0 20px {cor_timer};">
-                    {str_foco}
-                </h1>
-            </div>
-            """, unsafe_allow_html=True)
+            # VISUAL DO TIMER (conta no navegador durante o foco, parado na pausa)
+            components.html(relogio.html_relogio(
+                segundos_uteis, st.session_state.modo_timer == 'Foco', cor_timer,
+                texto_status, st.session_state.tarefa_atual
+            ), height=300)
             
             # 3. CONTROLES (Botões Lado a Lado)
             st.write("")
@@ -552,20 +566,21 @@ else:
                     if minutos_reais < 1: minutos_reais = 1
                     
                     database.finalizar_missao_manual(
+                        user_id,
                         st.session_state.tarefa_atual,
                         minutos_reais,
                         st.session_state.inicio_cronometro.isoformat(),
-                        datetime.now().isoformat()
+                        datetime.now().isoformat(),
+                        contexto_da_sessao(st.session_state.tarefa_atual),
+                        evento_id=st.session_state.get('evento_atual')
                     )
+                    st.session_state.evento_atual = None
                     
                     st.session_state.cronometro_ativo = False
                     st.success(f"🎉 Sessão Finalizada! Tempo Líquido de Foco: {minutos_reais} min.")
                     time.sleep(3)
                     st.session_state['navegacao_atual'] = 'Dashboard'
                     st.experimental_rerun()
-            
-            time.sleep(1)
-            st.experimental_rerun()
 
     elif menu == 'Nova Sessão':
         st.markdown("<h1 style='color: white; font-weight: 800;'>⚡ Nova Sessão (IA)</h1>", unsafe_allow_html=True)
@@ -599,22 +614,24 @@ else:
         st.markdown("---")
 
         if st.button("🧠 PROCESSAR DADOS", type="primary", use_container_width=True):
-            if model:
+            previsor = carregar_ia()
+            if previsor:
                 # 1. Prepara os dados (O vetor de 11 dimensões que a IA aprendeu)
                 agora = datetime.now()
                 
                 # Vetor: [Dia, Hora, Local, Ruido, Cat, Prazo, Dif, Inter, Sono, Jejum, Reflexo]
-                dados_entrada = [[
+                dados_entrada = [
                     agora.weekday(), agora.hour, 
                     mapa_local[local], mapa_ruido[rui],
                     cat, prazo, dif, inter, 
                     sono, jej, ref
-                ]]
+                ]
                 
                 # 2. Normaliza e Prevê
-                input_scaled = scaler.transform(dados_entrada)
-                predicao = model.predict(input_scaled)[0][0]
+                predicao = previsor.prever(dados_entrada)
                 foco_ia = int(predicao)
+                # Guardado para o cronômetro: o tempo real dessa sessão ensina a IA (retreino.py)
+                st.session_state['contexto_ia'] = {"tarefa": tar, "vetor": dados_entrada}
                 pausa_ia = int(foco_ia * 0.2) # 20% de pausa
                 
                 # 3. Exibe Resultado "Gamer"
@@ -629,19 +646,44 @@ else:
                 elif local == "Biblioteca": msg = "🔵 Buff: Ambiente Focado"
                 c_res3.info(msg)
                 
-                # 4. Salva Automaticamente
-                inicio = datetime.now().isoformat()
-                fim = (datetime.now() + timedelta(minutes=foco_ia)).isoformat()
-                database.adicionar_evento(tar, inicio, fim, foco_ia)
-                st.success("💾 Sessão salva no calendário!", icon="✅")
+                est = previsor.estatisticas()
+                st.caption(f"IA {est['versao']} ({est['variante']}) · cache: {est['acertos']} acertos / {est['falhas']} falhas "
+                           f"({est['taxa_acerto']:.0%})")
+                st.caption("⏱️ Faça essa sessão no Cronômetro: o tempo real ensina a IA a acertar mais com você.")
+                
+                # 4. Salva Automaticamente (no primeiro horário livre a partir de agora)
+                indice = database.get_indice_agenda(user_id)
+                agora = intervalos.segundos(datetime.now())
+                duracao = foco_ia * 60
+                inicio_s = agora
+                if not indice.livre(agora, agora + duracao):
+                    inicio_s = indice.primeiro_livre(agora, agora + 86400, duracao)
+                if inicio_s is None:
+                    st.warning("Nenhum horário livre nas próximas 24h: sessão não foi salva.")
+                else:
+                    inicio = intervalos.datetime_de(inicio_s)
+                    fim = inicio + timedelta(minutes=foco_ia)
+                    database.adicionar_evento(user_id, tar, inicio.isoformat(), fim.isoformat(), foco_ia)
+                    if inicio_s == agora:
+                        st.success("💾 Sessão salva no calendário!", icon="✅")
+                    else:
+                        st.success(f"💾 Agora bate com outro compromisso: sessão salva às {inicio.strftime('%H:%M')}.", icon="✅")
                 
             else:
-                st.error("IA não carregada. Verifique os arquivos .h5")
+                st.error("IA não carregada. Verifique os arquivos .h5/.npz")
+        
+        with st.expander("📅 Quando estudar isso? (melhores horários segundo a IA)"):
+            if st.button("Sugerir horários", use_container_width=True):
+                previsor = carregar_ia()
+                if previsor:
+                    mostrar_melhores_horarios(previsor, cat, prazo, dif, inter, sono, jej, ref)
+                else:
+                    st.error("IA não carregada. Verifique os arquivos .h5/.npz")
 
     elif menu == 'Gerenciar Missões':
         st.markdown("<h1 style='color: white; font-weight: 800;'>📂 Diário de Missões</h1>", unsafe_allow_html=True)
         
-        evs = database.get_eventos()
+        evs = database.get_eventos(user_id)
         if not evs:
             st.info("Nenhum registro no banco de dados.")
         else:
@@ -671,7 +713,7 @@ else:
                 with c3:
                     # Botão de Excluir com chave única
                     if st.button("🗑️ Excluir", key=f"del_{ev['id']}"):
-                        sucesso = database.deletar_evento(ev['id'])
+                        sucesso = database.deletar_evento(user_id, ev['id'])
                         if sucesso:
                             st.success("Apagado!")
                             st.experimental_rerun()
@@ -711,34 +753,76 @@ else:
             
             if gerar and meta:
                 dt_alvo = datetime.combine(data_alvo, datetime.min.time())
+                dias_restantes = (dt_alvo - datetime.now()).days
                 
-                sucesso, resultado = planejador.gerar_cronograma_prova(
-                    meta, tarefa_base, dt_alvo, conhecimento, dif, dias_codigos
-                )
-                
-                if sucesso:
-                    st.success(f"Plano criado! Foram agendadas **{len(resultado)} sessões** até o dia da prova.")
-                    
-                    # Salvar no banco
-                    progress_text = "Gravando no calendário..."
-                    my_bar = st.progress(0, text=progress_text)
+                if dias_restantes <= 0:
+                    st.error("A data deve ser no futuro!")
+                elif not dias_codigos:
+                    st.error("Escolha pelo menos um dia da semana!")
+                else:
+                    horas = planejador.calcular_horas_necessarias(conhecimento, dif, dias_restantes)
+                    # Grava a meta e encaixa junto com as outras: só esta e as que vencem
+                    # depois dela são replanejadas (tudo numa transação)
+                    with st.spinner("Encaixando o plano junto com as outras metas..."):
+                        meta_id = database.adicionar_eventos_lote(user_id, [], meta={
+                            'nome_meta': meta,
+                            'tarefa_associada': tarefa_base,
+                            'data_alvo': dt_alvo.isoformat(),
+                            'nivel_conhecimento': conhecimento,
+                            'total_horas_estimadas': horas,
+                            'dias_semana': dias_codigos, # Cada meta replaneja só nos dias dela
+                        })
+                        planos, faltando = planejador.replanejar_metas(user_id, desde_prazo=dt_alvo)
+                    resultado = planos.get(meta_id, [])
                     
-                    for i, item in enumerate(resultado):
-                        database.adicionar_evento(item['tarefa'], item['inicio'], item['fim'], item['minutos'])
-                        my_bar.progress((i + 1) / len(resultado), text=progress_text)
+                    st.success(f"Plano criado! Foram agendadas **{len(resultado)} sessões** até o dia da prova.")
+                    if faltando:
+                        horas_faltando = sum(faltando.values()) / 60
+                        st.warning(f"Não coube tudo até o prazo: faltam {horas_faltando:.1f}h em {len(faltando)} meta(s).")
                     
-                    my_bar.empty()
                     st.balloons()
                     st.markdown("### 👀 Prévia do Plano:")
                     for item in resultado[:3]: # Mostra só os 3 primeiros
                         data_fmt = datetime.fromisoformat(item['inicio']).strftime("%d/%m")
                         st.write(f"📅 {data_fmt}: {item['minutos']} min - {item['tarefa']}")
                     st.info("Veja o plano completo no Dashboard.")
-                    
-                else:
-                    st.error(resultado)
+                    mais_cheio = database.get_indice_agenda(user_id).dia_mais_cheio(
+                        intervalos.segundos(datetime.now()), intervalos.segundos(dt_alvo))
+                    if mais_cheio:
+                        dia, minutos = mais_cheio
+                        st.caption(f"📌 Dia mais carregado até a prova: {dia.strftime('%d/%m')} ({minutos // 60}h {minutos % 60}m)")
+        
+        # METAS EM ANDAMENTO (apagar uma devolve o tempo para as que vencem depois)
+        metas_ativas = database.get_metas_ativas(user_id, datetime.now())
+        if metas_ativas:
+            st.markdown("### 🎯 Metas em andamento")
+            for m in metas_ativas:
+                c_nome, c_prazo, c_btn = st.columns([3, 1.5, 1])
+                c_nome.write(f"**{m['nome_meta']}** • {m['tarefa_associada']}")
+                prazo = datetime.fromisoformat(m['data_alvo'])
+                c_prazo.caption(f"📅 {prazo.strftime('%d/%m/%Y')} • {m['minutos_feitos'] / 60:.1f}h de {m['total_horas_estimadas']:.1f}h")
+                if c_btn.button("Apagar", key=f"del_meta_{m['id']}"):
+                    if database.deletar_plano(user_id, m['id']):
+                        planejador.replanejar_metas(user_id, desde_prazo=prazo)
+                        st.experimental_rerun()
+        
+        with st.expander(f"🧠 Melhores horários para: {tarefa_base}"):
+            st.caption("Considerando um dia normal (7h de sono, 2h sem comer, reflexo 300ms).")
+            previsor = carregar_ia()
+            if previsor:
+                cat_base = df_tarefas[df_tarefas['nome'] == tarefa_base].iloc[0]['categoria_ia']
+                mostrar_melhores_horarios(previsor, cat_base, 5, dif, 3, 7.0, 2.0, 300)
         
     elif menu == 'Configurações':
-        if st.button("Reset"):
-            conn=database.conectar(); conn.execute("DELETE FROM usuario"); conn.commit(); conn.close()
-            st.experimental_rerun()
\ No newline at end of file
+        aba_perfil, aba_desempenho = st.tabs(["Perfil", "Desempenho"])
+        with aba_perfil:
+            if st.button("Reset"):
+                database.resetar_usuario(user_id)
+                st.session_state['user_id'] = None
+                st.experimental_rerun()
+        with aba_desempenho:
+            mostrar_desempenho()
+
+# Rerun inteiro, por página (os que saíram no meio por experimental_rerun/stop não contam)
+pagina = 'Login' if user_id is None else st.session_state['navegacao_atual']
+metricas.registrar(f"app.rerun.{pagina}", time.perf_counter() - inicio_rerun)
\ No newline at end of file
@@ -0,0 +1,68 @@
+# Utilidades compartilhadas pelos benchmarks (rodar a partir da raiz: python benchmarks/<arquivo>.py)
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+import database
+
+def banco_temporario(nome="bench.db"):
+    """Aponta o database.py para um arquivo novo numa pasta temporária e cria o schema."""
+    pasta = tempfile.mkdtemp(prefix="sentinela_bench_")
+    database.fechar_conexoes()
+    database.DB_NAME = os.path.join(pasta, nome)
+    database.inicializar_db()
+    return database.DB_NAME
+
+def cronometrar(func, repeticoes=1):
+    """Executa func() `repeticoes` vezes e devolve o tempo médio em segundos."""
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        func()
+    return (time.perf_counter() - t0) / repeticoes
+
+def formatar_tempo(segundos):
+    if segundos >= 1:
+        return f"{segundos:.2f} s"
+    if segundos >= 1e-3:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos * 1e6:.1f} µs"
+
+def linha(nome, segundos, extra=""):
+    print(f"{nome:<45} {formatar_tempo(segundos):>12} {extra}")
+
+TAREFAS_EXEMPLO = [
+    "Estudar Teoria (Livro/PDF)", "Codar em Python / IA", "Prova de AWS Cloud",
+    "Ver Tutorial no YouTube", "Revisar Anotações", "Laboratório DevOps (Docker/K8s)",
+]
+
+def criar_usuario(nome="Bench"):
+    return database.salvar_perfil_usuario(nome, "Auditivo 👂", 2)
+
+def popular_agenda(n, anos=5, fracao_concluida=0.8, semente=42, user_id=1, analisar=True):
+    """Insere n eventos sintéticos do usuário espalhados pelos últimos `anos` (e um pouco no futuro)."""
+    import random
+    from datetime import datetime, timedelta
+
+    rnd = random.Random(semente)
+    agora = datetime.now().replace(microsecond=0)
+    janela = int(anos * 365 * 24 * 60)  # em minutos
+    linhas = []
+    for _ in range(n):
+        inicio = agora - timedelta(minutes=rnd.randrange(janela)) + timedelta(days=30)
+        minutos = rnd.choice((25, 30, 45, 60, 90))
+        concluido = 1 if inicio < agora and rnd.random() < fracao_concluida else 0
+        linhas.append((user_id, rnd.choice(TAREFAS_EXEMPLO), inicio.isoformat(),
+                       (inicio + timedelta(minutes=minutos)).isoformat(),
+                       minutos, minutos if concluido else None, concluido))
+    with database.transacao() as conn:
+        conn.executemany("""
+            INSERT INTO agenda (user_id, tarefa_nome, inicio, fim, minutos_foco_planejado, minutos_foco_realizado, concluido)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, linhas)
+        if analisar:
+            conn.execute("ANALYZE")
@@ -0,0 +1,48 @@
+# Escalonamento da busca de hiperparâmetros (busca_hiperparametros.py) com o número de
+# processos: as mesmas combinações (poucas épocas, sem parada antecipada) com 1, 2, 4...
+# processos até o número de núcleos. Mostra o ganho e a eficiência (ganho / processos).
+# Sai com código 1 se a eficiência com todos os núcleos ficar abaixo de EFICIENCIA_MINIMA.
+#
+# Uso: python benchmarks/bench_busca.py [combinacoes]
+import sys
+import time
+
+from _comum import linha
+import busca_hiperparametros as busca
+
+N_COMBINACOES = 8
+EPOCAS = 10
+FOLDS = 2
+EFICIENCIA_MINIMA = 0.6
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_COMBINACOES
+    lista = [{**p, "epocas": EPOCAS} for p in busca.combinacoes('aleatorio', n, semente=1)]
+    nucleos = busca.nucleos()
+    contagens = sorted({1, nucleos} | {2 ** k for k in range(1, nucleos.bit_length()) if 2 ** k < nucleos})
+    print(f"{n} combinações x {FOLDS} folds, {EPOCAS} épocas cada; {nucleos} núcleos disponíveis")
+
+    tempos = {}
+    for processos in contagens:
+        t0 = time.perf_counter()
+        resultados = busca.buscar(lista, folds=FOLDS, processos=processos, paciencia=0)
+        tempos[processos] = time.perf_counter() - t0
+        if len(resultados) != n:
+            print(f"ERRO: {len(resultados)} de {n} combinações terminaram com {processos} processos")
+            sys.exit(1)
+    print()
+    for processos, t in tempos.items():
+        ganho = tempos[1] / t
+        linha(f"{processos} processo(s)", t, f"ganho {ganho:.2f}x, eficiência {ganho / processos:.0%}")
+
+    if nucleos == 1:
+        print("\nSó 1 núcleo disponível: nada para comparar.")
+        return
+    eficiencia = tempos[1] / tempos[nucleos] / nucleos
+    if eficiencia < EFICIENCIA_MINIMA:
+        print(f"\nERRO: eficiência de {eficiencia:.0%} com {nucleos} processos (mínimo {EFICIENCIA_MINIMA:.0%})")
+        sys.exit(1)
+    print(f"\nOk: {eficiencia:.0%} de eficiência com {nucleos} processos")
+
+if __name__ == "__main__":
+    main()
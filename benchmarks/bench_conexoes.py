@@ -0,0 +1,44 @@
+# Compara o padrão antigo (abre/fecha conexão em toda chamada) com o pool do database.py
+import sqlite3
+
+from _comum import banco_temporario, cronometrar, linha
+import database
+
+N = 2000
+
+def usuario_existe_antigo():
+    # Cópia do comportamento antigo: conexão nova, uma query, fecha
+    conn = sqlite3.connect(database.DB_NAME, check_same_thread=False)
+    c = conn.cursor()
+    c.execute("SELECT count(*) FROM usuario")
+    existe = c.fetchone()[0] > 0
+    conn.close()
+    return existe
+
+def adicionar_evento_antigo():
+    conn = sqlite3.connect(database.DB_NAME, check_same_thread=False)
+    conn.execute("INSERT INTO agenda (tarefa_nome, inicio, fim, minutos_foco_planejado) VALUES (?, ?, ?, ?)",
+                 ("Bench", "2025-01-01T19:00:00", "2025-01-01T20:00:00", 60))
+    conn.commit()
+    conn.close()
+
+def main():
+    banco_temporario()
+    user_id = database.salvar_perfil_usuario("Bench", "Auditivo 👂", 2)
+
+    print(f"Leitura (usuario_existe) x{N}")
+    t_antigo = cronometrar(usuario_existe_antigo, N)
+    t_pool = cronometrar(database.usuario_existe, N)
+    linha("abre/fecha por chamada", t_antigo)
+    linha("pool + WAL", t_pool, f"({t_antigo / t_pool:.1f}x)")
+
+    print(f"\nEscrita (adicionar_evento) x{N // 4}")
+    # O antigo roda sobre o mesmo arquivo (já em WAL), então a diferença medida é só a da conexão
+    t_antigo = cronometrar(adicionar_evento_antigo, N // 4)
+    t_pool = cronometrar(lambda: database.adicionar_evento(user_id, "Bench", "2025-01-01T19:00:00",
+                                                           "2025-01-01T20:00:00", 60), N // 4)
+    linha("abre/fecha por chamada", t_antigo)
+    linha("pool + WAL", t_pool, f"({t_antigo / t_pool:.1f}x)")
+
+if __name__ == "__main__":
+    main()
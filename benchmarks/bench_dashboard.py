@@ -0,0 +1,51 @@
+# Tempo de montar os dados do Dashboard (calendário do mês + próximas missões) com 100k eventos
+from datetime import datetime
+
+from _comum import banco_temporario, cronometrar, linha, popular_agenda
+import database
+import calendario
+from calendario import renderizar_calendario_html
+
+N_EVENTOS = 100_000
+USUARIO = 1  # primeiro perfil do banco novo
+REPETICOES = 5
+
+def dashboard_antigo(ano, mes):
+    # Como era: carrega a agenda inteira, filtra no Python e ordena tudo
+    eventos = database.get_eventos(USUARIO)
+    html = renderizar_calendario_html(ano, mes, eventos)
+    proximas = sorted(eventos, key=lambda x: x['start'])[-4:]
+    return html, proximas
+
+def dashboard_novo(ano, mes):
+    primeiro_dia = datetime(ano, mes, 1)
+    proximo_mes = datetime(ano + mes // 12, mes % 12 + 1, 1)
+    eventos = database.get_eventos_intervalo(USUARIO, primeiro_dia, proximo_mes)
+    html = renderizar_calendario_html(ano, mes, eventos)
+    proximas = database.get_proximas_missoes(USUARIO, 4)
+    return html, proximas
+
+def dashboard_cache(ano, mes):
+    primeiro_dia = datetime(ano, mes, 1)
+    proximo_mes = datetime(ano + mes // 12, mes % 12 + 1, 1)
+    html = calendario.renderizar_calendario_cache(
+        USUARIO, ano, mes, database.get_versao_agenda(USUARIO),
+        lambda: database.get_eventos_intervalo(USUARIO, primeiro_dia, proximo_mes))
+    proximas = database.get_proximas_missoes(USUARIO, 4)
+    return html, proximas
+
+def main():
+    banco_temporario("dashboard.db")
+    popular_agenda(N_EVENTOS, user_id=USUARIO)
+    hoje = datetime.now()
+    print(f"Dashboard com {N_EVENTOS} eventos (média de {REPETICOES} renders)")
+    t_antigo = cronometrar(lambda: dashboard_antigo(hoje.year, hoje.month), REPETICOES)
+    t_novo = cronometrar(lambda: dashboard_novo(hoje.year, hoje.month), REPETICOES)
+    linha("antes: get_eventos() + filtro no Python", t_antigo)
+    linha("depois: intervalo + próximas no SQL", t_novo, f"({t_antigo / t_novo:.0f}x)")
+    calendario.limpar_cache()
+    t_cache = cronometrar(lambda: dashboard_cache(hoje.year, hoje.month), REPETICOES)
+    linha("depois + cache do mês (rerun sem mudança)", t_cache, f"({t_antigo / t_cache:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Materialização dos eventos: iterrows (antigo) x cursor direto x formato colunar
+import sys
+
+import pandas as pd
+
+from _comum import banco_temporario, cronometrar, linha, popular_agenda
+import database
+
+TAMANHOS = (10_000, 100_000, 1_000_000)
+USUARIO = 1  # primeiro perfil do banco novo
+
+def get_eventos_iterrows():
+    # Cópia da versão antiga, com pandas + iterrows
+    with database.conexao() as conn:
+        df = pd.read_sql_query("SELECT id, tarefa_nome, inicio, fim, concluido, minutos_foco_planejado FROM agenda WHERE user_id = ?", conn,
+                               params=(USUARIO,))
+    eventos = []
+    for _, row in df.iterrows():
+        cor = "#28a745" if row['concluido'] else "#3174ad"
+        eventos.append({
+            "title": row['tarefa_nome'],
+            "start": row['inicio'],
+            "end": row['fim'],
+            "backgroundColor": cor,
+            "id": str(row['id']),
+            "minutos_foco_planejado": row['minutos_foco_planejado']
+        })
+    return eventos
+
+def main():
+    tamanhos = [int(a) for a in sys.argv[1:]] or TAMANHOS
+    banco_temporario("eventos.db")
+    total = 0
+    for n in tamanhos:
+        popular_agenda(n - total, semente=n, user_id=USUARIO)
+        total = n
+        print(f"\n{n} eventos")
+        t_antigo = cronometrar(get_eventos_iterrows)
+        t_novo = cronometrar(lambda: database.get_eventos(USUARIO))
+        t_colunas = cronometrar(lambda: database.get_eventos(USUARIO, formato="colunas"))
+        linha("pandas + iterrows", t_antigo)
+        linha("cursor + list comprehension", t_novo, f"({t_antigo / t_novo:.1f}x)")
+        linha("cursor + colunas NumPy", t_colunas, f"({t_antigo / t_colunas:.1f}x)")
+
+if __name__ == "__main__":
+    main()
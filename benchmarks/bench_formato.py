@@ -0,0 +1,60 @@
+# Formato colunar (dados_colunares.py) x CSV: tamanho em disco e tempo de carga.
+# "abrir" só mapeia os arquivos; "abrir + ler tudo" soma todas as colunas, para a
+# comparação com o pd.read_csv (que sempre lê e converte o arquivo inteiro) ser justa.
+#
+# Uso: python benchmarks/bench_formato.py [linhas_sinteticas]
+import os
+import shutil
+import sys
+import tempfile
+
+from _comum import RAIZ, cronometrar, linha
+import dados_colunares
+import gerar_dados
+
+import pandas as pd
+
+N_SINTETICO = 1_000_000
+
+def tamanho(caminho):
+    if os.path.isdir(caminho):
+        return sum(os.path.getsize(os.path.join(caminho, f)) for f in os.listdir(caminho))
+    return os.path.getsize(caminho)
+
+def ler_tudo(tabela):
+    return sum(float(tabela[c].sum()) for c in tabela.colunas)
+
+def comparar(csv, pasta):
+    destino = os.path.join(pasta, os.path.basename(dados_colunares.caminho_colunar(csv)))
+    t_converter = cronometrar(lambda: dados_colunares.converter(csv, destino))
+    repeticoes = max(1, 200_000 // len(dados_colunares.abrir(destino)))
+    t_csv = cronometrar(lambda: pd.read_csv(csv), repeticoes)
+    t_abrir = cronometrar(lambda: dados_colunares.abrir(destino), repeticoes)
+    t_ler = cronometrar(lambda: ler_tudo(dados_colunares.abrir(destino)), repeticoes)
+
+    # Mesmos dados (float32 arredonda as colunas contínuas)
+    df, tabela = pd.read_csv(csv), dados_colunares.abrir(destino)
+    for c in df.columns:
+        assert abs(df[c].to_numpy() - tabela[c]).max() <= 1e-3 * max(1, abs(df[c]).max()), c
+
+    print(f"\n{os.path.basename(csv)}: {len(df)} linhas, "
+          f"{tamanho(csv) / 1024:,.0f} KB -> {tamanho(destino) / 1024:,.0f} KB "
+          f"({tamanho(csv) / tamanho(destino):.1f}x menor)")
+    linha("  converter CSV -> colunar", t_converter)
+    linha("  pd.read_csv", t_csv)
+    linha("  colunar: abrir (memmap)", t_abrir, f"({t_csv / t_abrir:.0f}x)")
+    linha("  colunar: abrir + ler tudo", t_ler, f"({t_csv / t_ler:.0f}x)")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_SINTETICO
+    pasta = tempfile.mkdtemp(prefix="sentinela_bench_")
+    for nome in ("historico_estudo.csv", "historico_estudo_v3.csv"):
+        csv = os.path.join(pasta, nome)
+        shutil.copy(os.path.join(RAIZ, nome), csv)
+        comparar(csv, pasta)
+    sintetico = os.path.join(pasta, f"sintetico_{n}.csv")
+    gerar_dados.escrever_csv(sintetico, gerar_dados.gerar(n, 1))
+    comparar(sintetico, pasta)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Gerador de dados sintéticos: laço antigo x gerar_dados.py vetorizado, em linhas/s.
+# Também mede a gravação em blocos (CSV e colunar) e o pico de memória, que tem que
+# depender do tamanho do bloco e não do total de linhas.
+#
+# Uso: python benchmarks/bench_gerador.py [linhas]
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from _comum import cronometrar
+import gerar_dados
+from verificar_gerador import gerador_antigo
+
+N_LINHAS = 1_000_000
+N_ANTIGO = 100_000  # o laço antigo é lento demais para 1M
+
+def por_segundo(linhas, segundos):
+    return f"{linhas / segundos:>14,.0f} linhas/s"
+
+def pico_memoria(func):
+    tracemalloc.start()
+    func()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return pico / 2**20
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_LINHAS
+    pasta = tempfile.mkdtemp(prefix="sentinela_bench_")
+    csv, colunas = os.path.join(pasta, "dados.csv"), os.path.join(pasta, "dados.colunas")
+
+    t_antigo = cronometrar(lambda: gerador_antigo(N_ANTIGO, 1))
+    t_gerar = cronometrar(lambda: [None for _ in gerar_dados.gerar(n, 1)])
+    t_csv = cronometrar(lambda: gerar_dados.escrever_csv(csv, gerar_dados.gerar(n, 1)))
+    t_colunas = cronometrar(lambda: gerar_dados.escrever_colunas(colunas, n, gerar_dados.gerar(n, 1)))
+
+    print(f"{n} linhas (laço antigo com {N_ANTIGO})\n")
+    print(f"{'laço antigo (random + ifs)':<45} {por_segundo(N_ANTIGO, t_antigo)}")
+    print(f"{'vetorizado, só gerar':<45} {por_segundo(n, t_gerar)}  ({t_antigo / N_ANTIGO / (t_gerar / n):.0f}x)")
+    print(f"{'vetorizado + CSV em blocos':<45} {por_segundo(n, t_csv)}  ({os.path.getsize(csv) / 2**20:.0f} MB)")
+    tamanho = sum(os.path.getsize(os.path.join(colunas, f)) for f in os.listdir(colunas))
+    print(f"{'vetorizado + colunar em blocos':<45} {por_segundo(n, t_colunas)}  ({tamanho / 2**20:.0f} MB)")
+
+    print("\nPico de memória gravando o colunar")
+    for bloco in (10_000, 100_000):
+        for linhas in (n // 10, n):
+            mb = pico_memoria(lambda: gerar_dados.escrever_colunas(colunas, linhas, gerar_dados.gerar(linhas, 1, bloco)))
+            print(f"  bloco {bloco:>7}, {linhas:>9} linhas: {mb:6.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Índice de intervalos em memória (intervalos.IndiceIntervalos) x varredura ingênua da agenda.
+# Consultas: o que cruza 19h-20h, está livre?, primeiro horário livre e dia mais cheio do mês.
+# Também mede montar o índice e mantê-lo em dia a cada insert/delete. Sai com código 1 se
+# uma escrita numa agenda desse tamanho passar de ESCRITA_MAX_S (ela segura a trava de escrita).
+#
+# Uso: python benchmarks/bench_intervalos.py [eventos]
+import random
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+
+from _comum import banco_temporario, criar_usuario, cronometrar, linha, popular_agenda
+import database
+from intervalos import DIA_S, segundos
+
+N_EVENTOS = 1_000_000
+CONSULTAS = 200
+ESCRITA_MAX_S = 0.005 # Não pode depender do tamanho da agenda do usuário
+
+def ingenuo_sobrepostos(linhas, a, b):
+    return [l for l in linhas if l[1] < b and l[2] > a]
+
+def ingenuo_primeiro_livre(linhas, desde, ate, duracao):
+    # Ordena o que cruza a janela e anda com o cursor
+    cursor = desde
+    for _, ini, fim in sorted((l for l in linhas if l[1] < ate and l[2] > desde), key=lambda l: l[1]):
+        if ini >= cursor + duracao:
+            break
+        cursor = max(cursor, fim)
+    return cursor if cursor + duracao <= ate else None
+
+def ingenuo_dia_mais_cheio(linhas, a, b):
+    por_dia = Counter()
+    for _, ini, fim in linhas:
+        if a <= ini < b:
+            por_dia[ini // DIA_S] += (fim - ini) // 60
+    return max(por_dia.items(), key=lambda x: x[1], default=None)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_EVENTOS
+    banco_temporario("intervalos.db")
+    user_id = criar_usuario()
+    # Sem ANALYZE, como o banco do app: sem estatísticas o SQLite escolhe o índice por
+    # user_id em consultas que também filtram pelo id
+    popular_agenda(n, anos=10, user_id=user_id, analisar=False)
+    print(f"{n} eventos")
+
+    t_montar = cronometrar(lambda: (database._indices.limpar(), database.get_indice_agenda(user_id)))
+    indice = database.get_indice_agenda(user_id)
+    linhas = list(zip(indice.ids, indice.inicios, indice.fins))
+    linha("montar o índice (SELECT + arrays)", t_montar)
+
+    rnd = random.Random(1)
+    hoje = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    dias = [segundos(hoje - timedelta(days=rnd.randrange(3000))) for _ in range(CONSULTAS)]
+    janelas = [(d + 19 * 3600, d + 20 * 3600) for d in dias]
+
+    for nome, rapido, lento in (
+        ("sobrepostos(19h-20h)",
+         lambda: [indice.sobrepostos(a, b) for a, b in janelas],
+         lambda: [ingenuo_sobrepostos(linhas, a, b) for a, b in janelas[:5]]),
+        ("livre(19h-20h)",
+         lambda: [indice.livre(a, b) for a, b in janelas],
+         lambda: [not ingenuo_sobrepostos(linhas, a, b) for a, b in janelas[:5]]),
+        ("primeiro_livre(60 min, no dia)",
+         lambda: [indice.primeiro_livre(d, d + DIA_S, 3600) for d in dias],
+         lambda: [ingenuo_primeiro_livre(linhas, d, d + DIA_S, 3600) for d in dias[:5]]),
+        ("dia_mais_cheio(30 dias)",
+         lambda: [indice.dia_mais_cheio(d, d + 30 * DIA_S) for d in dias],
+         lambda: [ingenuo_dia_mais_cheio(linhas, d, d + 30 * DIA_S) for d in dias[:5]]),
+    ):
+        t_rapido = cronometrar(rapido) / len(dias)
+        t_lento = cronometrar(lento) / 5
+        print(f"\n{nome}")
+        linha("  varredura ingênua", t_lento)
+        linha("  índice", t_rapido, f"({t_lento / t_rapido:.0f}x)")
+
+    # As respostas têm que ser as mesmas
+    for (a, b), d in zip(janelas[:5], dias[:5]):
+        assert sorted(indice.sobrepostos(a, b)) == sorted(ingenuo_sobrepostos(linhas, a, b))
+        assert indice.primeiro_livre(d, d + DIA_S, 3600) == ingenuo_primeiro_livre(linhas, d, d + DIA_S, 3600)
+
+    print("\nManutenção (gravando pelo database.py)")
+    inicio = hoje + timedelta(days=1, hours=7)
+    t_sem_indice = cronometrar(lambda: (database._indices.limpar(), database.adicionar_evento(
+        user_id, "Bench", inicio.isoformat(), (inicio + timedelta(minutes=30)).isoformat(), 30)), 20)
+    indice = database.get_indice_agenda(user_id)
+    t_insert = cronometrar(lambda: database.adicionar_evento(
+        user_id, "Bench", inicio.isoformat(), (inicio + timedelta(minutes=30)).isoformat(), 30), 20)
+    plano = [{"tarefa": "Bench", "inicio": (inicio + timedelta(days=i)).isoformat(),
+              "fim": (inicio + timedelta(days=i, minutes=60)).isoformat(), "minutos": 60} for i in range(365)]
+    t_lote = cronometrar(lambda: database.adicionar_eventos_lote(user_id, plano), 3)
+    ultimo = database.get_eventos_intervalo(user_id, inicio, inicio + timedelta(days=1), limit=1)[0]
+    t_delete = cronometrar(lambda: database.deletar_evento(user_id, int(ultimo['id'])))
+    fim = inicio + timedelta(minutes=45)
+    t_finalizar = cronometrar(lambda: database.finalizar_missao_manual(
+        user_id, "Bench", 45, inicio.isoformat(), fim.isoformat()), 20)
+    assert database.get_indice_agenda(user_id) is indice, "o índice foi remontado em vez de atualizado"
+    linha("adicionar_evento sem índice carregado", t_sem_indice)
+    linha("adicionar_evento + atualizar índice", t_insert)
+    linha("finalizar_missao_manual + índice", t_finalizar)
+    linha("adicionar_eventos_lote(365) + índice", t_lote)
+    linha("deletar_evento + índice", t_delete)
+
+    lentas = [nome for nome, t in (("adicionar_evento", t_insert), ("finalizar_missao_manual", t_finalizar),
+                                   ("deletar_evento", t_delete)) if t > ESCRITA_MAX_S]
+    if lentas:
+        print(f"\nERRO: escrita acima de {ESCRITA_MAX_S * 1e3:.0f} ms com {n} eventos: {', '.join(lentas)}")
+        sys.exit(1)
+    print(f"\nOk: escritas abaixo de {ESCRITA_MAX_S * 1e3:.0f} ms com {n} eventos na agenda")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Gravar um plano de 365 sessões: adicionar_evento em loop x adicionar_eventos_lote
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from _comum import banco_temporario, cronometrar, linha
+import database
+
+N_SESSOES = 365
+
+def plano(n):
+    inicio = datetime(2030, 1, 1, 19, 0)
+    return [{
+        "tarefa": "Estudar Teoria (Livro/PDF) (Rev: Bench)",
+        "inicio": (inicio + timedelta(days=i)).isoformat(),
+        "fim": (inicio + timedelta(days=i, minutes=60)).isoformat(),
+        "minutos": 60,
+    } for i in range(n)]
+
+def gravar_em_loop(user_id, items):
+    for item in items:
+        database.adicionar_evento(user_id, item['tarefa'], item['inicio'], item['fim'], item['minutos'])
+
+def gravar_padrao_antigo(caminho, items):
+    # Como era antes do pool: conexão nova por sessão, journal padrão (DELETE) e fsync a cada commit
+    for item in items:
+        conn = sqlite3.connect(caminho)
+        conn.execute("INSERT INTO agenda (tarefa_nome, inicio, fim, minutos_foco_planejado) VALUES (?, ?, ?, ?)",
+                     (item['tarefa'], item['inicio'], item['fim'], item['minutos']))
+        conn.commit()
+        conn.close()
+
+def main():
+    caminho = banco_temporario("lote.db")
+    user_id = database.salvar_perfil_usuario("Bench", "Auditivo 👂", 2)
+    items = plano(N_SESSOES)
+
+    caminho_antigo = os.path.join(os.path.dirname(caminho), "antigo.db")
+    conn = sqlite3.connect(caminho_antigo)
+    conn.execute("CREATE TABLE agenda (id INTEGER PRIMARY KEY AUTOINCREMENT, tarefa_nome TEXT, inicio DATETIME, "
+                 "fim DATETIME, minutos_foco_planejado INTEGER)")
+    conn.close()
+
+    print(f"Plano de {N_SESSOES} sessões")
+    t_antigo = cronometrar(lambda: gravar_padrao_antigo(caminho_antigo, items), 3)
+    t_loop = cronometrar(lambda: gravar_em_loop(user_id, items), 3)
+    t_lote = cronometrar(lambda: database.adicionar_eventos_lote(user_id, items, meta={"nome_meta": "Bench"}), 3)
+    linha("padrão antigo (conexão + fsync por sessão)", t_antigo)
+    linha("adicionar_evento em loop (1 commit cada)", t_loop)
+    linha("adicionar_eventos_lote (1 transação)", t_lote, f"({t_loop / t_lote:.0f}x / {t_antigo / t_lote:.0f}x)")
+
+if __name__ == "__main__":
+    main()
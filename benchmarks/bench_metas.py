@@ -0,0 +1,71 @@
+# Escalonador de várias metas (planejador.replanejar_metas) ao longo de um ano.
+# Mede o replanejamento completo com 100, 300 e 1000 metas e o parcial (mudou uma meta
+# no meio do ano), e confere que nenhuma sessão bate com outra nem passa do prazo.
+#
+# Uso: python benchmarks/bench_metas.py [metas ...]
+import random
+import sys
+from datetime import datetime, timedelta
+
+from _comum import banco_temporario, criar_usuario, cronometrar, linha, popular_agenda
+import database
+import planejador
+
+QUANTIDADES = (100, 300, 1000)
+EVENTOS_AVULSOS = 2000
+DIAS = [0, 1, 2, 3, 4, 5]
+
+def criar_metas(user_id, n, hoje, semente):
+    rnd = random.Random(semente)
+    for k in range(n):
+        prazo = (hoje + timedelta(days=rnd.randrange(7, 365))).replace(hour=0, minute=0, second=0, microsecond=0)
+        database.adicionar_eventos_lote(user_id, [], meta={
+            "nome_meta": f"Meta {k}",
+            "tarefa_associada": "Estudar Teoria (Livro/PDF)",
+            "data_alvo": prazo.isoformat(),
+            "total_horas_estimadas": rnd.choice((2, 5, 10, 20)),
+        })
+
+def conferir(user_id, hoje):
+    prazos = {m['id']: m['data_alvo'] for m in database.get_metas_ativas(user_id, hoje)}
+    with database.conexao() as conn:
+        linhas = conn.execute("SELECT inicio_ts, fim_ts, meta_id, inicio FROM agenda WHERE user_id = ? "
+                              "AND inicio_ts > ? ORDER BY inicio_ts", (user_id, planejador._segundos(hoje))).fetchall()
+    # Os avulsos podem se cruzar entre si; as sessões das metas não podem cruzar nada
+    ocupacao = planejador.Ocupacao(l for l in linhas if l[2] is None)
+    for ini, fim, meta_id, inicio in linhas:
+        if meta_id is not None:
+            assert ocupacao.livre(ini, fim), "sessão sobreposta"
+            assert inicio < prazos[meta_id], "sessão depois do prazo"
+            ocupacao.ocupar(ini, fim)
+    return sum(1 for l in linhas if l[2] is not None)
+
+def main():
+    quantidades = [int(a) for a in sys.argv[1:]] or QUANTIDADES
+    hoje = datetime.now().replace(microsecond=0)
+    for n in quantidades:
+        banco_temporario(f"metas_{n}.db")
+        user_id = criar_usuario()
+        # Compromissos avulsos no próximo ano, que o plano tem que contornar
+        popular_agenda(EVENTOS_AVULSOS, anos=1, fracao_concluida=0, user_id=user_id)
+        with database.transacao() as conn:
+            conn.execute("UPDATE agenda SET inicio = datetime(inicio, '+330 days'), fim = datetime(fim, '+330 days')")
+        criar_metas(user_id, n, hoje, semente=n)
+
+        t_total = cronometrar(lambda: planejador.replanejar_metas(user_id, DIAS, hoje=hoje))
+        planos, faltando = planejador.replanejar_metas(user_id, DIAS, hoje=hoje)
+        sessoes = conferir(user_id, hoje)
+        # Muda uma meta que vence no meio do ano: só ela e as posteriores são refeitas
+        meio = hoje + timedelta(days=180)
+        t_parcial = cronometrar(lambda: planejador.replanejar_metas(user_id, DIAS, desde_prazo=meio, hoje=hoje))
+        conferir(user_id, hoje)
+        afetadas = sum(1 for m in database.get_metas_ativas(user_id, hoje)
+                       if datetime.fromisoformat(m['data_alvo']) >= meio)
+
+        print(f"\n{n} metas em 1 ano + {EVENTOS_AVULSOS} compromissos: {sessoes} sessões, "
+              f"{len(faltando)} metas sem espaço até o prazo")
+        linha("replanejar todas", t_total)
+        linha(f"replanejar a partir do meio ({afetadas} metas)", t_parcial)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# Custo da camada de medição (metricas.py) desligada e ligada, e conferência do que ela registra.
+#   - custo por chamada de uma função medida (desligada / ligada) contra a função pura;
+#   - custo nas operações de verdade (banco com eventos, calendário, planejador, IA);
+#   - percentis dos histogramas contra os exatos (np.percentile) numa amostra conhecida;
+#   - linhas dos comandos SQL e o texto do Prometheus.
+# Sai com código 1 se a camada desligada custar mais que CUSTO_MAX_DESLIGADA_S por chamada
+# ou se algo registrado não bater.
+#
+# Uso: python benchmarks/bench_metricas.py [eventos]
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from _comum import RAIZ, banco_temporario, cronometrar, criar_usuario, formatar_tempo, popular_agenda
+import calendario
+import database
+import metricas
+import motor_ia
+import planejador
+
+N_EVENTOS = 20_000
+USUARIO = 1
+CUSTO_MAX_DESLIGADA_S = 1e-6
+ERRO_MAX_PERCENTIL = 0.20 # Largura de um balde (~19%)
+
+def custo_por_chamada():
+    def pura(x):
+        return x
+    medida = metricas.medido("bench.nada")(pura)
+    n = 200_000
+    t_pura = cronometrar(lambda: [pura(i) for i in range(n)]) / n
+    metricas.desativar()
+    t_desligada = cronometrar(lambda: [medida(i) for i in range(n)]) / n
+    metricas.ativar()
+    t_ligada = cronometrar(lambda: [medida(i) for i in range(n)]) / n
+    metricas.desativar()
+    return t_desligada - t_pura, t_ligada - t_pura
+
+def operacoes():
+    hoje = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    mes, proximo = datetime(hoje.year, hoje.month, 1), datetime(hoje.year + hoje.month // 12, hoje.month % 12 + 1, 1)
+    eventos_mes = database.get_eventos_intervalo(USUARIO, mes, proximo)
+    previsor = motor_ia.Previsor()
+    vetor = [0, 19, 0, 0, 1, 5, 3, 3, 7.0, 2.0, 300.0]
+    prova = hoje + timedelta(days=365)
+    return {
+        "get_eventos_intervalo (mês)": lambda: database.get_eventos_intervalo(USUARIO, mes, proximo),
+        "get_proximas_missoes": lambda: database.get_proximas_missoes(USUARIO, 4),
+        "renderizar_calendario_html": lambda: calendario.renderizar_calendario_html(hoje.year, hoje.month, eventos_mes),
+        "gerar_cronograma_prova (1 ano)": lambda: planejador.gerar_cronograma_prova(
+            "Prova", "Revisar Anotações", prova, 0, 5, [0, 2, 4],
+            database.get_intervalos_ocupados(USUARIO, hoje, prova), hoje),
+        "Previsor.prever (cache)": lambda: previsor.prever(vetor),
+    }
+
+def medir_operacoes(repeticoes=30):
+    tempos = {}
+    for ligada in (False, True):
+        metricas.ativar() if ligada else metricas.desativar()
+        database.fechar_conexoes()
+        for nome, funcao in operacoes().items():
+            funcao()
+            tempos.setdefault(nome, []).append(min(cronometrar(funcao, repeticoes) for _ in range(5)))
+    metricas.desativar()
+    database.fechar_conexoes()
+    return tempos
+
+def conferir_percentis(falhas):
+    amostra = np.random.default_rng(1).lognormal(np.log(2e-3), 1.0, 20_000)
+    h = metricas.Histograma()
+    for s in amostra:
+        h.observar(float(s))
+    for q in (0.50, 0.95, 0.99):
+        exato, estimado = np.quantile(amostra, q), h.quantil(q)
+        erro = abs(estimado - exato) / exato
+        print(f"  p{int(q * 100):<3} exato {formatar_tempo(exato):>10}  histograma {formatar_tempo(estimado):>10}  ({erro:.1%})")
+        if erro > ERRO_MAX_PERCENTIL:
+            falhas.append(f"p{int(q * 100)} do histograma erra {erro:.0%}")
+
+def conferir_registros(falhas):
+    metricas.limpar()
+    metricas.ativar()
+    database.fechar_conexoes()
+    hoje = datetime.now()
+    eventos = database.get_eventos_intervalo(USUARIO, hoje - timedelta(days=60), hoje)
+    # Sozinha: os SELECTs da agenda podem cair no mesmo nome (truncado) e somar as linhas
+    sql = [l for l in metricas.resumo() if l["operacao"].startswith("sql SELECT") and "FROM agenda" in l["operacao"]]
+    if [l["linhas"] for l in sql] != [len(eventos)]:
+        falhas.append(f"o SELECT da agenda não registrou as {len(eventos)} linhas lidas")
+    for funcao in operacoes().values():
+        funcao()
+    resumo = {l["operacao"]: l for l in metricas.resumo()}
+    metricas.desativar()
+    database.fechar_conexoes()
+
+    esperadas = ["db.get_eventos_intervalo", "db.get_proximas_missoes", "calendario.renderizar_calendario_html",
+                 "planejador.gerar_cronograma_prova", "ia.prever", "ia.motor.prever"]
+    for nome in esperadas:
+        if nome not in resumo:
+            falhas.append(f"{nome} não foi registrada")
+    for l in resumo.values():
+        if not l["p50"] <= l["p95"] <= l["p99"] <= l["max"]:
+            falhas.append(f"percentis fora de ordem em {l['operacao']}")
+
+    texto = metricas.texto_prometheus()
+    formato = re.compile(r'^(# (HELP|TYPE) .+|[a-z_]+(\{operacao="([^"\\]|\\.)*"(,le="[^"]+")?\})? [0-9.e+-]+)$')
+    ruins = [linha for linha in texto.splitlines() if not formato.match(linha)]
+    if ruins:
+        falhas.append(f"linha inválida no Prometheus: {ruins[0]}")
+    contagens = re.findall(r'_count\{operacao="db.get_eventos_intervalo"\} (\d+)', texto)
+    if contagens != [str(resumo["db.get_eventos_intervalo"]["chamadas"])]:
+        falhas.append("contagem do Prometheus não bate com o resumo")
+    print(f"  {len(resumo)} operações registradas ({len([n for n in resumo if n.startswith('sql ')])} comandos SQL), "
+          f"{len(texto.splitlines())} linhas no texto do Prometheus")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_EVENTOS
+    banco_temporario("metricas.db")
+    criar_usuario()
+    popular_agenda(n, user_id=USUARIO)
+    os.chdir(RAIZ) # O Previsor lê o modelos.json da raiz
+    falhas = []
+
+    desligada, ligada = custo_por_chamada()
+    print(f"Custo por chamada de uma função medida: desligada {desligada * 1e9:.0f} ns, ligada {ligada * 1e9:.0f} ns")
+    if desligada > CUSTO_MAX_DESLIGADA_S:
+        falhas.append(f"camada desligada custa {desligada * 1e9:.0f} ns por chamada")
+
+    print(f"\nOperações com {n} eventos na agenda:")
+    print(f"  {'operação':<34} {'desligada':>11} {'ligada':>11}")
+    for nome, (t_desligada, t_ligada) in medir_operacoes().items():
+        print(f"  {nome:<34} {formatar_tempo(t_desligada):>11} {formatar_tempo(t_ligada):>11} "
+              f"({t_ligada / t_desligada - 1:+.0%})")
+
+    print("\nPercentis do histograma x exatos (20 mil tempos log-normais):")
+    conferir_percentis(falhas)
+    print("\nRegistros:")
+    conferir_registros(falhas)
+
+    if falhas:
+        print("\n" + "\n".join(f"ERRO: {f}" for f in falhas))
+        sys.exit(1)
+    print("\nOk: medição barata desligada, percentis e registros conferem")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Motor NumPy x caminho antigo do carregar_ia() (TensorFlow + joblib) x variantes TFLite:
+# tempo de cold start, memória residente e latência de uma previsão e da grade inteira
+# do recomendador. O TFLite usa o interpretador mais leve instalado (o do TensorFlow,
+# se não houver ai-edge-litert nem tflite-runtime: aí o RSS inclui o TensorFlow).
+import importlib.util
+import json
+import subprocess
+import sys
+
+from _comum import RAIZ
+
+REPETICOES = 200
+
+# Cada caminho roda num processo novo para medir o cold start de verdade
+SCRIPT = r'''
+import json, resource, sys, time
+t0 = time.perf_counter()
+{carregar}
+t_carga = time.perf_counter() - t0
+x = [[4, 19, 0, 1, 3, 5, 3, 3, 7.0, 2.0, 300]]
+prever(x)  # aquecimento
+t0 = time.perf_counter()
+for _ in range({repeticoes}):
+    y = prever(x)
+t_prev = (time.perf_counter() - t0) / {repeticoes}
+import motor_ia
+grade = motor_ia.montar_grade(1, 5, 3, 3, 7.0, 2.0, 300)
+prever_lote(grade)
+t0 = time.perf_counter()
+for _ in range(20):
+    prever_lote(grade)
+t_grade = (time.perf_counter() - t0) / 20
+print(json.dumps({{"carga": t_carga, "previsao": t_prev, "grade": t_grade, "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "y": float(y)}}))
+'''
+
+CAMINHOS = {
+    "TensorFlow (carregar_ia antigo)": '''
+import os
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+import tensorflow as tf, joblib
+model = tf.keras.models.load_model("sentinela_brain_v3.h5")
+scaler = joblib.load("meu_scaler_v3.pkl")
+prever = lambda x: model.predict(scaler.transform(x), verbose=0)[0][0]
+prever_lote = lambda X: model.predict(scaler.transform(X), verbose=0)
+''',
+    "NumPy (motor_ia)": '''
+import motor_ia
+motor = motor_ia.carregar_motor()
+prever = lambda x: motor.prever(x)[0]
+prever_lote = motor.prever
+''',
+}
+for _variante in ("int8", "float16"):
+    CAMINHOS[f"TFLite {_variante} (motor_ia)"] = f'''
+import motor_ia
+motor = motor_ia.MotorTFLite(motor_ia.caminho_tflite(motor_ia.ARQUIVO_MODELO, "{_variante}"), motor_ia.carregar_motor())
+prever = lambda x: motor.prever(x)[0]
+prever_lote = motor.prever
+'''
+
+def medir(codigo):
+    script = SCRIPT.format(carregar=codigo, repeticoes=REPETICOES)
+    saida = subprocess.run([sys.executable, "-W", "ignore", "-c", script], cwd=RAIZ,
+                           capture_output=True, text=True, check=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+def main():
+    tem_tf = importlib.util.find_spec("tensorflow") is not None
+    tem_litert = any(importlib.util.find_spec(m) for m in ("ai_edge_litert", "tflite_runtime"))
+    print(f"{'caminho':<34} {'cold start':>11} {'RSS':>9} {'previsão':>11} {'grade':>10}  saída")
+    for nome, codigo in CAMINHOS.items():
+        if ("tensorflow" in codigo or "TFLite" in nome) and not tem_tf and not tem_litert:
+            print(f"{nome:<34} (TensorFlow não instalado, pulando)")
+            continue
+        r = medir(codigo)
+        print(f"{nome:<34} {r['carga'] * 1e3:>9.0f}ms {r['rss_mb']:>7.0f}MB {r['previsao'] * 1e6:>9.1f}µs "
+              f"{r['grade'] * 1e3:>8.2f}ms  {r['y']:.3f}")
+
+if __name__ == "__main__":
+    main()
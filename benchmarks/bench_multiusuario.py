@@ -0,0 +1,44 @@
+# Isolamento por usuário: o tempo das consultas de UM usuário não pode crescer com o
+# número de usuários no banco (todas filtram pelo user_id no começo do índice).
+#
+# Uso: python benchmarks/bench_multiusuario.py [eventos_por_usuario]
+import sys
+from datetime import datetime
+
+from _comum import banco_temporario, criar_usuario, cronometrar, linha, popular_agenda
+import database
+
+USUARIOS = (10, 100, 1000)
+EVENTOS_POR_USUARIO = 1000
+REPETICOES = 50
+
+def consultas(user_id, hoje):
+    primeiro_dia = datetime(hoje.year, hoje.month, 1)
+    proximo_mes = datetime(hoje.year + hoje.month // 12, hoje.month % 12 + 1, 1)
+    yield "get_eventos_intervalo (mês)", lambda: database.get_eventos_intervalo(user_id, primeiro_dia, proximo_mes)
+    yield "get_proximas_missoes", lambda: database.get_proximas_missoes(user_id, 4)
+    yield "get_foco_por_tarefa", lambda: database.get_foco_por_tarefa(user_id)
+    yield "get_versao_agenda", lambda: database.get_versao_agenda(user_id)
+    yield "get_eventos (tudo do usuário)", lambda: database.get_eventos(user_id)
+
+def main():
+    por_usuario = int(sys.argv[1]) if len(sys.argv) > 1 else EVENTOS_POR_USUARIO
+    banco_temporario("multiusuario.db")
+    hoje = datetime.now()
+    total = 0
+    for n in USUARIOS:
+        while total < n:
+            total += 1
+            user_id = criar_usuario(f"Bench {total}")
+            popular_agenda(por_usuario, semente=total, user_id=user_id, analisar=False)
+        database.reconstruir_rollups()
+        with database.transacao() as conn:
+            conn.execute("ANALYZE")
+        print(f"\n{n} usuários x {por_usuario} eventos ({n * por_usuario} linhas na agenda)")
+        # Sempre o mesmo usuário: a agenda dele não muda entre as rodadas
+        for nome, func in consultas(1, hoje):
+            func()  # Aquece (import do pandas, páginas no cache)
+            linha(nome, cronometrar(func, REPETICOES))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Planejador: plano de 3 anos com milhares de eventos já na agenda.
+#   antes:   dia a dia, bloco fixo de 60 min às 19h, ignora a agenda
+#   ingênuo: dia a dia, e confere cada bloco contra a lista inteira de eventos
+#   depois:  salta entre dias permitidos e acha horário livre com busca binária (Ocupacao)
+#
+# Uso: python benchmarks/bench_planejador.py [eventos_na_agenda]
+import sys
+from datetime import datetime, timedelta
+
+from _comum import banco_temporario, cronometrar, linha, popular_agenda
+import database
+import planejador
+
+N_EVENTOS = 5000
+ANOS = 3
+DIAS = [0, 2, 4, 5]  # Seg, Qua, Sex, Sáb
+REPETICOES = 5
+USUARIO = 1  # primeiro perfil do banco novo
+
+def cronograma_antigo(data_prova, hoje):
+    # Cópia do algoritmo antigo (sem a parte de horas, que é a mesma)
+    cronograma = []
+    cursor = hoje + timedelta(days=1)
+    horas_totais = planejador.calcular_horas_necessarias(0, 5, (data_prova - hoje).days)
+    horas_agendadas = 0
+    while horas_agendadas < horas_totais and cursor < data_prova:
+        if cursor.weekday() in DIAS:
+            inicio = cursor.replace(hour=19, minute=0, second=0)
+            cronograma.append((inicio.isoformat(), (inicio + timedelta(minutes=60)).isoformat()))
+            horas_agendadas += 1
+        cursor += timedelta(days=1)
+    return cronograma
+
+def cronograma_ingenuo(data_prova, hoje, ocupados):
+    # Mesmo passo a passo, mas procura um horário livre testando a lista inteira
+    cronograma = []
+    cursor = hoje + timedelta(days=1)
+    horas_totais = planejador.calcular_horas_necessarias(0, 5, (data_prova - hoje).days)
+    horas_agendadas = 0
+    while horas_agendadas < horas_totais and cursor < data_prova:
+        if cursor.weekday() in DIAS:
+            for hora in range(19, 23):
+                ini = planejador._segundos(cursor.replace(hour=hora, minute=0, second=0))
+                fim = ini + 3600
+                if all(f <= ini or i >= fim for i, f, *_ in ocupados):
+                    ocupados.append((ini, fim))
+                    cronograma.append((ini, fim))
+                    horas_agendadas += 1
+                    break
+        cursor += timedelta(days=1)
+    return cronograma
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_EVENTOS
+    banco_temporario("planejador.db")
+    hoje = datetime.now().replace(microsecond=0)
+    data_prova = hoje + timedelta(days=365 * ANOS)
+    # Eventos só no futuro, na janela do plano
+    popular_agenda(n, anos=ANOS, fracao_concluida=0, user_id=USUARIO)
+    with database.transacao() as conn:
+        conn.execute("UPDATE agenda SET inicio = datetime(inicio, ?), fim = datetime(fim, ?)",
+                     (f"+{365 * ANOS - 30} days",) * 2)
+    ocupados = database.get_intervalos_ocupados(USUARIO, hoje, data_prova)
+
+    def novo():
+        return planejador.gerar_cronograma_prova("Bench", "Estudar", data_prova, 0, 5, DIAS, ocupados, hoje)
+
+    ok, plano = novo()
+    assert ok, plano
+    ocupacao = planejador.Ocupacao(ocupados)
+    for item in plano:
+        ini = planejador._segundos(datetime.fromisoformat(item['inicio']))
+        fim = planejador._segundos(datetime.fromisoformat(item['fim']))
+        assert ocupacao.livre(ini, fim), f"bloco em cima de evento: {item}"
+    print(f"Plano de {ANOS} anos com {len(ocupados)} eventos na agenda: {len(plano)} blocos, "
+          f"{sum(i['minutos'] for i in plano) / 60:.0f}h, nenhum conflito")
+
+    t_antigo = cronometrar(lambda: cronograma_antigo(data_prova, hoje), REPETICOES)
+    t_ingenuo = cronometrar(lambda: cronograma_ingenuo(data_prova, hoje, list(ocupados)), 1)
+    t_consulta = cronometrar(lambda: database.get_intervalos_ocupados(USUARIO, hoje, data_prova), REPETICOES)
+    t_novo = cronometrar(novo, REPETICOES)
+    linha("antes: dia a dia, ignora a agenda", t_antigo)
+    linha("ingênuo: dia a dia + varre os eventos", t_ingenuo)
+    linha("depois: get_intervalos_ocupados", t_consulta)
+    linha("depois: gerar_cronograma_prova", t_novo, f"({t_ingenuo / t_novo:.0f}x o ingênuo)")
+
+if __name__ == "__main__":
+    main()
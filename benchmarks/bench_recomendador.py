@@ -0,0 +1,23 @@
+# Recomendação de horários: grade inteira numa passada x uma previsão por combinação
+import os
+
+from _comum import RAIZ, cronometrar, linha
+import motor_ia
+
+ENTRADAS = dict(categoria=3, prazo=5, dificuldade=3, interesse=3, sono=7.0, jejum=2.0, reflexo=300)
+
+def um_por_um(motor):
+    X = motor_ia.montar_grade(**ENTRADAS)
+    return [motor.prever(linha_x[None, :])[0] for linha_x in X]
+
+def main():
+    motor = motor_ia.MotorIA.carregar(os.path.join(RAIZ, motor_ia.ARQUIVO_NPZ))
+    n = len(motor_ia.montar_grade(**ENTRADAS))
+    print(f"Grade de {n} combinações (7 dias × 18 horas × 3 locais × 3 ruídos)")
+    t_loop = cronometrar(lambda: um_por_um(motor), 5)
+    t_lote = cronometrar(lambda: motor_ia.recomendar_horarios(motor, top=5, **ENTRADAS), 50)
+    linha("uma previsão por combinação", t_loop)
+    linha("recomendar_horarios (uma passada)", t_lote, f"({t_loop / t_lote:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Registro de versões (registro_modelos.py) + troca a quente no Previsor, numa cópia da v3.
+# Confere que:
+#   - o custo da checagem do manifesto (um stat) por previsão é pequeno;
+#   - trocando a versão no ar várias vezes com threads prevendo sem parar, nenhuma previsão
+#     falha e, depois da troca, todas usam a versão nova;
+#   - uma versão com checksum errado não entra no ar: o Previsor continua com a anterior.
+# Sai com código 1 se algo não bater.
+#
+# Uso: python benchmarks/bench_registro.py [trocas]
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from _comum import RAIZ, cronometrar, linha
+import motor_ia
+import registro_modelos
+
+N_TROCAS = 50
+N_THREADS = 4
+DESLOCAMENTO = 10.0 # Minutos a mais na versão de teste, para saber qual respondeu
+
+def versao_deslocada(versao, origem):
+    """Registra (sem ativar) uma cópia da `origem` que prevê DESLOCAMENTO minutos a mais."""
+    info = registro_modelos.ler_manifesto()["versoes"][origem]
+    with np.load(info["npz"]) as dados:
+        arrays = dict(dados)
+    ultima = len(arrays["ativacoes"]) - 1
+    arrays[f"bias_{ultima}"] = arrays[f"bias_{ultima}"] + np.float32(DESLOCAMENTO)
+    npz = os.path.join(registro_modelos.pasta_versao(versao), 'motor.npz')
+    np.savez_compressed(npz, **arrays)
+    registro_modelos.registrar(versao, info["modelo"], info["scaler"], npz, origem="bench", ativar=False)
+    return npz
+
+def prever_sem_parar(previsor, rng, parar, saida):
+    erros, n = [], 0
+    while not parar.is_set():
+        vetor = [0, 19, 0, 0, 1, 5, 3, 3, rng.uniform(4, 10), rng.uniform(0.5, 6), rng.uniform(200, 430)]
+        try:
+            previsor.prever(vetor)
+        except Exception as e:
+            erros.append(repr(e))
+        n += 1
+    saida.append((n, erros))
+
+def main():
+    trocas = int(sys.argv[1]) if len(sys.argv) > 1 else N_TROCAS
+    pasta = tempfile.mkdtemp(prefix="sentinela_bench_")
+    for nome in (motor_ia.ARQUIVO_MODELO, motor_ia.ARQUIVO_SCALER, motor_ia.ARQUIVO_NPZ):
+        shutil.copy(os.path.join(RAIZ, nome), pasta)
+    os.chdir(pasta)
+    base = registro_modelos.ler_manifesto()["atual"]
+    versao_deslocada("v3-teste", base)
+    falhas = []
+
+    previsor = motor_ia.Previsor()
+    vetor = [0, 19, 0, 0, 1, 5, 3, 3, 7.0, 2.0, 300.0]
+    original = previsor.prever(vetor)
+    t_stat = cronometrar(registro_modelos.assinatura, 20_000)
+    t_prever = cronometrar(lambda: previsor.prever(vetor), 20_000)
+    print(f"Versão no ar: {previsor.versao}")
+    linha("stat do manifesto", t_stat)
+    linha("prever() com cache (inclui o stat)", t_prever)
+
+    # Trocas a quente com threads prevendo
+    parar, saida = threading.Event(), []
+    threads = [threading.Thread(target=prever_sem_parar, args=(previsor, np.random.default_rng(i), parar, saida))
+               for i in range(N_THREADS)]
+    for t in threads:
+        t.start()
+    t0 = time.perf_counter()
+    for k in range(trocas):
+        registro_modelos.ativar("v3-teste" if k % 2 == 0 else base)
+        time.sleep(0.02)
+    parar.set()
+    for t in threads:
+        t.join()
+    n_prev = sum(n for n, _ in saida)
+    erros = [e for _, lista in saida for e in lista]
+    print(f"{trocas} trocas em {time.perf_counter() - t0:.1f} s, {n_prev} previsões em {N_THREADS} threads, "
+          f"{len(erros)} erros, {previsor.estatisticas()['recarregamentos']} recargas")
+    if erros:
+        falhas.append(f"previsões falharam durante a troca: {erros[0]}")
+
+    esperado = registro_modelos.ler_manifesto()["atual"]
+    atual = previsor.prever(vetor)
+    deslocado = esperado == "v3-teste"
+    if previsor.versao != esperado or abs(atual - original - (DESLOCAMENTO if deslocado else 0)) > 1e-3:
+        falhas.append(f"depois das trocas o Previsor não está na versão {esperado}")
+
+    # Checksum errado: a versão não entra, a anterior continua respondendo
+    npz = versao_deslocada("v3-quebrada", base)
+    with open(npz, 'r+b') as f:
+        f.seek(-8, os.SEEK_END)
+        f.write(b'\0' * 8)
+    antes = (previsor.versao, previsor.prever(vetor))
+    registro_modelos.ativar("v3-quebrada")
+    depois = (previsor.versao, previsor.prever(vetor))
+    print(f"Versão corrompida ativada: o Previsor ficou na {depois[0]}")
+    if depois != antes:
+        falhas.append("a versão com checksum errado entrou no ar")
+    if not any("v3-quebrada" in p for p in registro_modelos.verificar()):
+        falhas.append("o verificar() não acusou o arquivo corrompido")
+
+    if falhas:
+        print("\n" + "\n".join(f"ERRO: {f}" for f in falhas))
+        sys.exit(1)
+    print("\nOk: troca a quente sem perder previsões e sem aceitar versão corrompida")
+
+if __name__ == "__main__":
+    main()
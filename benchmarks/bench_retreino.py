@@ -0,0 +1,176 @@
+# Retreino em segundo plano (retreino.py) numa cópia do modelo, com sessões reais simuladas.
+# Confere que:
+#   - a latência do Previsor no processo do app não muda com o retreino rodando ao lado,
+#     nem a das escritas na agenda (o retreino não segura transação no banco);
+#   - a marca d'água faz cada sessão entrar em um retreino só, mesmo se o processo cair
+#     depois de publicar (a rodada seguinte conclui a mesma versão, sem sessões a mais);
+#   - a versão publicada no registro é recarregada sozinha pelo Previsor e erra menos
+#     nas sessões reais que ficaram fora do ajuste.
+# Sai com código 1 se algo não bater.
+#
+# Uso: python benchmarks/bench_retreino.py [sessoes]
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from _comum import RAIZ, banco_temporario, criar_usuario
+import database
+import motor_ia
+import registro_modelos
+import retreino
+
+N_SESSOES = 200
+BONUS_MINUTOS = 20  # O usuário "real" aguenta 20 min a mais do que o sintético prevê
+ESCRITA_MAX_S = 0.5 # Uma escrita do app durante o retreino não pode esperar mais que isso
+ARQUIVOS = (motor_ia.ARQUIVO_MODELO, motor_ia.ARQUIVO_SCALER, motor_ia.ARQUIVO_NPZ, motor_ia.ARQUIVO_DADOS)
+
+def registrar_sessoes(user_id, n, rng, inicio):
+    """Sessões concluídas com contexto_ia; o tempo real = previsão do motor + BONUS_MINUTOS."""
+    motor = motor_ia.MotorIA.carregar(motor_ia.ARQUIVO_NPZ)
+    for k in range(n):
+        quando = inicio + timedelta(hours=3 * k)
+        vetor = [quando.weekday(), quando.hour, rng.integers(0, 3), rng.integers(0, 3), rng.integers(0, 4),
+                 rng.integers(1, 11), rng.integers(1, 6), rng.integers(1, 6),
+                 rng.uniform(4, 10), rng.uniform(0.5, 6), rng.uniform(200, 430)]
+        minutos = int(np.clip(motor.prever([vetor])[0] + BONUS_MINUTOS, 10, 120))
+        database.finalizar_missao_manual(user_id, "Codar em Python / IA", minutos, quando.isoformat(),
+                                         (quando + timedelta(minutes=minutos)).isoformat(), vetor)
+
+def rodar_retreino(pasta):
+    saida = subprocess.run([sys.executable, os.path.join(RAIZ, "retreino.py"), "--uma-vez", "--db", database.DB_NAME],
+                           cwd=pasta, capture_output=True, text=True, env=dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3"))
+    if saida.returncode != 0:
+        print(saida.stdout, saida.stderr)
+        raise SystemExit(1)
+    return [l for l in saida.stdout.splitlines() if "Retreino com" in l]
+
+def latencias(previsor, rng, parar):
+    """Previsões sem cache (vetores aleatórios) até parar.set(); devolve os tempos em ms."""
+    tempos = []
+    while not parar.is_set() or len(tempos) < 200:
+        vetor = [0, 19, 0, 0, 1, 5, 3, 3, rng.uniform(4, 10), rng.uniform(0.5, 6), rng.uniform(200, 430)]
+        t0 = time.perf_counter()
+        previsor.prever(vetor)
+        tempos.append((time.perf_counter() - t0) * 1e3)
+        time.sleep(0.002)
+    return np.array(tempos)
+
+def escritas(user_id, parar):
+    """Eventos gravados na agenda (como o app faria) até parar.set(); devolve os tempos em s."""
+    tempos, quando = [], datetime(2026, 1, 5, 7)
+    while not parar.is_set():
+        t0 = time.perf_counter()
+        database.adicionar_evento(user_id, "Revisar Anotações", quando.isoformat(),
+                                  (quando + timedelta(minutes=30)).isoformat(), 30)
+        tempos.append(time.perf_counter() - t0)
+        quando += timedelta(hours=1)
+        time.sleep(0.02)
+    return np.array(tempos)
+
+def conferir_queda(user_id, rng, pasta, falhas):
+    """Rodada que cai entre publicar e avançar a marca d'água, com sessões novas chegando
+    antes da próxima: a próxima tem que concluir a versão anotada só com as sessões dela."""
+    registrar_sessoes(user_id, retreino.MIN_SESSOES, rng, datetime(2025, 9, 1, 7))
+    ate_id = database.get_sessoes_para_treino(0)[-1][0]
+    concluir = retreino.concluir
+    retreino.concluir = lambda *args: None # Cai logo depois de publicar
+    try:
+        retreino.rodada(semente=0)
+    finally:
+        retreino.concluir = concluir
+    pendente = database.get_versao_pendente(retreino.PROCESSO)
+    registrar_sessoes(user_id, 5, rng, datetime(2025, 10, 6, 7))
+    log = rodar_retreino(pasta)
+    print(f"  depois da queda: {log[0] if log else 'nenhum retreino'}")
+    if pendente is None or pendente[1] != ate_id:
+        falhas.append("a versão não foi anotada antes de publicar")
+    elif not log or f"até o id {ate_id}): versão {pendente[0]} " not in log[0] or "erro médio" not in log[0]:
+        falhas.append("a rodada depois da queda não concluiu a versão anotada com as mesmas sessões")
+    if database.get_versao_pendente(retreino.PROCESSO) or database.get_marca_agua(retreino.PROCESSO) != ate_id:
+        falhas.append("a marca d'água não ficou no fim da versão concluída")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_SESSOES
+    pasta = tempfile.mkdtemp(prefix="sentinela_bench_")
+    for nome in ARQUIVOS:
+        shutil.copy(os.path.join(RAIZ, nome), pasta)
+    os.chdir(pasta) # O retreino e o motor usam os caminhos padrão, relativos à pasta
+    registro_modelos.ler_manifesto() # Registro novo só com a v3 copiada
+    banco_temporario("retreino.db")
+    user_id = criar_usuario()
+    rng = np.random.default_rng(1)
+    registrar_sessoes(user_id, n, rng, datetime(2025, 1, 6, 7))
+    falhas = []
+
+    previsor = motor_ia.Previsor()
+    parar = threading.Event()
+    parar.set() # Parado: só as 200 medições mínimas
+    base = latencias(previsor, rng, parar)
+    parar.clear()
+    resultado = {}
+    medidores = [threading.Thread(target=lambda: resultado.update(t=latencias(previsor, rng, parar))),
+                 threading.Thread(target=lambda: resultado.update(escritas=escritas(user_id, parar)))]
+    for medidor in medidores:
+        medidor.start()
+    t0 = time.perf_counter()
+    log = rodar_retreino(pasta)
+    t_retreino = time.perf_counter() - t0
+    parar.set()
+    for medidor in medidores:
+        medidor.join()
+    durante = resultado['t']
+
+    print(f"{n} sessões reais, retreino em {t_retreino:.1f} s (processo separado)")
+    print(f"  {log[0] if log else 'nenhum retreino'}")
+    print("Latência do prever() no app:  p50 / p99")
+    print(f"  parado            {np.percentile(base, 50):6.3f} / {np.percentile(base, 99):6.3f} ms")
+    print(f"  durante retreino  {np.percentile(durante, 50):6.3f} / {np.percentile(durante, 99):6.3f} ms")
+    print(f"Escritas na agenda durante o retreino: {len(resultado['escritas'])}, "
+          f"a mais lenta em {resultado['escritas'].max() * 1e3:.1f} ms")
+    if resultado['escritas'].max() > ESCRITA_MAX_S:
+        falhas.append("escrita do app esperou o retreino (banco travado)")
+    if not log:
+        falhas.append("o retreino não rodou")
+    else:
+        antes, depois = map(float, re.search(r"erro médio ([\d.]+) -> ([\d.]+)", log[0]).groups())
+        if depois >= antes:
+            falhas.append("o modelo retreinado não erra menos nas sessões reais")
+    if database.get_marca_agua(retreino.PROCESSO) != database.get_sessoes_para_treino(0)[-1][0]:
+        falhas.append("marca d'água não avançou até a última sessão")
+
+    # Recarregou sozinho e aprendeu o bônus do usuário
+    previsor.prever([0] * 11)
+    atual = registro_modelos.ler_manifesto()["atual"]
+    if previsor.estatisticas()["recarregamentos"] < 2 or previsor.versao != atual:
+        falhas.append("o Previsor não recarregou a versão publicada")
+    if registro_modelos.verificar():
+        falhas.append("o registro não bate com os arquivos: " + "; ".join(registro_modelos.verificar()))
+
+    # Rodar de novo sem sessões novas não pode treinar nada
+    versoes = len(registro_modelos.ler_manifesto()["versoes"])
+    if rodar_retreino(pasta) or len(registro_modelos.ler_manifesto()["versoes"]) != versoes:
+        falhas.append("sessões já processadas foram usadas de novo")
+    # Sessões novas: só elas entram
+    registrar_sessoes(user_id, retreino.MIN_SESSOES, rng, datetime(2025, 6, 2, 7))
+    log = rodar_retreino(pasta)
+    print(f"  2ª rodada: {log[0] if log else 'nenhum retreino'}")
+    if not log or f"com {retreino.MIN_SESSOES} sessões" not in log[0]:
+        falhas.append("a segunda rodada não pegou só as sessões novas")
+
+    conferir_queda(user_id, rng, pasta, falhas)
+
+    if falhas:
+        print("\n" + "\n".join(f"ERRO: {f}" for f in falhas))
+        sys.exit(1)
+    print("\nOk: processo separado, marca d'água e recarga do modelo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Orçamento de tempo de import do app.py, medido com `python -X importtime`.
+# Pega os imports do topo do app.py, importa num processo novo e falha (exit 1) se:
+#   - o tempo total passar do orçamento, ou
+#   - alguma biblioteca pesada for importada já no startup.
+#
+# Uso: python benchmarks/bench_startup.py [--orcamento-ms 150] [--com-streamlit]
+import argparse
+import ast
+import importlib.util
+import os
+import subprocess
+import sys
+
+from _comum import RAIZ
+
+ORCAMENTO_MS = 150
+# Só podem ser importados quando a página que usa for aberta (ver dependencias.py)
+PROIBIDOS_NO_STARTUP = ("tensorflow", "keras", "sklearn", "joblib", "plotly", "pandas", "numpy", "h5py")
+# Importados pelo próprio Streamlit: medidos só com --com-streamlit
+DO_STREAMLIT = ("streamlit", "streamlit_antd_components")
+
+def imports_do_app():
+    arvore = ast.parse(open(os.path.join(RAIZ, "app.py"), encoding="utf-8").read())
+    linhas = []
+    for no in arvore.body:
+        if isinstance(no, (ast.Import, ast.ImportFrom)):
+            linhas.append(ast.unparse(no))
+    return linhas
+
+def modulo_raiz(linha):
+    arvore = ast.parse(linha).body[0]
+    nome = arvore.module if isinstance(arvore, ast.ImportFrom) else arvore.names[0].name
+    return nome.split(".")[0]
+
+def medir(linhas):
+    codigo = "\n".join(linhas)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    modulos = []  # (nome, cumulativo_us, nivel)
+    for l in proc.stderr.splitlines():
+        if not l.startswith("import time:") or "cumulative" in l:
+            continue
+        # Formato: "import time:   self |  cumulative |   <recuo>nome"
+        _, cumulativo, nome = l.split(":", 1)[1].split("|")
+        recuo = len(nome) - len(nome.lstrip())
+        modulos.append((nome.strip(), int(cumulativo), recuo))
+    return modulos
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orcamento-ms", type=float, default=ORCAMENTO_MS)
+    parser.add_argument("--com-streamlit", action="store_true", help="Inclui o import do Streamlit na conta")
+    args = parser.parse_args(argv)
+
+    linhas = []
+    for linha in imports_do_app():
+        raiz = modulo_raiz(linha)
+        if raiz in DO_STREAMLIT and not args.com_streamlit:
+            continue
+        if importlib.util.find_spec(raiz) is None:
+            print(f"⚠️  {raiz} não está instalado, ignorando: {linha}")
+            continue
+        linhas.append(linha)
+
+    modulos = medir(linhas)
+    recuo_min = min(r for _, _, r in modulos)
+    total_ms = sum(c for _, c, r in modulos if r == recuo_min) / 1000
+    importados = {n.split(".")[0] for n, _, _ in modulos}
+
+    print("Mais pesados (cumulativo):")
+    for nome, cumulativo, recuo in sorted((m for m in modulos if m[2] == recuo_min), key=lambda m: -m[1])[:10]:
+        print(f"  {cumulativo / 1000:>8.1f} ms  {nome}")
+
+    falhou = False
+    proibidos = sorted(importados & set(PROIBIDOS_NO_STARTUP))
+    if proibidos and not args.com_streamlit:
+        print(f"❌ Importados no startup (deveriam ser preguiçosos): {', '.join(proibidos)}")
+        falhou = True
+    if total_ms > args.orcamento_ms:
+        print(f"❌ Import total {total_ms:.1f} ms passou do orçamento de {args.orcamento_ms:.0f} ms")
+        falhou = True
+    else:
+        print(f"✅ Import total {total_ms:.1f} ms (orçamento {args.orcamento_ms:.0f} ms)")
+    return 1 if falhou else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
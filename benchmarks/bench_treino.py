@@ -0,0 +1,64 @@
+# Treino: tudo na memória (como o treinar_modelo.py antigo) x em blocos (tf.data).
+# Cada variante roda num processo separado e informa o pico de memória (RSS) e o tempo
+# de uma época. No modo em blocos o pico tem que ficar igual com 10x mais linhas.
+#
+# Uso: python benchmarks/bench_treino.py [linhas ...]
+import os
+import subprocess
+import sys
+import tempfile
+
+from _comum import RAIZ
+import gerar_dados
+
+QUANTIDADES = (200_000, 2_000_000)
+BATCH = 1024  # lote grande para uma época caber no benchmark; não muda a memória
+
+# Roda no processo filho; imprime "pico_MB segundos"
+ANTIGO = """
+import resource, sys, time
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import MinMaxScaler
+import treinar_modelo
+t0 = time.perf_counter()
+df = pd.read_csv(sys.argv[1])
+X, y = df.drop('target', axis=1), df['target']
+X_scaled = MinMaxScaler().fit_transform(X)
+X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2)
+model = treinar_modelo.criar_modelo(X.shape[1])
+model.fit(X_train, y_train, epochs=1, batch_size=int(sys.argv[2]), verbose=0)
+model.evaluate(X_test, y_test, verbose=0)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, time.perf_counter() - t0)
+"""
+
+BLOCOS = """
+import os, resource, sys, time
+import treinar_modelo
+t0 = time.perf_counter()
+pasta = os.path.dirname(sys.argv[1])
+treinar_modelo.treinar(sys.argv[1], epocas=1, batch=int(sys.argv[2]),
+                       destino_modelo=os.path.join(pasta, 'm.h5'), destino_scaler=os.path.join(pasta, 's.pkl'))
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, time.perf_counter() - t0)
+"""
+
+def rodar(codigo, caminho):
+    ambiente = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3", PYTHONPATH=RAIZ)
+    saida = subprocess.run([sys.executable, "-c", codigo, caminho, str(BATCH)], capture_output=True,
+                           text=True, env=ambiente, check=True).stdout
+    pico, segundos = saida.split()[-2:]
+    return float(pico), float(segundos)
+
+def main():
+    quantidades = [int(a) for a in sys.argv[1:]] or QUANTIDADES
+    pasta = tempfile.mkdtemp(prefix="sentinela_bench_")
+    print(f"{'linhas':>10} {'variante':<22} {'pico RSS':>10} {'1 época':>10}")
+    for n in quantidades:
+        caminho = os.path.join(pasta, f"dados_{n}.csv")
+        gerar_dados.escrever_csv(caminho, gerar_dados.gerar(n, 1))
+        for nome, codigo in (("tudo na memória", ANTIGO), ("em blocos (tf.data)", BLOCOS)):
+            pico, segundos = rodar(codigo, caminho)
+            print(f"{n:>10} {nome:<22} {pico:>7.0f} MB {segundos:>8.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Teste de carga do Cronômetro: CPU do servidor com 50 timers rodando ao mesmo tempo.
+#
+# Sem um servidor Streamlit de verdade, cada "sessão" é uma thread que repete o
+# trabalho de servidor de um rerun da página do timer:
+#   antes:  rerun a cada 1s (inicializar_db + ler style.css + get_usuario + HTML)
+#           com time.sleep(1) segurando a thread;
+#   depois: o navegador conta; o servidor só roda no início e no fim
+#           (banco e CSS já em cache, só get_usuario + HTML do relógio).
+# O custo do próprio Streamlit por rerun (protobuf, websocket, diff de elementos)
+# não entra na conta, então o "antes" real é ainda pior do que o medido aqui.
+#
+# Uso: python benchmarks/carga_cronometro.py [sessoes] [segundos]
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from _comum import RAIZ, banco_temporario
+import database
+import relogio
+
+SESSOES = 50
+DURACAO_S = 10
+USUARIO = 1  # primeiro perfil do banco novo
+
+def ler_css():
+    with open(os.path.join(RAIZ, "style.css"), encoding="utf-8") as f:
+        return f.read()
+
+def rerun_antigo(inicio):
+    database.inicializar_db()
+    ler_css()
+    database.get_usuario(USUARIO)
+    delta = datetime.now() - inicio
+    return f"{int(delta.total_seconds() // 60):02d}:{int(delta.total_seconds() % 60):02d}"
+
+def rerun_novo(inicio):
+    database.get_usuario(USUARIO)
+    return relogio.html_relogio((datetime.now() - inicio).total_seconds(), True, "#00D2FC", "EM FOCO 🔥")
+
+def sessao_antiga(fim, contador):
+    inicio = datetime.now()
+    while time.monotonic() < fim:
+        rerun_antigo(inicio)
+        contador.append(1)
+        time.sleep(1)
+
+def sessao_nova(fim, contador):
+    inicio = datetime.now()
+    rerun_novo(inicio)             # INICIAR
+    contador.append(1)
+    time.sleep(max(0, fim - time.monotonic()))  # Navegador contando sozinho
+    rerun_novo(inicio)             # PARAR
+    contador.append(1)
+
+def rodar(alvo, sessoes, duracao):
+    contador = []
+    fim = time.monotonic() + duracao
+    cpu0, t0 = time.process_time(), time.monotonic()
+    threads = [threading.Thread(target=alvo, args=(fim, contador)) for _ in range(sessoes)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    cpu, parede = time.process_time() - cpu0, time.monotonic() - t0
+    return cpu, parede, len(contador)
+
+def main():
+    sessoes = int(sys.argv[1]) if len(sys.argv) > 1 else SESSOES
+    duracao = float(sys.argv[2]) if len(sys.argv) > 2 else DURACAO_S
+    banco_temporario("carga.db")
+    database.salvar_perfil_usuario("Carga", "Cinestésico/Prático 🛠️", 3)
+    print(f"{sessoes} timers rodando por {duracao:.0f}s")
+    for nome, alvo in (("antes: rerun a cada 1s", sessao_antiga), ("depois: relógio no navegador", sessao_nova)):
+        cpu, parede, reruns = rodar(alvo, sessoes, duracao)
+        print(f"{nome:<32} CPU {cpu:6.2f}s ({100 * cpu / parede:5.1f}% de um núcleo)  reruns={reruns}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# Suíte de benchmarks em escala: agenda com 1k, 100k e 1M eventos (bancos sentinela
+# sintéticos, criados uma vez em benchmarks/dados/ e reaproveitados) + casos que não
+# dependem do banco (roteiro de estudo e previsões da IA). Roda offline.
+# Cada execução vira uma entrada em benchmarks/historico.json (commit, máquina, tempos);
+# "comparar" confronta duas entradas e sai com código 1 se algum caso ficou mais lento
+# que o limite.
+#
+# Uso:
+#   python benchmarks/suite.py rodar [--tamanhos 1000 100000] [--rotulo antes-do-indice]
+#   python benchmarks/suite.py listar
+#   python benchmarks/suite.py comparar [--base -2] [--atual -1] [--limite 0.2]
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from _comum import RAIZ, criar_usuario, formatar_tempo, popular_agenda
+import calendario
+import database
+import motor_ia
+import planejador
+
+TAMANHOS = (1_000, 100_000, 1_000_000)
+PASTA_BANCOS = os.path.join(RAIZ, 'benchmarks', 'dados')
+ARQUIVO_HISTORICO = os.path.join(RAIZ, 'benchmarks', 'historico.json')
+USUARIO = 1 # Primeiro perfil do banco novo
+SEMENTE = 42
+ANOS_AGENDA = 5
+
+TEMPO_POR_RODADA = 0.05 # s: repete o caso até dar isso, para medir coisas de µs
+RODADAS = 7 # Fica a rodada mais rápida (a menos afetada pelo resto da máquina)
+LIMITE = 0.20 # Mais lento que isso (20%) = regressão
+MIN_DIFERENCA_S = 20e-6 # ...desde que a diferença passe de 20 µs (ruído de casos rápidos)
+
+DIAS_PROVA = [0, 2, 4, 5] # Seg, Qua, Sex, Sáb
+
+def medir(funcao):
+    """Tempo de uma chamada (s): a melhor de RODADAS rodadas de TEMPO_POR_RODADA cada."""
+    t0 = time.perf_counter()
+    funcao()
+    repeticoes = max(1, int(TEMPO_POR_RODADA / max(time.perf_counter() - t0, 1e-7)))
+    tempos = []
+    for _ in range(RODADAS):
+        t0 = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao()
+        tempos.append((time.perf_counter() - t0) / repeticoes)
+    return min(tempos)
+
+# --- BANCOS ---
+
+def abrir_banco(n):
+    """Aponta o database.py para o banco com n eventos, criando-o na primeira vez."""
+    caminho = os.path.join(PASTA_BANCOS, f"sentinela_{n}.db")
+    database.fechar_conexoes()
+    if not os.path.exists(caminho):
+        os.makedirs(PASTA_BANCOS, exist_ok=True)
+        temporario = caminho + '.tmp'
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        print(f"Criando banco com {n} eventos em {caminho}...", flush=True)
+        database.DB_NAME = temporario
+        database.inicializar_db()
+        criar_usuario()
+        popular_agenda(n, anos=ANOS_AGENDA, semente=SEMENTE, user_id=USUARIO)
+        database.fechar_conexoes()
+        os.replace(temporario, caminho)
+    database.DB_NAME = caminho
+    database.inicializar_db() # Migra, se o banco for de um schema antigo
+    calendario.limpar_cache()
+
+# --- CASOS ---
+
+def casos_banco():
+    """Casos que dependem do tamanho da agenda (o banco já aberto)."""
+    hoje = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    mes = datetime(hoje.year, hoje.month, 1)
+    proximo_mes = datetime(hoje.year + hoje.month // 12, hoje.month % 12 + 1, 1)
+    eventos_mes = database.get_eventos_intervalo(USUARIO, mes, proximo_mes)
+
+    def cronograma(anos):
+        prova = hoje + timedelta(days=365 * anos)
+        def rodar():
+            ocupados = database.get_intervalos_ocupados(USUARIO, hoje, prova)
+            return planejador.gerar_cronograma_prova("Prova", "Revisar Anotações", prova, 0, 5, DIAS_PROVA,
+                                                     ocupados, hoje)
+        return rodar
+
+    return {
+        "get_eventos": lambda: database.get_eventos(USUARIO),
+        "get_eventos (colunas)": lambda: database.get_eventos(USUARIO, formato="colunas"),
+        "get_dados_concluidos": lambda: database.get_dados_concluidos(USUARIO),
+        "renderizar_calendario_html (mês)": lambda: calendario.renderizar_calendario_html(
+            hoje.year, hoje.month, eventos_mes),
+        "gerar_cronograma_prova (1 ano)": cronograma(1),
+        "gerar_cronograma_prova (3 anos)": cronograma(3),
+    }
+
+def casos_fixos():
+    """Casos que não dependem do banco."""
+    motor = motor_ia.MotorIA.carregar(os.path.join(RAIZ, motor_ia.ARQUIVO_NPZ))
+    vetor = [[4, 19, 0, 1, 3, 5, 3, 3, 7.0, 2.0, 300]]
+    grade = motor_ia.montar_grade(1, 5, 3, 3, 7.0, 2.0, 300)
+    lote = motor_ia.np.repeat(grade, 10, axis=0)
+    return {
+        "gerar_roteiro_estudo (5..600 min)": lambda: [planejador.gerar_roteiro_estudo(m) for m in range(5, 601)],
+        "prever (1 linha)": lambda: motor.prever(vetor),
+        f"prever (grade, {len(grade)} linhas)": lambda: motor.prever(grade),
+        f"prever (lote, {len(lote)} linhas)": lambda: motor.prever(lote),
+    }
+
+def rodar(tamanhos, rotulo=None):
+    resultados = {"fixo": {}}
+    print("\n[fixo]")
+    for nome, funcao in casos_fixos().items():
+        resultados["fixo"][nome] = medir(funcao)
+        print(f"  {nome:<42} {formatar_tempo(resultados['fixo'][nome]):>12}", flush=True)
+    for n in tamanhos:
+        abrir_banco(n)
+        grupo = resultados[str(n)] = {}
+        print(f"\n[{n} eventos]")
+        for nome, funcao in casos_banco().items():
+            grupo[nome] = medir(funcao)
+            print(f"  {nome:<42} {formatar_tempo(grupo[nome]):>12}", flush=True)
+    database.fechar_conexoes()
+    return {
+        "data": datetime.now().replace(microsecond=0).isoformat(),
+        "rotulo": rotulo,
+        "commit": _commit(),
+        "maquina": {"python": platform.python_version(), "sistema": platform.platform(),
+                    "processador": platform.processor() or platform.machine(), "nucleos": os.cpu_count()},
+        "resultados": resultados,
+    }
+
+def _commit():
+    """Hash curto do HEAD (com '+' se houver mudanças não commitadas), ou None fora do git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        sujo = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("+" if sujo else "")
+
+# --- HISTÓRICO ---
+
+def ler_historico(caminho=ARQUIVO_HISTORICO):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+def salvar_execucao(execucao, caminho=ARQUIVO_HISTORICO):
+    historico = ler_historico(caminho) + [execucao]
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(historico, f, indent=1, ensure_ascii=False)
+    os.replace(temporario, caminho)
+    return len(historico) - 1
+
+def descrever(i, execucao):
+    return f"#{i} {execucao['data']} {execucao['commit'] or '-'} {execucao['rotulo'] or ''}".rstrip()
+
+def comparar(base, atual, limite=LIMITE):
+    """Imprime os casos em comum lado a lado. Retorna a lista de regressões (grupo, caso, razão)."""
+    regressoes = []
+    print(f"{'caso':<52} {'base':>11} {'atual':>11} {'razão':>7}")
+    for grupo, casos in atual["resultados"].items():
+        casos_base = base["resultados"].get(grupo, {})
+        comuns = [c for c in casos if c in casos_base]
+        if not comuns:
+            continue
+        print(f"[{grupo}]")
+        for caso in comuns:
+            t_base, t_atual = casos_base[caso], casos[caso]
+            razao = t_atual / t_base
+            regrediu = razao > 1 + limite and t_atual - t_base > MIN_DIFERENCA_S
+            marca = "  ⚠ regressão" if regrediu else ("  melhorou" if razao < 1 / (1 + limite) else "")
+            print(f"  {caso:<50} {formatar_tempo(t_base):>11} {formatar_tempo(t_atual):>11} {razao:>6.2f}x{marca}")
+            if regrediu:
+                regressoes.append((grupo, caso, razao))
+    return regressoes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks em escala do Sentinela")
+    parser.add_argument("--historico", default=ARQUIVO_HISTORICO)
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_rod = sub.add_parser("rodar", help="Roda a suíte e guarda no histórico")
+    p_rod.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS), help="Eventos na agenda")
+    p_rod.add_argument("--rotulo", help="Nome livre para achar a execução depois")
+    p_rod.add_argument("--nao-salvar", action="store_true")
+    sub.add_parser("listar", help="Execuções do histórico")
+    p_cmp = sub.add_parser("comparar", help="Compara duas execuções do histórico")
+    p_cmp.add_argument("--base", type=int, default=-2, help="Índice da execução base (padrão: a penúltima)")
+    p_cmp.add_argument("--atual", type=int, default=-1, help="Índice da execução nova (padrão: a última)")
+    p_cmp.add_argument("--limite", type=float, default=LIMITE, help="Fração de piora tolerada (padrão: 0.2)")
+    args = parser.parse_args(argv)
+
+    if args.comando == "rodar":
+        execucao = rodar(args.tamanhos, args.rotulo)
+        if not args.nao_salvar:
+            i = salvar_execucao(execucao, args.historico)
+            print(f"\nSalvo como #{i} em {args.historico}")
+        return 0
+
+    historico = ler_historico(args.historico)
+    if args.comando == "listar":
+        for i, execucao in enumerate(historico):
+            print(descrever(i, execucao))
+        return 0
+    try:
+        base, atual = historico[args.base], historico[args.atual]
+    except IndexError:
+        print(f"Erro: o histórico tem {len(historico)} execuções; rode a suíte pelo menos duas vezes.")
+        return 1
+    print(f"base:  {descrever(args.base % len(historico), base)}")
+    print(f"atual: {descrever(args.atual % len(historico), atual)}\n")
+    if base["maquina"] != atual["maquina"]:
+        print("Aviso: execuções de máquinas diferentes, a comparação vale pouco.\n")
+    regressoes = comparar(base, atual, args.limite)
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} regressão(ões) acima de {args.limite:.0%}")
+        return 1
+    print(f"\n✅ Nenhuma regressão acima de {args.limite:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
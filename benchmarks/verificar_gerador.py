@@ -0,0 +1,148 @@
+# Confere que o gerar_dados.py vetorizado sai com a mesma distribuição do gerador antigo
+# (laço com `random`, copiado abaixo). As sementes não batem entre os dois (random x NumPy),
+# então a comparação é estatística: médias, frequências das categóricas, KS das contínuas
+# e a média do target em cada regra do especialista. Também confere as regras linha a linha.
+# Sai com código 1 se algo não bater.
+#
+# Uso: python benchmarks/verificar_gerador.py [linhas]
+import random
+import sys
+import time
+
+import numpy as np
+
+from _comum import formatar_tempo
+import gerar_dados
+
+N_LINHAS = 100_000
+# Tolerância em desvios-padrão da diferença das médias
+Z_MAX = 5.0
+# Valor crítico do KS com alfa = 0,001
+C_KS = 1.95
+
+def gerador_antigo(n, semente):
+    """Cópia do laço antigo do gerar_dados.py, com random.Random(semente)."""
+    rnd = random.Random(semente)
+    dados = []
+    for _ in range(n):
+        dia_semana = rnd.randint(0, 6)
+        hora_dia = rnd.randint(6, 23)
+        local = rnd.choice([0, 0, 0, 1, 2])
+        ruido = rnd.randint(0, 2)
+        categoria_tarefa = rnd.randint(0, 3)
+        prazo_urgencia = rnd.randint(1, 10)
+        dificuldade = rnd.randint(1, 5)
+        interesse = rnd.randint(1, 5)
+        horas_sono = rnd.uniform(4.0, 10.0)
+        horas_jejum = rnd.uniform(0.5, 6.0)
+        tempo_reacao_ms = 250 + ((8 - horas_sono) * 20) + (horas_jejum * 10)
+        tempo_reacao_ms += rnd.uniform(-20, 50)
+        foco_base = 50
+        if prazo_urgencia > 8: foco_base += 15
+        if interesse > 3: foco_base += 10
+        if local == 1: foco_base += 10
+        if tempo_reacao_ms > 400: foco_base -= 20
+        if ruido == 2: foco_base -= 15
+        if horas_jejum > 4: foco_base -= 10
+        if dificuldade > 4: foco_base -= 5
+        if dia_semana >= 5: foco_base -= 10
+        tempo_ideal = max(10, min(120, foco_base + rnd.uniform(-5, 5)))
+        dados.append([
+            dia_semana, hora_dia, local, ruido,
+            categoria_tarefa, prazo_urgencia, dificuldade, interesse,
+            horas_sono, horas_jejum, tempo_reacao_ms,
+            int(tempo_ideal)
+        ])
+    return {c: np.array(v) for c, v in zip(gerar_dados.COLUNAS, zip(*dados))}
+
+def gerador_novo(n, semente):
+    blocos = list(gerar_dados.gerar(n, semente, tamanho_bloco=n // 3 + 1))
+    return {c: np.concatenate([b[c] for b in blocos]) for c in gerar_dados.COLUNAS}
+
+def medias_batem(a, b):
+    erro = np.sqrt(a.var() / len(a) + b.var() / len(b))
+    if erro == 0:
+        return a.mean() == b.mean(), 0.0
+    z = abs(a.mean() - b.mean()) / erro
+    return z <= Z_MAX, z
+
+def ks(a, b):
+    """Estatística do KS de duas amostras e o valor crítico."""
+    a, b = np.sort(a), np.sort(b)
+    todos = np.concatenate([a, b])
+    d = np.max(np.abs(np.searchsorted(a, todos, side='right') / len(a)
+                      - np.searchsorted(b, todos, side='right') / len(b)))
+    return d, C_KS * np.sqrt((len(a) + len(b)) / (len(a) * len(b)))
+
+def foco_das_regras(d):
+    """Foco sem o ruído final, recalculado a partir das colunas."""
+    return (50 + 15 * (d['prazo_urgencia'] > 8) + 10 * (d['interesse'] > 3) + 10 * (d['local'] == 1)
+            - 20 * (d['tempo_reacao_ms'] > 400) - 15 * (d['ruido'] == 2) - 10 * (d['horas_jejum'] > 4)
+            - 5 * (d['dificuldade'] > 4) - 10 * (d['dia_semana'] >= 5))
+
+REGRAS = {
+    "urgência > 8": lambda d: d['prazo_urgencia'] > 8,
+    "interesse > 3": lambda d: d['interesse'] > 3,
+    "biblioteca": lambda d: d['local'] == 1,
+    "reação > 400 ms": lambda d: d['tempo_reacao_ms'] > 400,
+    "barulho": lambda d: d['ruido'] == 2,
+    "jejum > 4h": lambda d: d['horas_jejum'] > 4,
+    "dificuldade > 4": lambda d: d['dificuldade'] > 4,
+    "fim de semana": lambda d: d['dia_semana'] >= 5,
+}
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_LINHAS
+    t0 = time.perf_counter()
+    antigo = gerador_antigo(n, 1)
+    t1 = time.perf_counter()
+    novo = gerador_novo(n, 2)
+    t2 = time.perf_counter()
+    falhas = []
+
+    def conferir(nome, ok, detalhe):
+        print(f"{'ok ' if ok else 'ERRO'} {nome:<38} {detalhe}")
+        if not ok:
+            falhas.append(nome)
+
+    print(f"{n} linhas de cada gerador (antigo {formatar_tempo(t1 - t0)}, novo {formatar_tempo(t2 - t1)})\n")
+    for coluna in gerar_dados.COLUNAS:
+        ok, z = medias_batem(antigo[coluna], novo[coluna])
+        conferir(f"média {coluna}", ok, f"{antigo[coluna].mean():9.3f} x {novo[coluna].mean():9.3f} (z={z:.1f})")
+
+    # Categóricas: mesmos valores possíveis e mesma frequência de cada um
+    for coluna in gerar_dados.COLUNAS[:8]:
+        valores = np.union1d(antigo[coluna], novo[coluna])
+        ok = np.array_equal(np.unique(antigo[coluna]), np.unique(novo[coluna]))
+        pior = max(medias_batem(antigo[coluna] == v, novo[coluna] == v)[1] for v in valores)
+        conferir(f"frequências {coluna}", ok and pior <= Z_MAX, f"valores {valores.min()}..{valores.max()} (pior z={pior:.1f})")
+
+    for coluna in ('horas_sono', 'horas_jejum', 'tempo_reacao_ms', 'target'):
+        d, critico = ks(antigo[coluna], novo[coluna])
+        conferir(f"KS {coluna}", d <= critico, f"D={d:.4f} (crítico {critico:.4f})")
+
+    # Efeito de cada regra: média do target com a condição ligada, nos dois geradores
+    for nome, regra in REGRAS.items():
+        a, b = antigo['target'][regra(antigo)], novo['target'][regra(novo)]
+        ok, z = medias_batem(a, b)
+        conferir(f"target | {nome}", ok, f"{a.mean():7.2f} x {b.mean():7.2f} (z={z:.1f})")
+
+    # Linha a linha: o target tem que sair das regras + ruído de ±5, com os limites
+    for nome, d in (("antigo", antigo), ("novo", novo)):
+        foco = foco_das_regras(d)
+        baixo = np.clip(foco - 5, 10, 120).astype(int)
+        alto = np.clip(foco + 5, 10, 120).astype(int)
+        ok = bool(np.all((d['target'] >= baixo) & (d['target'] <= alto)))
+        conferir(f"regras linha a linha ({nome})", ok, "")
+
+    # Mesma semente e mesmo bloco = mesmos dados
+    a, b = gerador_novo(1000, 7), gerador_novo(1000, 7)
+    conferir("reprodutível com --semente", all(np.array_equal(a[c], b[c]) for c in a), "")
+
+    if falhas:
+        print(f"\n{len(falhas)} verificações falharam")
+        sys.exit(1)
+    print("\nDistribuição igual à do gerador antigo")
+
+if __name__ == "__main__":
+    main()
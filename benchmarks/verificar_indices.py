@@ -0,0 +1,81 @@
+# Roda as funções do database.py, captura todo SQL executado e confere o EXPLAIN QUERY PLAN.
+# Falha (exit 1) se alguma consulta na agenda fizer varredura completa sem estar na lista de exceções.
+import sys
+from datetime import datetime
+
+from _comum import banco_temporario
+import database
+
+# Consultas que leem a tabela inteira de propósito
+VARREDURA_PERMITIDA = set()
+
+# Id do perfil criado logo no início das chamadas (banco novo)
+USUARIO = 1
+
+def chamadas():
+    yield "usuario_existe", lambda: database.usuario_existe()
+    yield "listar_usuarios", lambda: database.listar_usuarios()
+    yield "salvar_perfil_usuario", lambda: database.salvar_perfil_usuario("Check", "Auditivo 👂", 2)
+    yield "usuario_existe(id)", lambda: database.usuario_existe(USUARIO)
+    yield "get_usuario", lambda: database.get_usuario(USUARIO)
+    yield "get_tarefas", lambda: database.get_tarefas()
+    yield "adicionar_evento", lambda: database.adicionar_evento(
+        USUARIO, "Codar em Python / IA", "2025-03-10T19:00:00", "2025-03-10T20:00:00", 60)
+    yield "finalizar_missao_manual", lambda: database.finalizar_missao_manual(
+        USUARIO, "Codar em Python / IA", 45, "2025-03-11T19:00:00", "2025-03-11T19:45:00")
+    yield "finalizar_missao_manual(contexto)", lambda: database.finalizar_missao_manual(
+        USUARIO, "Codar em Python / IA", 30, "2025-03-12T19:00:00", "2025-03-12T19:30:00", [2, 19, 0, 0] + [1] * 7)
+    yield "finalizar_missao_manual(evento)", lambda: database.finalizar_missao_manual(
+        USUARIO, "Codar em Python / IA", 50, "2025-03-10T19:00:00", "2025-03-10T19:50:00", evento_id=1)
+    yield "get_sessoes_para_treino", lambda: database.get_sessoes_para_treino(0, 100)
+    yield "get_marca_agua", lambda: database.get_marca_agua("retreino")
+    yield "get_eventos", lambda: database.get_eventos(USUARIO)
+    yield "get_eventos_intervalo", lambda: database.get_eventos_intervalo(
+        USUARIO, datetime(2025, 3, 1), datetime(2025, 4, 1), limit=10, order="desc")
+    yield "get_intervalos_ocupados", lambda: database.get_intervalos_ocupados(
+        USUARIO, datetime(2025, 3, 1), datetime(2025, 6, 1))
+    yield "get_intervalos_ocupados(excluir)", lambda: database.get_intervalos_ocupados(
+        USUARIO, datetime(2025, 3, 1), datetime(2025, 6, 1), excluir_metas=[1, 2])
+    yield "adicionar_eventos_lote", lambda: database.adicionar_eventos_lote(
+        USUARIO, [], meta={"nome_meta": "Check", "data_alvo": "2025-06-01T00:00:00", "total_horas_estimadas": 10})
+    yield "get_metas_ativas", lambda: database.get_metas_ativas(USUARIO, datetime(2025, 3, 1))
+    yield "substituir_planos", lambda: database.substituir_planos(USUARIO, {1: []})
+    yield "get_indice_agenda", lambda: database.get_indice_agenda(USUARIO)
+    yield "get_proximas_missoes", lambda: database.get_proximas_missoes(USUARIO, 4, datetime(2025, 3, 1))
+    yield "get_dados_concluidos", lambda: database.get_dados_concluidos(USUARIO)
+    yield "get_foco_por_tarefa", lambda: database.get_foco_por_tarefa(USUARIO)
+    yield "get_foco_por_dia", lambda: database.get_foco_por_dia(USUARIO, datetime(2025, 3, 1), datetime(2025, 3, 31))
+    yield "deletar_evento", lambda: database.deletar_evento(USUARIO, 1)
+
+def main():
+    banco_temporario("indices.db")
+    capturado = []
+    with database.conexao() as conn:
+        # Só uma thread aqui, então o pool sempre devolve esta mesma conexão
+        conn.set_trace_callback(capturado.append)
+        # Estatísticas para o planejador do SQLite escolher índices como em produção
+        conn.execute("ANALYZE")
+
+    falhas = 0
+    for nome, func in chamadas():
+        capturado.clear()
+        func()
+        for sql in list(capturado):
+            sql_limpo = " ".join(sql.split())
+            if not sql_limpo.upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            plano = database.plano_consulta(sql_limpo)
+            varre = any(p.startswith("SCAN agenda") for p in plano)
+            ok = not varre or nome in VARREDURA_PERMITIDA
+            falhas += not ok
+            print(f"[{'OK' if ok else 'FALHA'}] {nome}: {sql_limpo[:70]}")
+            for p in plano:
+                print(f"        {p}")
+
+    if falhas:
+        print(f"\n{falhas} consulta(s) sem índice.")
+        sys.exit(1)
+    print("\nTodas as consultas usam índice.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Confere o progresso das metas ao longo do uso: sessão planejada cumprida pelo
+# cronômetro (INICIAR no Dashboard) conta na meta, o progresso sobrevive a um
+# replanejamento (e as horas replanejadas diminuem) e apagar o plano mantém o histórico.
+# Confere também que criar ou apagar uma meta não tira as outras dos dias da semana delas.
+# Sai com código 1 se algo não bater.
+#
+# Uso: python benchmarks/verificar_metas.py
+import sys
+from datetime import datetime, timedelta
+
+from _comum import banco_temporario, criar_usuario
+import database
+import planejador
+
+DIAS = [0, 1, 2, 3, 4, 5, 6]
+HORAS_META = 10
+MINUTOS_FEITOS = 120
+
+def minutos_pendentes(user_id, meta_id):
+    with database.conexao() as conn:
+        return conn.execute("SELECT COALESCE(SUM(minutos_foco_planejado), 0) FROM agenda "
+                            "WHERE user_id = ? AND meta_id = ? AND concluido = 0", (user_id, meta_id)).fetchone()[0]
+
+def progresso(user_id, meta_id, hoje):
+    return next(m['minutos_feitos'] for m in database.get_metas_ativas(user_id, hoje) if m['id'] == meta_id)
+
+def criar_meta(user_id, nome, prazo, horas, dias=None):
+    meta = {"nome_meta": nome, "tarefa_associada": "Estudar Teoria (Livro/PDF)",
+            "data_alvo": prazo.replace(hour=0, minute=0, second=0).isoformat(), "total_horas_estimadas": horas}
+    if dias is not None:
+        meta["dias_semana"] = dias
+    return database.adicionar_eventos_lote(user_id, [], meta=meta)
+
+def dias_das_sessoes(user_id, meta_id):
+    with database.conexao() as conn:
+        return {datetime.fromisoformat(linha[0]).weekday() for linha in conn.execute(
+            "SELECT inicio FROM agenda WHERE user_id = ? AND meta_id = ? AND concluido = 0", (user_id, meta_id))}
+
+def conferir_dias(falhas, hoje):
+    """Duas metas com dias diferentes: criar a segunda e depois apagá-la replaneja a primeira
+    (prazo depois), que tem que continuar só nos dias dela."""
+    user_id = criar_usuario("Dias")
+    seg_qua, fim_de_semana = [0, 2], [5, 6]
+    meta_a = criar_meta(user_id, "A", hoje + timedelta(days=60), 20, seg_qua)
+    planejador.replanejar_metas(user_id, desde_prazo=hoje, hoje=hoje)
+    prazo_b = hoje + timedelta(days=30)
+    meta_b = criar_meta(user_id, "B", prazo_b, 10, fim_de_semana)
+    planejador.replanejar_metas(user_id, desde_prazo=prazo_b, hoje=hoje)
+    for meta_id, nome, dias in ((meta_a, "A", seg_qua), (meta_b, "B", fim_de_semana)):
+        if not dias_das_sessoes(user_id, meta_id) <= set(dias):
+            falhas.append(f"meta {nome} com sessões fora dos dias dela ao criar outra meta")
+    database.deletar_plano(user_id, meta_b)
+    planejador.replanejar_metas(user_id, desde_prazo=prazo_b, hoje=hoje) # Como o botão Apagar
+    dias_a = dias_das_sessoes(user_id, meta_a)
+    print(f"Meta de Seg/Qua depois de criar e apagar outra: sessões nos weekdays {sorted(dias_a)}")
+    if not dias_a or not dias_a <= set(seg_qua):
+        falhas.append("meta A com sessões fora dos dias dela ao apagar outra meta")
+
+def main():
+    banco_temporario("verificar_metas.db")
+    user_id = criar_usuario()
+    hoje = datetime.now().replace(microsecond=0)
+    meta_id = criar_meta(user_id, "Prova", hoje + timedelta(days=30), HORAS_META)
+    planejador.replanejar_metas(user_id, DIAS, hoje=hoje)
+    falhas = []
+    if minutos_pendentes(user_id, meta_id) != HORAS_META * 60:
+        falhas.append(f"plano inicial com {minutos_pendentes(user_id, meta_id)} min (esperado {HORAS_META * 60})")
+
+    # Cumpre a primeira missão pelo cronômetro, como o botão INICIAR do Dashboard
+    missao = database.get_proximas_missoes(user_id, 1, hoje)[0]
+    inicio = hoje - timedelta(minutes=MINUTOS_FEITOS)
+    database.finalizar_missao_manual(user_id, missao['title'], MINUTOS_FEITOS, inicio.isoformat(), hoje.isoformat(),
+                                     evento_id=int(missao['id']))
+    if any(ev['id'] == missao['id'] for ev in database.get_proximas_missoes(user_id, 100, hoje)):
+        falhas.append("a missão cumprida continua pendente na agenda")
+    feitos = progresso(user_id, meta_id, hoje)
+    print(f"Depois da sessão: {feitos} min feitos")
+    if feitos != MINUTOS_FEITOS:
+        falhas.append(f"a sessão do cronômetro não contou na meta ({feitos} min)")
+
+    planejador.replanejar_metas(user_id, DIAS, hoje=hoje)
+    feitos, pendentes = progresso(user_id, meta_id, hoje), minutos_pendentes(user_id, meta_id)
+    print(f"Depois de replanejar: {feitos} min feitos, {pendentes} min planejados")
+    if feitos != MINUTOS_FEITOS:
+        falhas.append(f"o progresso voltou para {feitos} min depois de replanejar")
+    if pendentes != HORAS_META * 60 - MINUTOS_FEITOS:
+        falhas.append(f"o replanejamento agendou {pendentes} min (esperado {HORAS_META * 60 - MINUTOS_FEITOS})")
+
+    database.deletar_plano(user_id, meta_id)
+    if sum(m for m in database.get_foco_por_tarefa(user_id)['minutos_foco_realizado']) != MINUTOS_FEITOS:
+        falhas.append("apagar o plano tirou a sessão feita do histórico")
+    if database.verificar_rollups():
+        falhas.append("rollups diferentes da agenda")
+    conferir_dias(falhas, hoje)
+
+    if falhas:
+        print("\n" + "\n".join(f"ERRO: {f}" for f in falhas))
+        sys.exit(1)
+    print("\nOk: o progresso e os dias de cada meta sobrevivem ao replanejamento")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Paridade das variantes da rede contra o Keras float32 em todo o historico_estudo_v3.csv:
+# motor NumPy (.npz) e os .tflite int8 e float16. Mostra o erro médio, o p99 e o máximo
+# em minutos de foco. Sai com código 1 se algum máximo passar da tolerância da variante
+# (motor_ia.TOLERANCIA_MINUTOS / TOLERANCIA_TFLITE_MINUTOS). Precisa do TensorFlow.
+#
+# Uso: python benchmarks/verificar_variantes.py
+import os
+import sys
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+import numpy as np
+
+from _comum import RAIZ
+import dados_colunares
+import motor_ia
+
+def main():
+    import joblib
+    import tensorflow as tf
+
+    os.chdir(RAIZ)
+    X = dados_colunares.abrir(motor_ia.ARQUIVO_DADOS).para_dataframe().drop('target', axis=1).to_numpy(np.float64)
+    model = tf.keras.models.load_model(motor_ia.ARQUIVO_MODELO, compile=False)
+    esperado = model.predict(joblib.load(motor_ia.ARQUIVO_SCALER).transform(X), verbose=0)[:, 0]
+
+    base = motor_ia.MotorIA.carregar(motor_ia.ARQUIVO_NPZ)
+    variantes = {"npz (float32)": (base, motor_ia.TOLERANCIA_MINUTOS)}
+    for variante in motor_ia.VARIANTES_TFLITE:
+        caminho = motor_ia.caminho_tflite(motor_ia.ARQUIVO_MODELO, variante)
+        motor = motor_ia.MotorTFLite(caminho, base)
+        variantes[f"tflite {variante} ({os.path.getsize(caminho) / 1024:.1f} KB)"] = (
+            motor, motor_ia.TOLERANCIA_TFLITE_MINUTOS[variante])
+
+    print(f"{len(X)} linhas, diferença para o Keras float32 em minutos")
+    print(f"{'variante':<28} {'média':>9} {'p99':>9} {'máximo':>9} {'tolerância':>11}")
+    falhas = []
+    for nome, (motor, tolerancia) in variantes.items():
+        erro = np.abs(motor.prever(X) - esperado)
+        print(f"{nome:<28} {erro.mean():>9.4f} {np.percentile(erro, 99):>9.4f} {erro.max():>9.4f} {tolerancia:>11}")
+        if erro.max() > tolerancia:
+            falhas.append(nome)
+    if falhas:
+        print(f"\nERRO: fora da tolerância: {', '.join(falhas)}")
+        sys.exit(1)
+    print("\nOk: todas as variantes dentro da tolerância")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# busca_hiperparametros.py
+# Busca de hiperparâmetros da rede V3 (camadas, taxa de aprendizado, batch, épocas).
+# Cada combinação é avaliada com validação cruzada em k partes, e as combinações rodam
+# em paralelo num pool de processos: cada processo fica com sua fatia dos núcleos
+# (threads do TensorFlow fixadas), então o tempo cai quase na proporção dos núcleos.
+#
+# Parada antecipada em dois níveis:
+#   - dentro de cada treino, EarlyStopping na parte de validação (as épocas da grade
+#     são o máximo; a tabela mostra quantas foram úteis);
+#   - na busca, depois de --paciencia tentativas seguidas sem melhorar o melhor MSE.
+# As partes usam o mesmo hash de linha do treinar_modelo.py: as linhas de teste dele
+# ficam fora da busca, e o melhor modelo é treinado de novo e registrado como versão nova.
+#
+# Uso:
+#   python busca_hiperparametros.py                       (grade inteira, todos os núcleos)
+#   python busca_hiperparametros.py --modo aleatorio --tentativas 20 --folds 5
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+import dados_colunares
+import treinar_modelo
+
+ESPACO = {
+    "camadas": [(32, 16), (64, 32), (128, 64), (64, 32, 16)],
+    "taxa": [3e-4, 1e-3, 3e-3],
+    "batch": [32, 64, 128],
+    "epocas": [50, 100],
+}
+FOLDS = 3
+PACIENCIA = 8 # Tentativas seguidas sem melhorar antes de parar a busca
+PACIENCIA_EPOCAS = 10 # EarlyStopping dentro de cada treino
+MIN_MELHORA = 0.01 # Melhora relativa mínima do MSE para contar como melhora
+ARQUIVO_RESULTADOS = 'busca_resultados.csv'
+
+def nucleos():
+    """Núcleos que este processo pode usar (respeita taskset/cgroups)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def combinacoes(modo='grade', tentativas=None, semente=None):
+    """Lista de dicionários de hiperparâmetros. 'aleatorio' sorteia sem repetir da grade."""
+    grade = [dict(zip(ESPACO, valores)) for valores in itertools.product(*ESPACO.values())]
+    if modo == 'aleatorio':
+        ordem = np.random.default_rng(semente).permutation(len(grade))
+        grade = [grade[i] for i in ordem]
+    return grade[:tentativas] if tentativas else grade
+
+def carregar_dados(caminho, linhas=None, folds=FOLDS):
+    """(X, y, parte) só com as linhas de treino do treinar_modelo.py; parte = fold de cada linha."""
+    tabela = dados_colunares.abrir(caminho)
+    df = tabela.fatia(0, min(linhas or len(tabela), len(tabela)))
+    X, y = df.drop('target', axis=1), df['target']
+    h = treinar_modelo.hash_linhas(X, y)
+    treino = h % 100 >= treinar_modelo.PERCENTUAL_TESTE
+    # Outros dígitos do mesmo hash: independe do corte de teste
+    parte = (h[treino] // 100) % folds
+    return X.to_numpy(np.float64)[treino], y.to_numpy(np.float32)[treino], parte
+
+# --- PROCESSOS DO POOL ---
+
+_dados = None
+
+def _iniciar_processo(caminho, linhas, folds, threads):
+    """Roda uma vez em cada processo: fixa as threads do TensorFlow e carrega os dados."""
+    global _dados
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _dados = carregar_dados(caminho, linhas, folds)
+
+def avaliar(parametros, semente=treinar_modelo.SEMENTE):
+    """Validação cruzada de uma combinação. Retorna os parâmetros + MSE médio, desvio e tempo."""
+    import tensorflow as tf
+    from sklearn.preprocessing import MinMaxScaler
+
+    X, y, parte = _dados
+    t0 = time.perf_counter()
+    erros, epocas_uteis = [], []
+    for k in range(int(parte.max()) + 1):
+        validacao = parte == k
+        scaler = MinMaxScaler().fit(X[~validacao])
+        X_treino = scaler.transform(X[~validacao]).astype(np.float32)
+        X_val = scaler.transform(X[validacao]).astype(np.float32)
+        tf.keras.backend.clear_session()
+        tf.random.set_seed(semente + k)
+        model = treinar_modelo.criar_modelo(X.shape[1], parametros["camadas"], parametros["taxa"])
+        parada = tf.keras.callbacks.EarlyStopping(patience=PACIENCIA_EPOCAS, restore_best_weights=True)
+        historico = model.fit(X_treino, y[~validacao], validation_data=(X_val, y[validacao]),
+                              epochs=parametros["epocas"], batch_size=parametros["batch"],
+                              callbacks=[parada], verbose=0).history["val_loss"]
+        erros.append(min(historico))
+        epocas_uteis.append(int(np.argmin(historico)) + 1)
+    return {**parametros, "mse": float(np.mean(erros)), "desvio": float(np.std(erros)),
+            "epocas_uteis": int(round(np.mean(epocas_uteis))), "segundos": time.perf_counter() - t0}
+
+# --- BUSCA ---
+
+def buscar(lista, caminho=treinar_modelo.ARQUIVO_DADOS, linhas=None, folds=FOLDS, processos=None,
+           paciencia=PACIENCIA, semente=treinar_modelo.SEMENTE):
+    """Avalia as combinações em paralelo (no máximo `processos` ao mesmo tempo, para a
+    parada antecipada valer). Retorna a lista de resultados na ordem em que terminaram."""
+    processos = processos or nucleos()
+    threads = max(1, nucleos() // processos)
+    resultados, melhor, sem_melhora = [], math.inf, 0
+    fila, rodando = iter(lista), {}
+    # spawn: cada processo sobe o TensorFlow do zero, já com as threads fixadas
+    with ProcessPoolExecutor(processos, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_iniciar_processo, initargs=(caminho, linhas, folds, threads)) as pool:
+        def enviar():
+            parametros = next(fila, None)
+            if parametros is not None:
+                rodando[pool.submit(avaliar, parametros, semente)] = parametros
+
+        for _ in range(processos):
+            enviar()
+        while rodando:
+            prontos, _ = wait(rodando, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                parametros = rodando.pop(futuro)
+                try:
+                    r = futuro.result()
+                except Exception as e:
+                    print(f"Tentativa {descrever(parametros)} falhou: {e}", flush=True)
+                    continue
+                resultados.append(r)
+                if r["mse"] < melhor * (1 - MIN_MELHORA):
+                    melhor, sem_melhora = r["mse"], 0
+                else:
+                    sem_melhora += 1
+                print(f"[{len(resultados):>3}] {descrever(r)}  MSE {r['mse']:8.2f} ± {r['desvio']:6.2f}  "
+                      f"({r['segundos']:.1f} s)", flush=True)
+            if paciencia and sem_melhora >= paciencia:
+                print(f"Parando: {sem_melhora} tentativas seguidas sem melhorar.", flush=True)
+                for futuro in rodando: # As que já estão rodando terminam e entram na tabela
+                    try:
+                        resultados.append(futuro.result())
+                    except Exception:
+                        pass
+                break
+            for _ in prontos:
+                enviar()
+    return resultados
+
+def descrever(p):
+    return f"camadas {'-'.join(map(str, p['camadas'])):<10} taxa {p['taxa']:<7g} batch {p['batch']:<4} épocas {p['epocas']:<4}"
+
+def tabela(resultados):
+    """DataFrame ordenado do melhor para o pior."""
+    df = pd.DataFrame(resultados)
+    df["camadas"] = df["camadas"].map(lambda c: "-".join(map(str, c)))
+    return df.sort_values("mse").reset_index(drop=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca de hiperparâmetros da rede do Sentinela")
+    parser.add_argument("--dados", default=treinar_modelo.ARQUIVO_DADOS, help="Histórico .csv ou pasta .colunas")
+    parser.add_argument("--modo", choices=("grade", "aleatorio"), default="grade")
+    parser.add_argument("--tentativas", type=int, help="Máximo de combinações (padrão: a grade toda)")
+    parser.add_argument("--folds", type=int, default=FOLDS)
+    parser.add_argument("--processos", type=int, default=nucleos(), help="Padrão: um por núcleo")
+    parser.add_argument("--paciencia", type=int, default=PACIENCIA, help="0 = sem parada antecipada")
+    parser.add_argument("--linhas", type=int, help="Usa só as primeiras N linhas na busca")
+    parser.add_argument("--semente", type=int, default=treinar_modelo.SEMENTE)
+    parser.add_argument("--resultados", default=ARQUIVO_RESULTADOS, help="CSV com a tabela")
+    parser.add_argument("--versao", help="Versão do melhor modelo no registro (padrão: v3-busca-<data>-<hora>)")
+    parser.add_argument("--sem-exportar", action="store_true", help="Só a tabela, sem treinar o melhor")
+    args = parser.parse_args(argv)
+
+    if args.folds < 2:
+        print("Erro: --folds precisa ser pelo menos 2.")
+        return 1
+    lista = combinacoes(args.modo, args.tentativas, args.semente)
+    print(f"Busca: {len(lista)} combinações, {args.folds} folds, {args.processos} processos "
+          f"({max(1, nucleos() // args.processos)} threads cada)")
+    t0 = time.perf_counter()
+    resultados = buscar(lista, args.dados, args.linhas, args.folds, args.processos, args.paciencia, args.semente)
+    if not resultados:
+        print("Erro: nenhuma tentativa terminou.")
+        return 1
+    df = tabela(resultados)
+    print(f"\n{len(df)} tentativas em {time.perf_counter() - t0:.1f} s\n")
+    print(df.to_string(formatters={"mse": "{:.2f}".format, "desvio": "{:.2f}".format,
+                                   "segundos": "{:.1f}".format}))
+    df.to_csv(args.resultados, index=False)
+
+    melhor = df.iloc[0]
+    print(f"\nMelhor: camadas {melhor['camadas']}, taxa {melhor['taxa']:g}, batch {melhor['batch']}, "
+          f"{melhor['epocas_uteis']} épocas (MSE {melhor['mse']:.2f})")
+    if args.sem_exportar:
+        return 0
+    loss = treinar_modelo.treinar_versao(
+        args.versao or treinar_modelo.nome_versao_padrao("v3-busca"), "busca_hiperparametros.py", args.dados,
+        epocas=int(melhor["epocas_uteis"]), batch=int(melhor["batch"]), semente=args.semente,
+        camadas=tuple(int(n) for n in melhor["camadas"].split("-")), taxa=float(melhor["taxa"]))
+    return 0 if loss is not None else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# cache.py
+import threading
+from collections import OrderedDict
+
+class CacheLRU:
+    """Cache em memória com tamanho máximo: ao encher, descarta o item usado há mais tempo.
+
+    Thread-safe, porque o Streamlit atende várias sessões ao mesmo tempo no mesmo processo.
+    """
+
+    def __init__(self, tamanho_max=128):
+        self.tamanho_max = tamanho_max
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def get(self, chave, padrao=None):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.falhas += 1
+            return padrao
+
+    def put(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_max:
+                self._itens.popitem(last=False)
+
+    def get_ou_calcular(self, chave, calcular):
+        """Devolve o valor da chave; se não existir, chama calcular() e guarda o resultado."""
+        valor = self.get(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = calcular()
+            self.put(chave, valor)
+        return valor
+
+    def descartar(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+_AUSENTE = object()
@@ -0,0 +1,79 @@
+# calendario.py
+import calendar as pycalendar # Biblioteca nativa do Python
+from collections import defaultdict
+from datetime import datetime
+
+import database
+import metricas
+from cache import CacheLRU
+
+NOMES_DIAS = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+# Meses já renderizados, por usuário. O Dashboard quase sempre mostra o mês atual,
+# então 256 entradas cobrem com folga os usuários ativos ao mesmo tempo
+MESES_EM_CACHE = 256
+_cache_meses = CacheLRU(MESES_EM_CACHE)
+
+def _classe_cor(titulo):
+    if "Prova" in titulo: return "evt-pink"
+    if "Estudar" in titulo: return "evt-purple"
+    if "Codar" in titulo: return "evt-cyan"
+    return "evt-blue"
+
+# --- FUNÇÃO MÁGICA: GERA O CALENDÁRIO EM HTML PURO ---
+def renderizar_calendario_html(ano, mes, eventos):
+    cal = pycalendar.Calendar(firstweekday=0) # 0 = Segunda
+    dias_do_mes = cal.monthdayscalendar(ano, mes)
+    hoje = datetime.now()
+    
+    # Agrupa os eventos por dia numa passada só.
+    # O banco salva como '2025-11-26T19:00:00', então os 10 primeiros caracteres são a data.
+    prefixo_mes = f"{ano}-{mes:02d}-"
+    por_dia = defaultdict(list)
+    for ev in eventos:
+        inicio = ev['start']
+        if inicio.startswith(prefixo_mes):
+            por_dia[int(inicio[8:10])].append(ev['title'])
+    
+    # HTML DO CABEÇALHO (vai numa lista e junta uma vez só no final)
+    partes = ['<div class="cyber-calendar-container">', '<div class="calendar-header">']
+    partes.extend(f'<div class="day-name">{d}</div>' for d in NOMES_DIAS)
+    partes.append('</div>')
+    
+    # HTML DO GRID
+    partes.append('<div class="calendar-grid">')
+    
+    for semana in dias_do_mes:
+        for dia in semana:
+            if dia == 0:
+                # Dia vazio (mês anterior/próximo)
+                partes.append('<div class="day-cell" style="background: transparent; border: none;"></div>')
+                continue
+            
+            # É hoje?
+            classe_hoje = "day-today" if (dia == hoje.day and mes == hoje.month and ano == hoje.year) else ""
+            
+            # HTML DA CÉLULA DO DIA
+            partes.append(f'<div class="day-cell {classe_hoje}">')
+            partes.append(f'<div class="day-number">{dia}</div>')
+            for titulo in por_dia.get(dia, ()):
+                partes.append(f'<div class="event-pill {_classe_cor(titulo)}">{titulo[:15]}..</div>')
+            partes.append('</div>') # Fecha day-cell
+                
+    partes.append('</div></div>') # Fecha grid e container
+    return ''.join(partes)
+
+def renderizar_calendario_cache(user_id, ano, mes, versao_dados, carregar_eventos):
+    """Versão com cache LRU de renderizar_calendario_html.
+
+    A chave é (banco, user_id, ano, mes, versao_dados, dia de hoje): qualquer mudança na
+    agenda do usuário troca a versão, e a virada do dia troca o destaque de "hoje".
+    carregar_eventos() só é chamada quando o mês não está no cache.
+    """
+    chave = (database.DB_NAME, user_id, ano, mes, versao_dados, datetime.now().date())
+    return _cache_meses.get_ou_calcular(chave, lambda: renderizar_calendario_html(ano, mes, carregar_eventos()))
+
+def limpar_cache():
+    _cache_meses.limpar()
+
+metricas.instrumentar_modulo(globals(), "calendario")
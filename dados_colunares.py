@@ -0,0 +1,175 @@
+# dados_colunares.py
+# Formato colunar binário para os históricos (historico_estudo*.csv).
+# Uma pasta "<nome>.colunas" com um .npy por coluna, em tipos estreitos:
+#   inteiras que cabem em int8 (categóricas, target) -> int8
+#   inteiras maiores                                 -> int32
+#   o resto                                          -> float32
+# e um esquema.json com a ordem das colunas e o número de linhas.
+# Cada .npy é aberto com memmap: ler o histórico não faz parse nem cópia, e só as
+# páginas usadas saem do disco.
+#
+# Uso: python dados_colunares.py historico_estudo.csv historico_estudo_v3.csv
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+SUFIXO = '.colunas'
+ARQUIVO_ESQUEMA = 'esquema.json'
+VERSAO_FORMATO = 1
+TAMANHO_BLOCO = 100_000
+
+def caminho_colunar(caminho_csv):
+    return os.path.splitext(caminho_csv)[0] + SUFIXO
+
+def tipo_estreito(inteira, minimo, maximo):
+    """Menor tipo que guarda a coluna (int8/int32 para inteiras, float32 para o resto)."""
+    if not inteira:
+        return np.dtype(np.float32)
+    for tipo in (np.int8, np.int32):
+        info = np.iinfo(tipo)
+        if info.min <= minimo and maximo <= info.max:
+            return np.dtype(tipo)
+    return np.dtype(np.float32)
+
+class EscritorColunar:
+    """Grava uma tabela colunar bloco a bloco (linhas conhecidas de antemão).
+
+    Escreve numa pasta temporária e só troca pela definitiva no final: quem estiver
+    lendo a versão antiga nunca vê um arquivo pela metade.
+    """
+
+    def __init__(self, destino, tipos, linhas):
+        self.destino = destino
+        self.tipos = {nome: np.dtype(t) for nome, t in tipos.items()}
+        self.linhas = linhas
+        self._tmp = destino + '.tmp'
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(self._tmp)
+        self._colunas = {
+            nome: np.lib.format.open_memmap(os.path.join(self._tmp, nome + '.npy'), mode='w+',
+                                            dtype=tipo, shape=(linhas,))
+            for nome, tipo in self.tipos.items()
+        }
+        self._escritas = 0
+
+    def escrever(self, bloco):
+        """bloco: DataFrame ou dict coluna -> array, com as colunas do esquema."""
+        n = len(bloco[next(iter(self.tipos))])
+        if self._escritas + n > self.linhas:
+            raise ValueError("Mais linhas do que o previsto")
+        for nome, coluna in self._colunas.items():
+            coluna[self._escritas:self._escritas + n] = np.asarray(bloco[nome])
+        self._escritas += n
+
+    def fechar(self):
+        if self._escritas != self.linhas:
+            raise ValueError(f"Esperava {self.linhas} linhas, recebeu {self._escritas}")
+        for coluna in self._colunas.values():
+            coluna.flush()
+        self._colunas = {}
+        with open(os.path.join(self._tmp, ARQUIVO_ESQUEMA), 'w') as f:
+            json.dump({"versao": VERSAO_FORMATO, "linhas": self.linhas,
+                       "colunas": [[nome, tipo.str] for nome, tipo in self.tipos.items()]}, f)
+        shutil.rmtree(self.destino, ignore_errors=True)
+        os.replace(self._tmp, self.destino)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_erro, *_):
+        if tipo_erro is None:
+            self.fechar()
+        else:
+            self._colunas = {}
+            shutil.rmtree(self._tmp, ignore_errors=True)
+
+class TabelaColunar:
+    """Tabela aberta com memmap. tabela['coluna'] é o array do disco, sem cópia."""
+
+    def __init__(self, pasta):
+        with open(os.path.join(pasta, ARQUIVO_ESQUEMA)) as f:
+            esquema = json.load(f)
+        if esquema.get("versao") != VERSAO_FORMATO:
+            raise ValueError(f"Formato colunar desconhecido em {pasta}")
+        self.pasta = pasta
+        self.linhas = esquema["linhas"]
+        self.colunas = [nome for nome, _ in esquema["colunas"]]
+        self._arrays = {nome: np.load(os.path.join(pasta, nome + '.npy'), mmap_mode='r') for nome in self.colunas}
+
+    def __len__(self):
+        return self.linhas
+
+    def __getitem__(self, nome):
+        return self._arrays[nome]
+
+    def fatia(self, inicio, fim):
+        """DataFrame com as linhas [inicio, fim) (copia só essa fatia)."""
+        return pd.DataFrame({nome: self._arrays[nome][inicio:fim] for nome in self.colunas})
+
+    def blocos(self, tamanho_bloco=TAMANHO_BLOCO):
+        for i in range(0, self.linhas, tamanho_bloco):
+            yield self.fatia(i, i + tamanho_bloco)
+
+    def para_dataframe(self):
+        return self.fatia(0, self.linhas)
+
+def converter(caminho_csv, destino=None, tamanho_bloco=TAMANHO_BLOCO):
+    """CSV -> pasta colunar, em duas passadas por blocos (memória limitada pelo bloco).
+
+    1ª passada descobre linhas, faixa e se cada coluna é inteira; 2ª grava.
+    """
+    destino = destino or caminho_colunar(caminho_csv)
+    linhas, faixas = 0, {}
+    for df in pd.read_csv(caminho_csv, chunksize=tamanho_bloco):
+        linhas += len(df)
+        for nome in df.columns:
+            serie = df[nome]
+            inteira = pd.api.types.is_integer_dtype(serie)
+            ant = faixas.get(nome, (True, serie.min(), serie.max()))
+            faixas[nome] = (ant[0] and inteira, min(ant[1], serie.min()), max(ant[2], serie.max()))
+    tipos = {nome: tipo_estreito(*faixa) for nome, faixa in faixas.items()}
+    with EscritorColunar(destino, tipos, linhas) as escritor:
+        for df in pd.read_csv(caminho_csv, chunksize=tamanho_bloco):
+            escritor.escrever(df)
+    return destino
+
+def _mtime(caminho):
+    try:
+        return os.stat(caminho).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def abrir(caminho):
+    """Abre um histórico. Aceita a pasta .colunas ou o .csv: nesse caso usa a versão colunar
+    ao lado e converte antes se ela não existir ou for mais velha que o CSV."""
+    if caminho.endswith(SUFIXO):
+        return TabelaColunar(caminho)
+    pasta = caminho_colunar(caminho)
+    t_csv = _mtime(caminho)
+    t_colunar = _mtime(os.path.join(pasta, ARQUIVO_ESQUEMA))
+    if t_csv is None and t_colunar is None:
+        raise FileNotFoundError(caminho)
+    if t_colunar is None or (t_csv is not None and t_csv > t_colunar):
+        converter(caminho, pasta)
+    return TabelaColunar(pasta)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Uso: python dados_colunares.py arquivo.csv [...]")
+        return 1
+    for caminho in argv:
+        pasta = converter(caminho)
+        tabela = TabelaColunar(pasta)
+        tamanho = sum(os.path.getsize(os.path.join(pasta, f)) for f in os.listdir(pasta))
+        tipos = ", ".join(f"{c}:{tabela[c].dtype}" for c in tabela.colunas)
+        print(f"✅ {caminho} -> {pasta}: {len(tabela)} linhas, "
+              f"{os.path.getsize(caminho) / 1024:.0f} KB -> {tamanho / 1024:.0f} KB ({tipos})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,166 +1,923 @@
 import sqlite3
-import pandas as pd
+import calendar
+import functools
+import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+import metricas
+from cache import CacheLRU
+from dependencias import np, pd
+from intervalos import IndiceIntervalos
+
 DB_NAME = 'sentinela.db'
 
-def conectar():
+# Pragmas aplicados em toda conexão nova.
+# WAL deixa leitores e escritor trabalharem juntos (vários reruns do Streamlit ao mesmo tempo)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",     # Seguro com WAL e bem mais rápido que FULL
+    "PRAGMA cache_size=-16000",      # ~16 MB de cache de páginas por conexão
+    "PRAGMA mmap_size=134217728",    # 128 MB lidos via mmap
+    "PRAGMA busy_timeout=5000",      # Espera até 5s se outro processo estiver escrevendo
+    "PRAGMA temp_store=MEMORY",
+)
+
+TAMANHO_POOL = 8
+
+def conectar(caminho=None):
+    """Abre uma conexão NOVA já com os pragmas. Prefira usar conexao()/transacao()."""
     # check_same_thread=False ajuda a evitar erros no Streamlit
-    return sqlite3.connect(DB_NAME, check_same_thread=False)
+    # Com o metricas.py ligado, a conexão mede cada comando SQL (desligado: conexão comum)
+    fabrica = ConexaoMedida if metricas.ativo() else sqlite3.Connection
+    conn = sqlite3.connect(caminho or DB_NAME, check_same_thread=False, factory=fabrica)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+# --- MEDIÇÃO DOS COMANDOS SQL (só com o metricas.py ligado) ---
+
+@functools.lru_cache(maxsize=512)
+def _nome_sql(sql):
+    """'sql SELECT ... FROM agenda WHERE ...': espaços juntados e cortado em 90 caracteres."""
+    return "sql " + " ".join(sql.split())[:90]
+
+class CursorMedido(sqlite3.Cursor):
+    """Mede cada comando do execute até a última linha lida, com o número de linhas.
+    Sem linhas para ler (INSERT/UPDATE/DELETE), conta o rowcount e registra na hora."""
+
+    _pendente = None # [sql, segundos, linhas] de um SELECT ainda sendo lido
+
+    def _fechar(self):
+        if self._pendente is not None:
+            sql, segundos, linhas = self._pendente
+            self._pendente = None
+            metricas.registrar(_nome_sql(sql), segundos, linhas)
+
+    def _depois_do_execute(self, sql, segundos):
+        if self.description is None:
+            metricas.registrar(_nome_sql(sql), segundos, max(self.rowcount, 0))
+        else:
+            self._pendente = [sql, segundos, 0]
+
+    def _lidas(self, segundos, linhas, fim=False):
+        if self._pendente is not None:
+            self._pendente[1] += segundos
+            self._pendente[2] += linhas
+            if fim:
+                self._fechar()
+
+    def execute(self, sql, parametros=()):
+        self._fechar()
+        t0 = time.perf_counter()
+        super().execute(sql, parametros)
+        self._depois_do_execute(sql, time.perf_counter() - t0)
+        return self
+
+    def executemany(self, sql, parametros):
+        self._fechar()
+        t0 = time.perf_counter()
+        super().executemany(sql, parametros)
+        self._depois_do_execute(sql, time.perf_counter() - t0)
+        return self
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        linhas = super().fetchall()
+        self._lidas(time.perf_counter() - t0, len(linhas), fim=True)
+        return linhas
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        linhas = super().fetchmany(self.arraysize if size is None else size)
+        self._lidas(time.perf_counter() - t0, len(linhas), fim=not linhas)
+        return linhas
+
+    def fetchone(self):
+        # Quase sempre é "conn.execute(...).fetchone()": registra já na primeira
+        t0 = time.perf_counter()
+        linha = super().fetchone()
+        self._lidas(time.perf_counter() - t0, linha is not None, fim=True)
+        return linha
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        try:
+            linha = super().__next__()
+        except StopIteration:
+            self._lidas(time.perf_counter() - t0, 0, fim=True)
+            raise
+        self._lidas(time.perf_counter() - t0, 1)
+        return linha
+
+    def close(self):
+        self._fechar()
+        super().close()
+
+    def __del__(self):
+        self._fechar() # Cursor largado sem ler tudo: registra o que leu
+
+class ConexaoMedida(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os do conn.execute) são CursorMedido."""
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+class PoolConexoes:
+    """Pool thread-safe de conexões persistentes para um arquivo de banco.
+
+    O Streamlit roda cada rerun em uma thread nova, então cache por thread não
+    serve: as conexões ficam numa fila e cada chamada pega uma emprestada.
+    """
+
+    def __init__(self, caminho, tamanho=TAMANHO_POOL):
+        self.caminho = caminho
+        self._livres = queue.LifoQueue(maxsize=tamanho)
+
+    def obter(self):
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            return conectar(self.caminho)
+
+    def devolver(self, conn):
+        # Nunca devolve conexão com transação aberta pro pool
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._livres.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def fechar(self):
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                break
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool():
+    # Procura pelo DB_NAME atual (os benchmarks trocam o arquivo em tempo de execução)
+    pool = _pools.get(DB_NAME)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(DB_NAME, PoolConexoes(DB_NAME))
+    return pool
+
+def fechar_conexoes():
+    """Fecha todas as conexões guardadas (útil em testes e ao trocar de banco)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.fechar()
+        _pools.clear()
+
+@contextmanager
+def conexao():
+    """Empresta uma conexão do pool e devolve ao sair do bloco."""
+    pool = get_pool()
+    conn = pool.obter()
+    try:
+        yield conn
+    finally:
+        pool.devolver(conn)
+
+@contextmanager
+def transacao():
+    """Igual a conexao(), mas faz commit no final (ou rollback se der erro)."""
+    with conexao() as conn:
+        with conn:
+            yield conn
 
 def inicializar_db():
-    conn = conectar()
-    c = conn.cursor()
+    with transacao() as conn:
+        c = conn.cursor()
+        # 1. Tabelas
+        c.execute('''CREATE TABLE IF NOT EXISTS usuario (
+            id INTEGER PRIMARY KEY, nome TEXT, estilo_aprendizagem TEXT, estilo_codigo INTEGER
+        )''')
     
-    # 1. Tabelas
-    c.execute('''CREATE TABLE IF NOT EXISTS usuario (
-        id INTEGER PRIMARY KEY, nome TEXT, estilo_aprendizagem TEXT, estilo_codigo INTEGER
-    )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS tarefas (
+            id INTEGER PRIMARY KEY, nome TEXT UNIQUE, categoria_ia INTEGER
+        )''')
     
-    c.execute('''CREATE TABLE IF NOT EXISTS tarefas (
-        id INTEGER PRIMARY KEY, nome TEXT UNIQUE, categoria_ia INTEGER
-    )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS agenda (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tarefa_nome TEXT, inicio DATETIME, fim DATETIME,
+            minutos_foco_planejado INTEGER, minutos_foco_realizado INTEGER,
+            feedback_cansaco INTEGER, concluido BOOLEAN DEFAULT 0
+        )''')
     
-    c.execute('''CREATE TABLE IF NOT EXISTS agenda (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        tarefa_nome TEXT, inicio DATETIME, fim DATETIME,
-        minutos_foco_planejado INTEGER, minutos_foco_realizado INTEGER,
-        feedback_cansaco INTEGER, concluido BOOLEAN DEFAULT 0
-    )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS metas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, nome_meta TEXT, tarefa_associada TEXT,
+            data_alvo DATETIME, nivel_conhecimento INTEGER, total_horas_estimadas REAL,
+            concluido BOOLEAN DEFAULT 0
+        )''')
     
-    c.execute('''CREATE TABLE IF NOT EXISTS metas (
-        id INTEGER PRIMARY KEY AUTOINCREMENT, nome_meta TEXT, tarefa_associada TEXT,
-        data_alvo DATETIME, nivel_conhecimento INTEGER, total_horas_estimadas REAL,
-        concluido BOOLEAN DEFAULT 0
-    )''')
-    
-    # 2. Inserir Tarefas Padrão (DevOps) se vazio
-    c.execute("SELECT count(*) FROM tarefas")
-    if c.fetchone()[0] == 0:
-        tarefas_devops = [
-            ("Ler Documentação Técnica / Manuais", 0),
-            ("Ler Artigos / Medium", 0),
-            ("Estudar Teoria (Livro/PDF)", 0),
-            ("Revisar Anotações", 0),
-            ("Assistir Aula da Faculdade", 1),
-            ("Ver Tutorial no YouTube", 1),
-            ("Assistir Curso Online (Udemy/Alura)", 1),
-            ("Ouvir Podcast Tech", 2),
-            ("Treinar Listening (Inglês/Espanhol)", 2),
-            ("Laboratório DevOps (Docker/K8s)", 3),
-            ("Codar em Python / IA", 3),
-            ("Resolver Lista de Exercícios", 3),
-            ("Projeto Prático / Protótipo", 3),
-            ("Configurar Servidor / Infra", 3)
-        ]
-        c.executemany("INSERT INTO tarefas (nome, categoria_ia) VALUES (?, ?)", tarefas_devops)
+        # 2. Inserir Tarefas Padrão (DevOps) se vazio
+        c.execute("SELECT count(*) FROM tarefas")
+        if c.fetchone()[0] == 0:
+            tarefas_devops = [
+                ("Ler Documentação Técnica / Manuais", 0),
+                ("Ler Artigos / Medium", 0),
+                ("Estudar Teoria (Livro/PDF)", 0),
+                ("Revisar Anotações", 0),
+                ("Assistir Aula da Faculdade", 1),
+                ("Ver Tutorial no YouTube", 1),
+                ("Assistir Curso Online (Udemy/Alura)", 1),
+                ("Ouvir Podcast Tech", 2),
+                ("Treinar Listening (Inglês/Espanhol)", 2),
+                ("Laboratório DevOps (Docker/K8s)", 3),
+                ("Codar em Python / IA", 3),
+                ("Resolver Lista de Exercícios", 3),
+                ("Projeto Prático / Protótipo", 3),
+                ("Configurar Servidor / Infra", 3)
+            ]
+            c.executemany("INSERT INTO tarefas (nome, categoria_ia) VALUES (?, ?)", tarefas_devops)
+            print("Banco inicializado com tarefas padrão.")
+
+        # 3. Atualiza o schema de bancos antigos (sentinela.db já existentes)
+        migrar(conn)
+
+# --- MIGRAÇÕES (versionadas com PRAGMA user_version) ---
+
+def _epoch(dt):
+    """Converte datetime (sem fuso) para segundos, igual ao strftime('%s') do SQLite."""
+    return calendar.timegm(dt.timetuple())
+
+def _migracao_1_indices_agenda(c):
+    # Colunas inteiras (epoch) calculadas a partir do texto ISO, para consultas por intervalo
+    c.execute("""ALTER TABLE agenda ADD COLUMN inicio_ts INTEGER
+                 GENERATED ALWAYS AS (CAST(strftime('%s', inicio) AS INTEGER)) VIRTUAL""")
+    c.execute("""ALTER TABLE agenda ADD COLUMN fim_ts INTEGER
+                 GENERATED ALWAYS AS (CAST(strftime('%s', fim) AS INTEGER)) VIRTUAL""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_agenda_concluido_inicio ON agenda (concluido, inicio)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_agenda_tarefa ON agenda (tarefa_nome)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_agenda_inicio_ts ON agenda (inicio_ts)")
+
+def _migracao_2_versao_agenda(c):
+    # Contador que muda a cada escrita na agenda (usado para invalidar caches, ex: calendário)
+    c.execute("CREATE TABLE IF NOT EXISTS controle (chave TEXT PRIMARY KEY, valor INTEGER)")
+    c.execute("INSERT OR IGNORE INTO controle (chave, valor) VALUES ('versao_agenda', 0)")
+    for operacao in ("INSERT", "UPDATE", "DELETE"):
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_agenda_versao_{operacao.lower()}
+                      AFTER {operacao} ON agenda
+                      BEGIN
+                          UPDATE controle SET valor = valor + 1 WHERE chave = 'versao_agenda';
+                      END""")
+
+def _migracao_3_rollups_foco(c):
+    # Totais de foco já somados, para o Dashboard não reagrupar o histórico inteiro
+    c.execute("""CREATE TABLE IF NOT EXISTS foco_por_tarefa (
+        tarefa_nome TEXT PRIMARY KEY, minutos INTEGER NOT NULL, sessoes INTEGER NOT NULL
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS foco_por_dia (
+        dia TEXT PRIMARY KEY, minutos INTEGER NOT NULL, sessoes INTEGER NOT NULL
+    )""")
+    c.execute("""INSERT INTO foco_por_tarefa (tarefa_nome, minutos, sessoes)
+                 SELECT tarefa_nome, COALESCE(SUM(minutos_foco_realizado), 0), COUNT(*)
+                 FROM agenda WHERE concluido = 1 GROUP BY tarefa_nome""")
+    c.execute("""INSERT INTO foco_por_dia (dia, minutos, sessoes)
+                 SELECT substr(inicio, 1, 10), COALESCE(SUM(minutos_foco_realizado), 0), COUNT(*)
+                 FROM agenda WHERE concluido = 1 GROUP BY substr(inicio, 1, 10)""")
+
+def _migracao_4_agenda_meta(c):
+    # Liga as sessões geradas pelo Planejador à meta (plano) que as criou
+    c.execute("ALTER TABLE agenda ADD COLUMN meta_id INTEGER REFERENCES metas(id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_agenda_meta ON agenda (meta_id)")
+
+def _migracao_5_multiusuario(c):
+    # Vários usuários no mesmo banco: cada linha de agenda/metas tem dono (usuario.id).
+    # Os dados que já existiam ficam com o usuário atual (ou o id 1, se ainda não há perfil).
+    for operacao in ("insert", "update", "delete"):
+        c.execute(f"DROP TRIGGER IF EXISTS trg_agenda_versao_{operacao}")
+    c.execute("DROP TABLE IF EXISTS controle")
+
+    c.execute("ALTER TABLE agenda ADD COLUMN user_id INTEGER REFERENCES usuario(id)")
+    c.execute("ALTER TABLE metas ADD COLUMN user_id INTEGER REFERENCES usuario(id)")
+    dono = "COALESCE((SELECT MIN(id) FROM usuario), 1)"
+    c.execute(f"UPDATE agenda SET user_id = {dono}")
+    c.execute(f"UPDATE metas SET user_id = {dono}")
+
+    # Índices compostos começando por user_id (cada consulta só olha a "partição" do usuário)
+    for indice in ("idx_agenda_concluido_inicio", "idx_agenda_tarefa", "idx_agenda_inicio_ts"):
+        c.execute(f"DROP INDEX IF EXISTS {indice}")
+    c.execute("CREATE INDEX idx_agenda_user_concluido_inicio ON agenda (user_id, concluido, inicio)")
+    c.execute("CREATE INDEX idx_agenda_user_inicio_ts ON agenda (user_id, inicio_ts)")
+    c.execute("CREATE INDEX idx_agenda_user_tarefa ON agenda (user_id, tarefa_nome)")
+    c.execute("CREATE INDEX idx_metas_user_data ON metas (user_id, data_alvo)")
+
+    # Rollups por usuário (a chave primária muda, então recria as tabelas)
+    c.execute("DROP TABLE IF EXISTS foco_por_tarefa")
+    c.execute("DROP TABLE IF EXISTS foco_por_dia")
+    c.execute("""CREATE TABLE foco_por_tarefa (
+        user_id INTEGER NOT NULL, tarefa_nome TEXT NOT NULL, minutos INTEGER NOT NULL, sessoes INTEGER NOT NULL,
+        PRIMARY KEY (user_id, tarefa_nome)
+    )""")
+    c.execute("""CREATE TABLE foco_por_dia (
+        user_id INTEGER NOT NULL, dia TEXT NOT NULL, minutos INTEGER NOT NULL, sessoes INTEGER NOT NULL,
+        PRIMARY KEY (user_id, dia)
+    )""")
+    c.execute("""INSERT INTO foco_por_tarefa (user_id, tarefa_nome, minutos, sessoes)
+                 SELECT user_id, tarefa_nome, COALESCE(SUM(minutos_foco_realizado), 0), COUNT(*)
+                 FROM agenda WHERE concluido = 1 GROUP BY user_id, tarefa_nome""")
+    c.execute("""INSERT INTO foco_por_dia (user_id, dia, minutos, sessoes)
+                 SELECT user_id, substr(inicio, 1, 10), COALESCE(SUM(minutos_foco_realizado), 0), COUNT(*)
+                 FROM agenda WHERE concluido = 1 GROUP BY user_id, substr(inicio, 1, 10)""")
+
+    # Versão da agenda por usuário: escrever na agenda de um não invalida o cache dos outros
+    c.execute("CREATE TABLE versao_agenda (user_id INTEGER PRIMARY KEY, versao INTEGER NOT NULL)")
+    c.execute("INSERT INTO versao_agenda (user_id, versao) SELECT DISTINCT user_id, 1 FROM agenda")
+    incrementa = """INSERT INTO versao_agenda (user_id, versao) VALUES ({col}.user_id, 1)
+                    ON CONFLICT (user_id) DO UPDATE SET versao = versao + 1"""
+    c.execute(f"""CREATE TRIGGER trg_agenda_versao_insert AFTER INSERT ON agenda
+                  WHEN NEW.user_id IS NOT NULL BEGIN {incrementa.format(col='NEW')}; END""")
+    c.execute(f"""CREATE TRIGGER trg_agenda_versao_delete AFTER DELETE ON agenda
+                  WHEN OLD.user_id IS NOT NULL BEGIN {incrementa.format(col='OLD')}; END""")
+    c.execute(f"""CREATE TRIGGER trg_agenda_versao_update AFTER UPDATE ON agenda
+                  WHEN NEW.user_id IS NOT NULL BEGIN
+                      {incrementa.format(col='NEW')};
+                      UPDATE versao_agenda SET versao = versao + 1
+                      WHERE user_id = OLD.user_id AND OLD.user_id IS NOT NEW.user_id;
+                  END""")
+
+def _migracao_6_retreino(c):
+    # Vetor de 11 features que a IA usou para sugerir a sessão (JSON), guardado na
+    # sessão concluída: é o que o retreino.py usa para aprender com o tempo real
+    c.execute("ALTER TABLE agenda ADD COLUMN contexto_ia TEXT")
+    # Até que id da agenda cada processo já consumiu
+    c.execute("CREATE TABLE marca_agua (processo TEXT PRIMARY KEY, ultimo_id INTEGER NOT NULL)")
+
+def _migracao_7_dias_meta(c):
+    # Dias da semana de cada meta (JSON, 0 = segunda): o replanejamento usa os dela, não os
+    # do formulário. As que já existem herdam os dias em que as sessões delas caíram
+    c.execute("ALTER TABLE metas ADD COLUMN dias_semana TEXT")
+    c.execute("""UPDATE metas SET dias_semana = (
+                     SELECT json_group_array(DISTINCT (CAST(strftime('%w', inicio) AS INTEGER) + 6) % 7)
+                     FROM agenda WHERE agenda.meta_id = metas.id)
+                 WHERE EXISTS (SELECT 1 FROM agenda WHERE agenda.meta_id = metas.id)""")
+
+def _migracao_8_retreino_pendente(c):
+    # Versão que o processo já escolheu e até que id ela vai, gravada antes de publicar:
+    # se ele cair no meio, a próxima rodada refaz a mesma versão com as mesmas sessões
+    c.execute("ALTER TABLE marca_agua ADD COLUMN versao_pendente TEXT")
+    c.execute("ALTER TABLE marca_agua ADD COLUMN pendente_ate INTEGER")
+
+# A posição na lista é a versão: MIGRACOES[0] leva o banco da versão 0 para a 1, etc.
+# Nunca altere uma migração que já foi publicada, sempre adicione uma nova no final.
+MIGRACOES = [
+    _migracao_1_indices_agenda,
+    _migracao_2_versao_agenda,
+    _migracao_3_rollups_foco,
+    _migracao_4_agenda_meta,
+    _migracao_5_multiusuario,
+    _migracao_6_retreino,
+    _migracao_7_dias_meta,
+    _migracao_8_retreino_pendente,
+]
+
+def versao_schema(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrar(conn):
+    """Aplica, em ordem, as migrações que faltam neste banco.
+
+    Cada migração roda na sua própria transação (BEGIN IMMEDIATE), então dois
+    processos subindo ao mesmo tempo não aplicam a mesma migração duas vezes.
+    """
+    if conn.in_transaction:
         conn.commit()
-        print("Banco inicializado com tarefas padrão.")
-        
-    conn.close()
+    while True:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            versao = versao_schema(conn)
+            if versao >= len(MIGRACOES):
+                break
+            MIGRACOES[versao](conn.cursor())
+            # PRAGMA não aceita parâmetro "?", mas o número vem da nossa própria lista
+            conn.execute(f"PRAGMA user_version = {versao + 1}")
+        print(f"Banco migrado para a versão {versao + 1}.")
+
+def plano_consulta(sql, params=()):
+    """Retorna o EXPLAIN QUERY PLAN de uma consulta (lista de textos), para checar uso de índice."""
+    with conexao() as conn:
+        return [linha[3] for linha in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
 
 # --- FUNÇÕES DE USUÁRIO ---
+# Um banco serve vários usuários: toda função de agenda/metas recebe o user_id
+# (o id da tabela usuario) e só enxerga as linhas dele.
+
+def usuario_existe(user_id=None):
+    """Sem user_id: existe algum perfil? Com user_id: esse perfil existe?"""
+    with conexao() as conn:
+        c = conn.cursor()
+        if user_id is None:
+            c.execute("SELECT EXISTS (SELECT 1 FROM usuario)")
+        else:
+            c.execute("SELECT EXISTS (SELECT 1 FROM usuario WHERE id = ?)", (user_id,))
+        return bool(c.fetchone()[0])
 
-def usuario_existe():
-    conn = conectar()
-    c = conn.cursor()
-    c.execute("SELECT count(*) FROM usuario")
-    existe = c.fetchone()[0] > 0
-    conn.close()
-    return existe
+def listar_usuarios():
+    """Lista de (id, nome) de todos os perfis"""
+    with conexao() as conn:
+        return conn.execute("SELECT id, nome FROM usuario ORDER BY nome, id").fetchall()
 
-def get_usuario():
-    conn = conectar()
-    df = pd.read_sql_query("SELECT * FROM usuario LIMIT 1", conn)
-    conn.close()
-    return df.iloc[0] if not df.empty else None
+def get_usuario(user_id):
+    # Roda em todo rerun (menu lateral), então fica sem pandas
+    with conexao() as conn:
+        c = conn.cursor()
+        c.execute("SELECT * FROM usuario WHERE id = ?", (user_id,))
+        linha = c.fetchone()
+        if linha is None:
+            return None
+        return dict(zip([col[0] for col in c.description], linha))
 
 def salvar_perfil_usuario(nome, estilo_txt, estilo_cod):
-    conn = conectar()
-    c = conn.cursor()
+    """Cria um perfil novo e retorna o id dele (None se der erro)"""
     try:
-        # Limpa anteriores
-        c.execute("DELETE FROM usuario") 
-        # Insere novo
-        c.execute("INSERT INTO usuario (nome, estilo_aprendizagem, estilo_codigo) VALUES (?, ?, ?)",
-                  (nome, estilo_txt, estilo_cod))
-        conn.commit()
+        with transacao() as conn:
+            c = conn.cursor()
+            c.execute("INSERT INTO usuario (nome, estilo_aprendizagem, estilo_codigo) VALUES (?, ?, ?)",
+                      (nome, estilo_txt, estilo_cod))
+            return c.lastrowid
     except Exception as e:
         print(f"Erro ao salvar usuário: {e}")
-    finally:
-        # O finally garante que fecha MESMO se der erro, mas só no final de tudo
-        conn.close()
+        return None
+
+def resetar_usuario(user_id):
+    """Apaga o perfil e todos os dados dele"""
+    with transacao() as conn:
+        for tabela in ("agenda", "metas", "foco_por_tarefa", "foco_por_dia"):
+            conn.execute(f"DELETE FROM {tabela} WHERE user_id = ?", (user_id,))
+        conn.execute("DELETE FROM usuario WHERE id = ?", (user_id,))
+        # A versão da agenda fica e só sobe: se o id for reaproveitado por um perfil novo,
+        # os caches (de qualquer processo) não reconhecem uma versão já usada
+        conn.execute("""INSERT INTO versao_agenda (user_id, versao) VALUES (?, 1)
+                        ON CONFLICT (user_id) DO UPDATE SET versao = versao + 1""", (user_id,))
 
 # --- FUNÇÕES DE AGENDA/TAREFAS ---
 
 def get_tarefas():
-    conn = conectar()
-    df = pd.read_sql_query("SELECT nome, categoria_ia FROM tarefas ORDER BY nome", conn)
-    conn.close()
-    return df
-
-def adicionar_evento(tarefa, inicio_iso, fim_iso, minutos_foco):
-    conn = conectar()
-    c = conn.cursor()
+    # Catálogo de tarefas é o mesmo para todos os usuários
+    with conexao() as conn:
+        return pd.read_sql_query("SELECT nome, categoria_ia FROM tarefas ORDER BY nome", conn)
+
+# --- ÍNDICE DE INTERVALOS EM MEMÓRIA ---
+# Um intervalos.IndiceIntervalos por usuário, montado na primeira consulta. Quem grava
+# na agenda usa _escrita_agenda, que repassa ao índice as linhas inseridas/removidas.
+# A versão da agenda (versao_agenda) diz se o índice ainda vale: se alguém mexeu
+# por fora (outro processo, manutenção), ela não bate e o índice é remontado.
+
+INDICES_EM_MEMORIA = 32
+_indices = CacheLRU(INDICES_EM_MEMORIA) # (DB_NAME, user_id) -> (versao, IndiceIntervalos)
+
+def _ler_versao(conn, user_id):
+    linha = conn.execute("SELECT versao FROM versao_agenda WHERE user_id = ?", (user_id,)).fetchone()
+    return linha[0] if linha else 0
+
+@contextmanager
+def _escrita_agenda(user_id):
+    """transacao() para quem grava na agenda do usuário. Devolve (conn, removidos):
+    quem apagar linhas põe (id, inicio_ts, fim_ts) em removidos; as inseridas são
+    achadas sozinhas (id maior que o último antes da transação).
+    """
+    removidos = []
+    with conexao() as conn:
+        with conn:
+            # Trava a escrita já no início: versão e ids lidos aqui não mudam até o commit
+            conn.execute("BEGIN IMMEDIATE")
+            antes = _ler_versao(conn, user_id)
+            ultimo_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM agenda").fetchone()[0]
+            yield conn, removidos
+            # Faixa de rowid (só as linhas novas): com o user_id indexável, o SQLite escolhe o
+            # índice (user_id, ...) e percorre a agenda inteira do usuário a cada escrita
+            novos = conn.execute("SELECT id, inicio_ts, fim_ts FROM agenda WHERE id > ? AND +user_id = ?",
+                                 (ultimo_id, user_id)).fetchall()
+            depois = _ler_versao(conn, user_id)
+    chave = (DB_NAME, user_id)
+    atual = _indices.get(chave)
+    if atual is None:
+        return
+    if atual[0] != antes:
+        _indices.descartar(chave)
+        return
+    atual[1].aplicar(novos, removidos)
+    _indices.put(chave, (depois, atual[1]))
+
+def get_indice_agenda(user_id):
+    """Índice em memória (intervalos.IndiceIntervalos) da agenda do usuário,
+    para perguntar sobreposição, horário livre e dia mais cheio sem ir ao banco."""
+    chave = (DB_NAME, user_id)
+    atual = _indices.get(chave)
+    if atual is not None and atual[0] == get_versao_agenda(user_id):
+        return atual[1]
+    with conexao() as conn:
+        with conn:
+            conn.execute("BEGIN") # Versão e linhas do mesmo snapshot
+            versao = _ler_versao(conn, user_id)
+            linhas = conn.execute("SELECT id, inicio_ts, fim_ts FROM agenda WHERE user_id = ? ORDER BY inicio_ts",
+                                  (user_id,)).fetchall()
+    indice = IndiceIntervalos(linhas)
+    _indices.put(chave, (versao, indice))
+    return indice
+
+def adicionar_evento(user_id, tarefa, inicio_iso, fim_iso, minutos_foco):
+    with _escrita_agenda(user_id) as (conn, _):
+        conn.execute("""
+            INSERT INTO agenda (user_id, tarefa_nome, inicio, fim, minutos_foco_planejado)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, tarefa, inicio_iso, fim_iso, minutos_foco))
+
+COR_CONCLUIDO = "#28a745"
+COR_PENDENTE = "#3174ad"
+COLUNAS_EVENTO = "id, tarefa_nome, inicio, fim, concluido, minutos_foco_planejado"
+FORMATOS = ("registros", "colunas")
+
+def _inserir_meta(c, user_id, meta):
+    dias = meta.get('dias_semana')
     c.execute("""
-        INSERT INTO agenda (tarefa_nome, inicio, fim, minutos_foco_planejado)
-        VALUES (?, ?, ?, ?)
-    """, (tarefa, inicio_iso, fim_iso, minutos_foco))
-    conn.commit()
-    conn.close()
-
-def get_eventos():
-    conn = conectar()
-    df = pd.read_sql_query("SELECT id, tarefa_nome, inicio, fim, concluido, minutos_foco_planejado FROM agenda", conn)
-    conn.close()
-    
-    eventos = []
-    for _, row in df.iterrows():
-        cor = "#28a745" if row['concluido'] else "#3174ad"
-        eventos.append({
-            "title": row['tarefa_nome'],
-            "start": row['inicio'],
-            "end": row['fim'],
-            "backgroundColor": cor,
-            "id": str(row['id']),
-            "minutos_foco_planejado": row['minutos_foco_planejado']
-        })
-    return eventos
-
-def deletar_evento(evento_id):
-    conn = conectar()
-    c = conn.cursor()
+        INSERT INTO metas (user_id, nome_meta, tarefa_associada, data_alvo, nivel_conhecimento, total_horas_estimadas,
+                           dias_semana)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (user_id, meta['nome_meta'], meta.get('tarefa_associada'), meta.get('data_alvo'),
+          meta.get('nivel_conhecimento'), meta.get('total_horas_estimadas'),
+          json.dumps(sorted(set(dias))) if dias else None))
+    return c.lastrowid
+
+def _inserir_sessoes(c, user_id, items, meta_id):
+    c.executemany("""
+        INSERT INTO agenda (user_id, tarefa_nome, inicio, fim, minutos_foco_planejado, meta_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(user_id, item['tarefa'], item['inicio'], item['fim'], item['minutos'], meta_id) for item in items])
+
+def adicionar_eventos_lote(user_id, items, meta=None):
+    """Grava várias sessões de uma vez (uma transação, um executemany).
+
+    items: lista de dicts no formato do planejador ('tarefa', 'inicio', 'fim', 'minutos').
+    meta: dict opcional com os campos da tabela metas (nome_meta, tarefa_associada,
+    data_alvo, nivel_conhecimento, total_horas_estimadas, dias_semana). Se vier, o plano é
+    registrado em metas e as sessões ficam ligadas a ele.
+    Retorna o id da meta criada (ou None).
+    """
+    with _escrita_agenda(user_id) as (conn, _):
+        c = conn.cursor()
+        meta_id = _inserir_meta(c, user_id, meta) if meta else None
+        _inserir_sessoes(c, user_id, items, meta_id)
+    return meta_id
+
+def _remover_sessoes_pendentes(c, user_id, meta_id, removidos):
+    # Só as pendentes: as já feitas continuam ligadas à meta (são o progresso dela)
+    # Sempre pelo índice de meta_id (só as sessões da meta). Sem o INDEXED BY, estatísticas
+    # de um ANALYZE feito quando quase tudo tinha meta_id NULL levam o SQLite a varrer a agenda
+    removidos.extend(c.execute("""
+        DELETE FROM agenda INDEXED BY idx_agenda_meta WHERE meta_id = ? AND user_id = ? AND concluido = 0
+        RETURNING id, inicio_ts, fim_ts
+    """, (meta_id, user_id)).fetchall())
+
+def deletar_plano(user_id, meta_id):
+    """Apaga um plano inteiro: a meta e todas as sessões pendentes ligadas a ela."""
     try:
-        c.execute("DELETE FROM agenda WHERE id=?", (evento_id,))
-        conn.commit()
+        with _escrita_agenda(user_id) as (conn, removidos):
+            c = conn.cursor()
+            _remover_sessoes_pendentes(c, user_id, meta_id, removidos)
+            # Sessões já feitas continuam no histórico (e nos rollups), só perdem o vínculo
+            c.execute("UPDATE agenda INDEXED BY idx_agenda_meta SET meta_id = NULL WHERE meta_id = ? AND user_id = ?",
+                      (meta_id, user_id))
+            c.execute("DELETE FROM metas WHERE id = ? AND user_id = ?", (meta_id, user_id))
+        return True
+    except Exception as e:
+        print(f"Erro ao deletar plano: {e}")
+        return False
+
+def substituir_plano(user_id, meta_id, items):
+    """Troca as sessões pendentes de um plano por uma nova lista, numa transação só."""
+    with _escrita_agenda(user_id) as (conn, removidos):
+        c = conn.cursor()
+        _remover_sessoes_pendentes(c, user_id, meta_id, removidos)
+        _inserir_sessoes(c, user_id, items, meta_id)
+
+def get_metas(user_id):
+    with conexao() as conn:
+        return pd.read_sql_query("""
+            SELECT id, nome_meta, tarefa_associada, data_alvo, nivel_conhecimento,
+                   total_horas_estimadas, concluido
+            FROM metas WHERE user_id = ? ORDER BY data_alvo
+        """, conn, params=(user_id,))
+
+def get_metas_ativas(user_id, a_partir_de):
+    """Metas não concluídas com prazo depois de a_partir_de, em ordem de prazo,
+    com os minutos já feitos (sessões concluídas ligadas a cada uma).
+    dias_semana vem como lista (0 = segunda), ou None se a meta não guardou os dias."""
+    with conexao() as conn:
+        c = conn.execute("""
+            SELECT m.id, m.nome_meta, m.tarefa_associada, m.data_alvo, m.total_horas_estimadas, m.dias_semana,
+                   COALESCE((SELECT SUM(a.minutos_foco_realizado) FROM agenda a INDEXED BY idx_agenda_meta
+                             WHERE a.meta_id = m.id AND a.concluido = 1), 0) AS minutos_feitos
+            FROM metas m
+            WHERE m.user_id = ? AND m.concluido = 0 AND m.data_alvo > ?
+            ORDER BY m.data_alvo
+        """, (user_id, a_partir_de.isoformat()))
+        colunas = [col[0] for col in c.description]
+        metas = [dict(zip(colunas, linha)) for linha in c.fetchall()]
+    for m in metas:
+        if m['dias_semana'] is not None:
+            m['dias_semana'] = json.loads(m['dias_semana'])
+    return metas
+
+def substituir_planos(user_id, planos):
+    """Várias metas de uma vez: {meta_id: sessões}. Troca as sessões pendentes de
+    cada uma numa transação só (ou grava todas, ou nenhuma)."""
+    with _escrita_agenda(user_id) as (conn, removidos):
+        c = conn.cursor()
+        for meta_id, items in planos.items():
+            _remover_sessoes_pendentes(c, user_id, meta_id, removidos)
+            _inserir_sessoes(c, user_id, items, meta_id)
+
+def _montar_eventos(linhas):
+    # Direto das tuplas do cursor: sem DataFrame e sem iterrows
+    return [
+        {
+            "title": tarefa,
+            "start": inicio,
+            "end": fim,
+            "backgroundColor": COR_CONCLUIDO if concluido else COR_PENDENTE,
+            "id": str(id_),
+            "minutos_foco_planejado": minutos,
+        }
+        for id_, tarefa, inicio, fim, concluido, minutos in linhas
+    ]
+
+def _montar_colunas(linhas):
+    """Formato colunar (dict de arrays NumPy) para quem só agrega"""
+    n = len(linhas)
+    ids, tarefas, inicios, fins, concluidos, minutos = zip(*linhas) if n else ((),) * 6
+    return {
+        "id": np.fromiter(ids, dtype=np.int64, count=n),
+        "tarefa_nome": np.array(tarefas, dtype=object),
+        "inicio": np.array(inicios, dtype=object),
+        "fim": np.array(fins, dtype=object),
+        "concluido": np.fromiter(concluidos, dtype=bool, count=n),
+        # NULL vira NaN
+        "minutos_foco_planejado": np.array(minutos, dtype=np.float64) if n else np.empty(0),
+    }
+
+def _consultar_eventos(sql, params, formato):
+    if formato not in FORMATOS:
+        raise ValueError(f"formato deve ser um de {list(FORMATOS)}")
+    with conexao() as conn:
+        linhas = conn.execute(sql, params).fetchall()
+    return _montar_eventos(linhas) if formato == "registros" else _montar_colunas(linhas)
+
+def get_eventos(user_id, formato="registros"):
+    """Todos os eventos do usuário. formato='colunas' devolve um dict de arrays."""
+    return _consultar_eventos(f"SELECT {COLUNAS_EVENTO} FROM agenda WHERE user_id = ?", (user_id,), formato)
+
+def get_versao_agenda(user_id):
+    """Número que muda a cada insert/update/delete na agenda do usuário (mantido por trigger)"""
+    with conexao() as conn:
+        linha = conn.execute("SELECT versao FROM versao_agenda WHERE user_id = ?", (user_id,)).fetchone()
+    return linha[0] if linha else 0
+
+ORDENS = {"asc": "ASC", "desc": "DESC"}
+
+def get_eventos_intervalo(user_id, inicio, fim, limit=None, order="asc", formato="registros"):
+    """Eventos do usuário que começam em [inicio, fim), já filtrados e ordenados pelo SQLite.
+
+    inicio/fim são datetimes. order é 'asc' ou 'desc' (pela data de início).
+    """
+    if order not in ORDENS:
+        raise ValueError(f"order deve ser um de {list(ORDENS)}")
+    sql = f"""
+        SELECT {COLUNAS_EVENTO}
+        FROM agenda
+        WHERE user_id = ? AND inicio_ts >= ? AND inicio_ts < ?
+        ORDER BY inicio_ts {ORDENS[order]}
+    """
+    params = [user_id, _epoch(inicio), _epoch(fim)]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return _consultar_eventos(sql, params, formato)
+
+def get_proximas_missoes(user_id, n=4, a_partir_de=None):
+    """As N próximas missões ainda não concluídas (coluna PRÓXIMAS MISSÕES do Dashboard)"""
+    a_partir_de = a_partir_de or datetime.now()
+    # Usa o índice (user_id, concluido, inicio): o texto ISO ordena igual à data
+    return _consultar_eventos(f"""
+        SELECT {COLUNAS_EVENTO}
+        FROM agenda
+        WHERE user_id = ? AND concluido = 0 AND inicio >= ?
+        ORDER BY inicio
+        LIMIT ?
+    """, (user_id, a_partir_de.isoformat(), int(n)), "registros")
+
+DURACAO_MAX_EVENTO_S = 24 * 3600
+
+def get_intervalos_ocupados(user_id, inicio, fim, excluir_metas=()):
+    """(inicio_ts, fim_ts, meta_id) dos eventos do usuário que cruzam [inicio, fim), em ordem de início.
+
+    Formato que o planejador usa para achar horário livre. excluir_metas deixa de fora
+    as sessões dessas metas (as que vão ser replanejadas).
+    """
+    # Nenhuma sessão dura mais de um dia: limita o início por baixo para o índice
+    # não ter que percorrer o histórico inteiro
+    sql = """
+        SELECT inicio_ts, fim_ts, meta_id FROM agenda
+        WHERE user_id = ? AND inicio_ts >= ? AND inicio_ts < ? AND fim_ts > ?
+    """
+    params = [user_id, _epoch(inicio) - DURACAO_MAX_EVENTO_S, _epoch(fim), _epoch(inicio)]
+    if excluir_metas:
+        sql += f" AND (meta_id IS NULL OR meta_id NOT IN ({', '.join('?' * len(excluir_metas))}))"
+        params.extend(excluir_metas)
+    with conexao() as conn:
+        return conn.execute(sql + " ORDER BY inicio_ts", params).fetchall()
+
+def deletar_evento(user_id, evento_id):
+    try:
+        with _escrita_agenda(user_id) as (conn, removidos):
+            c = conn.cursor()
+            c.execute("SELECT tarefa_nome, inicio, minutos_foco_realizado, concluido FROM agenda WHERE id=? AND user_id=?",
+                      (evento_id, user_id))
+            linha = c.fetchone()
+            if linha is None:
+                return False
+            removidos.extend(c.execute("DELETE FROM agenda WHERE id=? AND user_id=? RETURNING id, inicio_ts, fim_ts",
+                                       (evento_id, user_id)).fetchall())
+            # Se era uma sessão concluída, tira ela dos totais na mesma transação
+            if linha[3]:
+                _somar_rollups(c, user_id, linha[0], linha[1], -(linha[2] or 0), -1)
         return True
     except Exception as e:
         print(f"Erro ao deletar: {e}")
         return False
-    finally:
-        conn.close()
         
 # --- NOVAS FUNÇÕES PARA GRÁFICOS E CRONÔMETRO ---
 
-def get_dados_concluidos():
+def get_dados_concluidos(user_id):
     """Busca apenas as missões que foram realmente feitas para o gráfico"""
-    conn = conectar()
-    # Pega nome, data de inicio e o tempo REAL executado
-    df = pd.read_sql_query("""
-        SELECT tarefa_nome, inicio, minutos_foco_realizado 
-        FROM agenda 
-        WHERE concluido = 1
-    """, conn)
-    conn.close()
-    return df
-
-def finalizar_missao_manual(nome_tarefa, minutos_reais, inicio_iso, fim_iso):
-    """Salva uma sessão feita pelo cronômetro"""
-    conn = conectar()
-    c = conn.cursor()
+    with conexao() as conn:
+        # Pega nome, data de inicio e o tempo REAL executado
+        return pd.read_sql_query("""
+            SELECT tarefa_nome, inicio, minutos_foco_realizado 
+            FROM agenda 
+            WHERE user_id = ? AND concluido = 1
+        """, conn, params=(user_id,))
+
+def finalizar_missao_manual(user_id, nome_tarefa, minutos_reais, inicio_iso, fim_iso, contexto_ia=None,
+                            evento_id=None):
+    """Salva uma sessão feita pelo cronômetro. contexto_ia: o vetor de 11 features da
+    previsão que originou a sessão (se houve), para o retreino aprender com ela.
+    evento_id: a missão planejada que foi cumprida (botão INICIAR do Dashboard). Ela sai
+    da agenda e a sessão real herda o meta_id dela, contando no progresso da meta."""
+    if contexto_ia is not None:
+        contexto_ia = json.dumps([float(v) for v in contexto_ia])
+    with _escrita_agenda(user_id) as (conn, removidos):
+        meta_id = None
+        if evento_id is not None:
+            linha = conn.execute("""DELETE FROM agenda WHERE id = ? AND user_id = ? AND concluido = 0
+                                    RETURNING id, inicio_ts, fim_ts, meta_id""", (evento_id, user_id)).fetchone()
+            if linha is not None:
+                removidos.append(linha[:3])
+                meta_id = linha[3]
+        conn.execute("""
+            INSERT INTO agenda (user_id, tarefa_nome, inicio, fim, minutos_foco_planejado, minutos_foco_realizado,
+                                concluido, contexto_ia, meta_id)
+            VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+        """, (user_id, nome_tarefa, inicio_iso, fim_iso, minutos_reais, minutos_reais, contexto_ia, meta_id))
+        _somar_rollups(conn.cursor(), user_id, nome_tarefa, inicio_iso, minutos_reais, 1)
+
+# --- RETREINO (sessões reais para a IA) ---
+
+def get_sessoes_para_treino(desde_id, limite=None, ate_id=None):
+    """Sessões concluídas com contexto_ia e id > desde_id (e <= ate_id, se vier), em ordem
+    de id (de todos os usuários). Retorna linhas (id, inicio, minutos_foco_realizado, contexto)
+    com o contexto já como lista de 11 números."""
+    sql = """SELECT id, inicio, minutos_foco_realizado, contexto_ia FROM agenda
+             WHERE id > ? AND concluido = 1 AND contexto_ia IS NOT NULL"""
+    params = [desde_id]
+    if ate_id is not None:
+        sql += " AND id <= ?"
+        params.append(ate_id)
+    sql += " ORDER BY id"
+    if limite is not None:
+        sql += " LIMIT ?"
+        params.append(limite)
+    with conexao() as conn:
+        return [(*linha[:3], json.loads(linha[3])) for linha in conn.execute(sql, params)]
+
+def get_marca_agua(processo):
+    """Último id da agenda já consumido pelo processo (0 se nunca rodou)."""
+    with conexao() as conn:
+        linha = conn.execute("SELECT ultimo_id FROM marca_agua WHERE processo = ?", (processo,)).fetchone()
+    return linha[0] if linha else 0
+
+def avancar_marca_agua(conn, processo, ultimo_id):
+    """Grava a marca d'água dentro da transação de quem chama (commit junto com o resto).
+    Limpa a versão pendente: ela foi concluída."""
+    conn.execute("""INSERT INTO marca_agua (processo, ultimo_id) VALUES (?, ?)
+                    ON CONFLICT (processo) DO UPDATE SET ultimo_id = MAX(ultimo_id, excluded.ultimo_id),
+                                                         versao_pendente = NULL, pendente_ate = NULL""",
+                 (processo, ultimo_id))
+
+def get_versao_pendente(processo):
+    """(versão, último id) que o processo começou a publicar e não concluiu, ou None."""
+    with conexao() as conn:
+        linha = conn.execute("SELECT versao_pendente, pendente_ate FROM marca_agua WHERE processo = ?",
+                             (processo,)).fetchone()
+    return tuple(linha) if linha and linha[0] is not None else None
+
+def marcar_versao_pendente(processo, versao, ate_id):
+    """Anota a versão que vai ser publicada com as sessões até ate_id (antes de publicar)."""
+    with transacao() as conn:
+        conn.execute("""INSERT INTO marca_agua (processo, ultimo_id, versao_pendente, pendente_ate) VALUES (?, 0, ?, ?)
+                        ON CONFLICT (processo) DO UPDATE SET versao_pendente = excluded.versao_pendente,
+                                                             pendente_ate = excluded.pendente_ate""",
+                     (processo, versao, ate_id))
+
+# --- TOTAIS DE FOCO (ROLLUPS) ---
+# foco_por_tarefa e foco_por_dia guardam a soma das sessões concluídas da agenda, por usuário.
+# Quem grava/apaga sessão concluída atualiza os dois na mesma transação.
+
+def _somar_rollups(c, user_id, tarefa_nome, inicio_iso, minutos, sessoes):
+    dia = inicio_iso[:10]
+    c.execute("""
+        INSERT INTO foco_por_tarefa (user_id, tarefa_nome, minutos, sessoes) VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id, tarefa_nome) DO UPDATE SET minutos = minutos + excluded.minutos,
+                                                         sessoes = sessoes + excluded.sessoes
+    """, (user_id, tarefa_nome, minutos, sessoes))
     c.execute("""
-        INSERT INTO agenda (tarefa_nome, inicio, fim, minutos_foco_planejado, minutos_foco_realizado, concluido)
-        VALUES (?, ?, ?, ?, ?, 1)
-    """, (nome_tarefa, inicio_iso, fim_iso, minutos_reais, minutos_reais))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+        INSERT INTO foco_por_dia (user_id, dia, minutos, sessoes) VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id, dia) DO UPDATE SET minutos = minutos + excluded.minutos,
+                                                 sessoes = sessoes + excluded.sessoes
+    """, (user_id, dia, minutos, sessoes))
+    # Não deixa linha zerada sobrando (as tabelas ficam do tamanho do nº de tarefas/dias)
+    if sessoes < 0:
+        c.execute("DELETE FROM foco_por_tarefa WHERE user_id = ? AND tarefa_nome = ? AND sessoes <= 0",
+                  (user_id, tarefa_nome))
+        c.execute("DELETE FROM foco_por_dia WHERE user_id = ? AND dia = ? AND sessoes <= 0", (user_id, dia))
+
+# Os mesmos totais calculados direto da agenda (fonte da verdade)
+SQL_FOCO_POR_TAREFA = """
+    SELECT user_id, tarefa_nome, COALESCE(SUM(minutos_foco_realizado), 0) AS minutos, COUNT(*) AS sessoes
+    FROM agenda WHERE concluido = 1 GROUP BY user_id, tarefa_nome
+"""
+SQL_FOCO_POR_DIA = """
+    SELECT user_id, substr(inicio, 1, 10) AS dia, COALESCE(SUM(minutos_foco_realizado), 0) AS minutos, COUNT(*) AS sessoes
+    FROM agenda WHERE concluido = 1 GROUP BY user_id, dia
+"""
+
+def _reconstruir_rollups(c):
+    c.execute("DELETE FROM foco_por_tarefa")
+    c.execute("DELETE FROM foco_por_dia")
+    c.execute("INSERT INTO foco_por_tarefa (user_id, tarefa_nome, minutos, sessoes) " + SQL_FOCO_POR_TAREFA)
+    c.execute("INSERT INTO foco_por_dia (user_id, dia, minutos, sessoes) " + SQL_FOCO_POR_DIA)
+
+def reconstruir_rollups():
+    """Recalcula foco_por_tarefa e foco_por_dia (de todos os usuários) a partir da agenda."""
+    with transacao() as conn:
+        _reconstruir_rollups(conn.cursor())
+
+def verificar_rollups():
+    """Compara os rollups com a agenda. Retorna a lista de diferenças (vazia = consistente)."""
+    diferencas = []
+    with conexao() as conn:
+        for tabela, chave, sql in (("foco_por_tarefa", "tarefa_nome", SQL_FOCO_POR_TAREFA),
+                                   ("foco_por_dia", "dia", SQL_FOCO_POR_DIA)):
+            esperado = {linha[:2]: linha[2:] for linha in conn.execute(sql)}
+            atual = {linha[:2]: linha[2:] for linha in conn.execute(f"SELECT user_id, {chave}, minutos, sessoes FROM {tabela}")}
+            for k in esperado.keys() | atual.keys():
+                if esperado.get(k) != atual.get(k):
+                    diferencas.append((tabela, k, esperado.get(k), atual.get(k)))
+    return diferencas
+
+def get_foco_por_tarefa(user_id):
+    """Minutos de foco por tarefa (lido do rollup, O(nº de tarefas))"""
+    with conexao() as conn:
+        return pd.read_sql_query("""
+            SELECT tarefa_nome, minutos AS minutos_foco_realizado, sessoes
+            FROM foco_por_tarefa WHERE user_id = ? ORDER BY tarefa_nome
+        """, conn, params=(user_id,))
+
+def get_foco_por_dia(user_id, inicio=None, fim=None):
+    """Minutos de foco por dia, opcionalmente só entre as datas inicio e fim (inclusive)"""
+    inicio = inicio.isoformat()[:10] if inicio else "0000-00-00"
+    fim = fim.isoformat()[:10] if fim else "9999-99-99"
+    with conexao() as conn:
+        return pd.read_sql_query("""
+            SELECT dia, minutos AS minutos_foco_realizado, sessoes
+            FROM foco_por_dia WHERE user_id = ? AND dia BETWEEN ? AND ? ORDER BY dia
+        """, conn, params=(user_id, inicio, fim))
+
+# Tempo de cada função pública no metricas.py (só quando ligado)
+metricas.instrumentar_modulo(globals(), "db")
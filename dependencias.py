@@ -0,0 +1,41 @@
+# dependencias.py
+# Fachada de imports preguiçosos. As bibliotecas pesadas (pandas, numpy, plotly,
+# o motor da IA...) só são importadas no primeiro uso, ou seja, quando a página
+# que precisa delas é aberta. A tela de boas-vindas e o Cronômetro não pagam por isso.
+#
+# Uso:  from dependencias import pd, px
+#       pd.read_sql_query(...)   # <- o import de verdade acontece aqui
+import importlib
+import threading
+
+class ModuloPreguicoso:
+    """Fica no lugar de um módulo e só o importa quando algum atributo é acessado."""
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+        self._lock = threading.Lock()
+
+    def carregar(self):
+        if self._modulo is None:
+            with self._lock:
+                if self._modulo is None:
+                    self._modulo = importlib.import_module(self._nome)
+        return self._modulo
+
+    @property
+    def carregado(self):
+        return self._modulo is not None
+
+    def __getattr__(self, atributo):
+        return getattr(self.carregar(), atributo)
+
+    def __repr__(self):
+        estado = "carregado" if self.carregado else "ainda não importado"
+        return f"<ModuloPreguicoso {self._nome} ({estado})>"
+
+np = ModuloPreguicoso("numpy")
+pd = ModuloPreguicoso("pandas")
+px = ModuloPreguicoso("plotly.express")
+motor_ia = ModuloPreguicoso("motor_ia")
+registro_modelos = ModuloPreguicoso("registro_modelos")
@@ -1,75 +1,119 @@
-import pandas as pd
+# gerar_dados.py
+# Gera o histórico sintético de sessões (V3) para treinar a IA.
+# Tudo vetorizado em NumPy: cada regra do especialista vira uma máscara booleana
+# aplicada no bloco inteiro. Os blocos vão sendo gravados no arquivo, então dá para
+# gerar milhões de linhas com memória constante.
+#
+# Uso: python gerar_dados.py [--linhas 2000] [--semente 42] [--saida historico_estudo_v3.csv]
+#                            [--bloco 100000]
+# A extensão da saída escolhe o formato: .csv ou .colunas (formato colunar do dados_colunares.py).
+import argparse
+import sys
+import time
+
 import numpy as np
-import random
+import pandas as pd
 
-NUM_SESSOES = 2000 # Mais dados pois temos mais variáveis!
+from dados_colunares import SUFIXO, EscritorColunar
 
-dados = []
+NUM_SESSOES = 2000 # Mais dados pois temos mais variáveis!
+TAMANHO_BLOCO = 100_000
 
-print("Gerando dados avançados (V3.0)...")
+COLUNAS = [
+    'dia_semana', 'hora_dia', 'local', 'ruido',
+    'categoria_tarefa', 'prazo_urgencia', 'dificuldade', 'interesse',
+    'horas_sono', 'horas_jejum', 'tempo_reacao_ms',
+    'target'
+]
+# Tipos estreitos no formato colunar: as categóricas e o target cabem em int8
+TIPOS = {c: np.int8 for c in COLUNAS}
+TIPOS.update(horas_sono=np.float32, horas_jejum=np.float32, tempo_reacao_ms=np.float32)
 
-for _ in range(NUM_SESSOES):
+def gerar_bloco(rng, n):
+    """n sessões sintéticas, como dict coluna -> array."""
     # --- 1. CONTEXTO ---
-    # 0=Seg, 6=Dom
-    dia_semana = random.randint(0, 6) 
-    hora_dia = random.randint(6, 23)
-    # 0=Casa, 1=Biblioteca, 2=Café/Rua
-    local = random.choice([0, 0, 0, 1, 2]) # Mais chance de ser Casa
-    # 0=Silêncio, 1=Moderado, 2=Barulho
-    ruido = random.randint(0, 2)
-    
+    dia_semana = rng.integers(0, 7, n) # 0=Seg, 6=Dom
+    hora_dia = rng.integers(6, 24, n)
+    # 0=Casa, 1=Biblioteca, 2=Café/Rua (mais chance de ser Casa)
+    local = rng.choice(np.array([0, 0, 0, 1, 2]), n)
+    ruido = rng.integers(0, 3, n) # 0=Silêncio, 1=Moderado, 2=Barulho
+
     # --- 2. TAREFA ---
-    # Categoria (Visual, Auditivo...)
-    categoria_tarefa = random.randint(0, 3) 
-    # Urgência: 1 (Longe) a 10 (É pra hoje!)
-    prazo_urgencia = random.randint(1, 10)
-    # Dificuldade: 1 (Fácil) a 5 (Hard)
-    dificuldade = random.randint(1, 5)
-    # Interesse: 1 (Chato) a 5 (Amo)
-    interesse = random.randint(1, 5)
-    
+    categoria_tarefa = rng.integers(0, 4, n)
+    prazo_urgencia = rng.integers(1, 11, n) # 1 (Longe) a 10 (É pra hoje!)
+    dificuldade = rng.integers(1, 6, n) # 1 (Fácil) a 5 (Hard)
+    interesse = rng.integers(1, 6, n) # 1 (Chato) a 5 (Amo)
+
     # --- 3. BIOLÓGICO ---
-    horas_sono = random.uniform(4.0, 10.0)
-    # Tempo desde última refeição (0h a 6h)
-    horas_jejum = random.uniform(0.5, 6.0)
-    
-    # Simulação do TESTE DE REFLEXO (PVT) em milissegundos
-    # Base: 250ms (rápido). Aumenta com sono ruim e jejum.
-    tempo_reacao_ms = 250 + ((8 - horas_sono) * 20) + (horas_jejum * 10)
-    tempo_reacao_ms += random.uniform(-20, 50) # Variação natural
-    
+    horas_sono = rng.uniform(4.0, 10.0, n)
+    horas_jejum = rng.uniform(0.5, 6.0, n) # Tempo desde a última refeição
+    # Teste de reflexo (PVT) em ms: base 250, piora com sono ruim e jejum
+    tempo_reacao_ms = 250 + (8 - horas_sono) * 20 + horas_jejum * 10 + rng.uniform(-20, 50, n)
+
     # --- CÁLCULO DO TEMPO IDEAL (A LÓGICA DO ESPECIALISTA) ---
-    foco_base = 50
-    
+    foco = np.full(n, 50.0)
     # Fatores que AUMENTAM o foco
-    if prazo_urgencia > 8: foco_base += 15 # O "Desespero" ajuda a focar
-    if interesse > 3: foco_base += 10      # Flow
-    if local == 1: foco_base += 10         # Biblioteca ajuda
-    
+    foco += 15 * (prazo_urgencia > 8) # O "Desespero" ajuda a focar
+    foco += 10 * (interesse > 3) # Flow
+    foco += 10 * (local == 1) # Biblioteca ajuda
     # Fatores que DIMINUEM o foco
-    if tempo_reacao_ms > 400: foco_base -= 20 # Cérebro lento
-    if ruido == 2: foco_base -= 15            # Barulho atrapalha
-    if horas_jejum > 4: foco_base -= 10       # Fome
-    if dificuldade > 4: foco_base -= 5        # Muito difícil cansa rápido
-    if dia_semana >= 5: foco_base -= 10       # Fim de semana (preguiça)
-    
-    # Limites
-    tempo_ideal = max(10, min(120, foco_base + random.uniform(-5, 5)))
-    
-    dados.append([
-        dia_semana, hora_dia, local, ruido, 
+    foco -= 20 * (tempo_reacao_ms > 400) # Cérebro lento
+    foco -= 15 * (ruido == 2) # Barulho atrapalha
+    foco -= 10 * (horas_jejum > 4) # Fome
+    foco -= 5 * (dificuldade > 4) # Muito difícil cansa rápido
+    foco -= 10 * (dia_semana >= 5) # Fim de semana (preguiça)
+    # Limites (e trunca como o int() da versão antiga)
+    target = np.clip(foco + rng.uniform(-5, 5, n), 10, 120).astype(np.int64)
+
+    return dict(zip(COLUNAS, (
+        dia_semana, hora_dia, local, ruido,
         categoria_tarefa, prazo_urgencia, dificuldade, interesse,
         horas_sono, horas_jejum, tempo_reacao_ms,
-        int(tempo_ideal)
-    ])
+        target
+    )))
 
-# Salvar
-colunas = [
-    'dia_semana', 'hora_dia', 'local', 'ruido',
-    'categoria_tarefa', 'prazo_urgencia', 'dificuldade', 'interesse',
-    'horas_sono', 'horas_jejum', 'tempo_reacao_ms', 
-    'target'
-]
-df = pd.DataFrame(dados, columns=colunas)
-df.to_csv('historico_estudo_v3.csv', index=False)
-print("✅ Dados V3 gerados! Agora rode o treino.")
\ No newline at end of file
+def gerar(linhas, semente=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera os blocos em sequência. Mesma semente e mesmo tamanho de bloco = mesmos dados."""
+    rng = np.random.default_rng(semente)
+    feitas = 0
+    while feitas < linhas:
+        n = min(tamanho_bloco, linhas - feitas)
+        yield gerar_bloco(rng, n)
+        feitas += n
+
+def escrever_csv(caminho, blocos):
+    with open(caminho, 'w', newline='') as f:
+        for i, bloco in enumerate(blocos):
+            # 4 casas bastam para horas e ms (o CSV antigo saía com repr completo)
+            pd.DataFrame(bloco, columns=COLUNAS).to_csv(f, header=(i == 0), index=False, float_format='%.4f')
+
+def escrever_colunas(caminho, linhas, blocos):
+    """Grava direto no formato colunar (um .npy por coluna, via memmap), bloco a bloco."""
+    with EscritorColunar(caminho, TIPOS, linhas) as escritor:
+        for bloco in blocos:
+            escritor.escrever(bloco)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o histórico sintético de sessões de estudo")
+    parser.add_argument("--linhas", type=int, default=NUM_SESSOES)
+    parser.add_argument("--semente", type=int, default=None, help="Semente do gerador (padrão: aleatória)")
+    parser.add_argument("--saida", default='historico_estudo_v3.csv', help=f"Arquivo .csv ou pasta {SUFIXO}")
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO, help="Linhas por bloco gravado")
+    args = parser.parse_args(argv)
+    if not args.saida.endswith(('.csv', SUFIXO)):
+        print(f"Erro: a saída deve terminar em .csv ou {SUFIXO}")
+        return 1
+
+    print(f"Gerando {args.linhas} sessões (V3.0)...")
+    t0 = time.perf_counter()
+    blocos = gerar(args.linhas, args.semente, args.bloco)
+    if args.saida.endswith(SUFIXO):
+        escrever_colunas(args.saida, args.linhas, blocos)
+    else:
+        escrever_csv(args.saida, blocos)
+    segundos = time.perf_counter() - t0
+    print(f"✅ Dados V3 gerados em {args.saida} ({args.linhas / segundos:,.0f} linhas/s). Agora rode o treino.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# intervalos.py
+# Índice em memória dos intervalos [inicio, fim) da agenda (em segundos, como inicio_ts/fim_ts).
+# Arrays ordenados pelo início + busca binária: "o que cruza 19h-20h de sexta?",
+# "esse horário está livre?" e "qual o dia mais cheio?" sem varrer a tabela.
+# Quem mantém o índice atualizado é o database.py (get_indice_agenda).
+import calendar
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from operator import itemgetter
+
+DIA_S = 86400
+# Até quantas mudanças por transação vale fazer insert/del direto no array
+MUDANCAS_UMA_A_UMA = 8
+_EPOCA = date(1970, 1, 1)
+
+def segundos(dt):
+    """datetime (sem fuso) -> segundos, na mesma escala do inicio_ts/fim_ts do banco"""
+    return calendar.timegm(dt.timetuple())
+
+def datetime_de(segundos):
+    return datetime(1970, 1, 1) + timedelta(seconds=segundos)
+
+class IndiceIntervalos:
+    """Intervalos (id, inicio, fim) ordenados por início, em três arrays paralelos.
+
+    Como os eventos podem se cruzar, "o que cruza [a, b)" procura os que começam em
+    [a - maior_duracao, b) e filtra pelo fim: a maior duração é o que limita a busca.
+    Inserir/remover é busca binária + memmove do array (rápido mesmo com 1M).
+    Thread-safe: o Streamlit lê de várias threads enquanto outra grava.
+    """
+
+    def __init__(self, linhas=()):
+        self._lock = threading.Lock()
+        self.ids = array('q')
+        self.inicios = array('q')
+        self.fins = array('q')
+        self.maior_duracao = 0
+        # Minutos por dia (dia = inicio // 86400; o evento conta todo no dia em que começa)
+        self._minutos_dia = defaultdict(int)
+        linhas = list(linhas)
+        if any(linhas[i][1] > linhas[i + 1][1] for i in range(len(linhas) - 1)):
+            linhas.sort(key=itemgetter(1))
+        # Um laço só, com os métodos em variáveis locais (com 1M de linhas faz diferença)
+        ids, inicios, fins = self.ids.append, self.inicios.append, self.fins.append
+        minutos_dia = self._minutos_dia
+        maior = 0
+        for id_, inicio, fim in linhas:
+            ids(id_)
+            inicios(inicio)
+            fins(fim)
+            duracao = fim - inicio
+            if duracao > maior:
+                maior = duracao
+            minutos_dia[inicio // DIA_S] += duracao // 60
+        self.maior_duracao = maior
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _contar(self, inicio, fim, sinal):
+        duracao = fim - inicio
+        if sinal > 0 and duracao > self.maior_duracao:
+            self.maior_duracao = duracao
+        dia = inicio // DIA_S
+        self._minutos_dia[dia] += sinal * (duracao // 60)
+        if sinal < 0 and self._minutos_dia[dia] <= 0:
+            del self._minutos_dia[dia]
+
+    def inserir(self, id_, inicio, fim):
+        with self._lock:
+            self._inserir(id_, inicio, fim)
+
+    def remover(self, id_, inicio):
+        """Remove pelo id (o início é para achar a posição). Retorna False se não achou."""
+        with self._lock:
+            return self._remover(id_, inicio)
+
+    def _posicao(self, id_, inicio):
+        i = bisect_left(self.inicios, inicio)
+        while i < len(self.inicios) and self.inicios[i] == inicio:
+            if self.ids[i] == id_:
+                return i
+            i += 1
+        return None
+
+    def _inserir(self, id_, inicio, fim):
+        i = bisect_right(self.inicios, inicio)
+        self.ids.insert(i, id_)
+        self.inicios.insert(i, inicio)
+        self.fins.insert(i, fim)
+        self._contar(inicio, fim, 1)
+
+    def _remover(self, id_, inicio):
+        i = self._posicao(id_, inicio)
+        if i is None:
+            return False
+        fim = self.fins[i]
+        del self.ids[i], self.inicios[i], self.fins[i]
+        self._contar(inicio, fim, -1)
+        return True
+
+    def aplicar(self, novos=(), removidos=()):
+        """Aplica de uma vez as mudanças de uma transação: linhas (id, inicio, fim).
+
+        Poucas mudanças: insert/del direto no array. Muitas (um plano inteiro): monta
+        os arrays de novo copiando fatias, O(n) em C, em vez de mover o array todo a
+        cada item.
+        """
+        with self._lock:
+            if len(novos) + len(removidos) <= MUDANCAS_UMA_A_UMA:
+                for id_, inicio, _ in removidos:
+                    self._remover(id_, inicio)
+                for linha in novos:
+                    self._inserir(*linha)
+                return
+            if removidos:
+                cortes = []
+                for id_, inicio, _ in removidos:
+                    i = self._posicao(id_, inicio)
+                    if i is not None:
+                        cortes.append(i)
+                        self._contar(inicio, self.fins[i], -1)
+                cortes.sort()
+                for nome in ("ids", "inicios", "fins"):
+                    antigo, novo, ant = getattr(self, nome), array('q'), 0
+                    for p in cortes:
+                        novo.extend(antigo[ant:p])
+                        ant = p + 1
+                    novo.extend(antigo[ant:])
+                    setattr(self, nome, novo)
+            if novos:
+                novos = sorted(novos, key=itemgetter(1))
+                posicoes = [bisect_right(self.inicios, inicio) for _, inicio, _ in novos]
+                for col, nome in enumerate(("ids", "inicios", "fins")):
+                    antigo, novo, ant = getattr(self, nome), array('q'), 0
+                    for p, linha in zip(posicoes, novos):
+                        novo.extend(antigo[ant:p])
+                        novo.append(linha[col])
+                        ant = p
+                    novo.extend(antigo[ant:])
+                    setattr(self, nome, novo)
+                for _, inicio, fim in novos:
+                    self._contar(inicio, fim, 1)
+
+    def _candidatos(self, inicio, fim):
+        """Posições dos eventos que podem cruzar [inicio, fim)."""
+        return (bisect_right(self.inicios, inicio - self.maior_duracao),
+                bisect_left(self.inicios, fim))
+
+    def sobrepostos(self, inicio, fim):
+        """(id, inicio, fim) dos eventos que cruzam [inicio, fim), em ordem de início."""
+        with self._lock:
+            i, j = self._candidatos(inicio, fim)
+            return [(self.ids[k], self.inicios[k], self.fins[k]) for k in range(i, j) if self.fins[k] > inicio]
+
+    def livre(self, inicio, fim):
+        with self._lock:
+            i, j = self._candidatos(inicio, fim)
+            return all(self.fins[k] <= inicio for k in range(i, j))
+
+    def primeiro_livre(self, desde, ate, duracao):
+        """Início do primeiro buraco de `duracao` segundos dentro de [desde, ate), ou None."""
+        with self._lock:
+            k = bisect_right(self.inicios, desde - self.maior_duracao)
+            cursor = desde
+            n = len(self.inicios)
+            while cursor + duracao <= ate:
+                # Eventos que começam antes do fim do bloco candidato empurram o cursor
+                if k < n and self.inicios[k] < cursor + duracao:
+                    cursor = max(cursor, self.fins[k])
+                    k += 1
+                    continue
+                return cursor
+            return None
+
+    def dia_mais_cheio(self, desde, ate):
+        """(data, minutos) do dia com mais minutos marcados em [desde, ate), ou None.
+
+        Usa o total por dia mantido nas inserções/remoções: custa O(dias do período).
+        """
+        with self._lock:
+            primeiro, ultimo = desde // DIA_S, (ate - 1) // DIA_S
+            if ultimo - primeiro + 1 > len(self._minutos_dia):
+                dias = (d for d in self._minutos_dia if primeiro <= d <= ultimo)
+            else:
+                dias = (d for d in range(primeiro, ultimo + 1) if d in self._minutos_dia)
+            melhor = max(dias, key=self._minutos_dia.__getitem__, default=None)
+            if melhor is None:
+                return None
+            return _EPOCA + timedelta(days=melhor), self._minutos_dia[melhor]
@@ -0,0 +1,38 @@
+# manutencao.py
+# Comandos de manutenção do banco. Uso:
+#   python manutencao.py verificar-rollups
+#   python manutencao.py reconstruir-rollups
+import argparse
+import sys
+
+import database
+
+def cmd_verificar_rollups(args):
+    diferencas = database.verificar_rollups()
+    if not diferencas:
+        print("✅ Rollups consistentes com a agenda.")
+        return 0
+    for tabela, chave, esperado, atual in diferencas:
+        print(f"❌ {tabela}[{chave}]: agenda={esperado} rollup={atual}")
+    print(f"{len(diferencas)} diferença(s). Rode 'python manutencao.py reconstruir-rollups'.")
+    return 1
+
+def cmd_reconstruir_rollups(args):
+    database.reconstruir_rollups()
+    print("✅ Rollups reconstruídos a partir da agenda.")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção do banco do Sentinela")
+    parser.add_argument("--db", default=database.DB_NAME, help="Arquivo do banco (padrão: %(default)s)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("verificar-rollups", help="Compara foco_por_tarefa/foco_por_dia com a agenda").set_defaults(func=cmd_verificar_rollups)
+    sub.add_parser("reconstruir-rollups", help="Recalcula os rollups do zero").set_defaults(func=cmd_reconstruir_rollups)
+    args = parser.parse_args(argv)
+
+    database.DB_NAME = args.db
+    database.inicializar_db()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# metricas.py
+# Camada leve de medição de tempo. Cada operação (função do database.py, comando SQL,
+# renderização do calendário, planejador, previsão da IA, figura do Plotly...) vira um
+# histograma em memória, de onde saem p50/p95/p99 (página Desempenho, em Configurações)
+# e o texto no formato do Prometheus.
+#
+# Desligada (o padrão), cada função medida custa só um teste de flag; os comandos SQL
+# nem passam pela camada (as conexões são as normais do sqlite3).
+# Liga com SENTINELA_METRICAS=1 ou metricas.ativar().
+#
+# Uso:
+#   @metricas.medido("planejador.gerar_cronograma_prova")
+#   def gerar_cronograma_prova(...): ...
+#
+#   with metricas.bloco("plotly.foco_por_tarefa"):
+#       fig = px.bar(...)
+#
+#   metricas.instrumentar_modulo(globals(), "db")   (no fim do módulo: todas as funções públicas)
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+ARQUIVO_PROMETHEUS = 'metricas.prom'
+PREFIXO_PROMETHEUS = 'sentinela'
+
+# Limites dos baldes (segundos): de 1 µs a ~4 min, 4 baldes por potência de 2 (~19% de
+# largura cada, é o erro máximo dos percentis). No Prometheus só saem as potências de 2.
+LIMITES = [1e-6 * 2 ** (i / 4) for i in range(4 * 28 + 1)]
+LIMITES_PROMETHEUS = LIMITES[::4]
+
+class Histograma:
+    """Contagens por balde + total, soma, mínimo, máximo e linhas (para SQL)."""
+
+    __slots__ = ("contagens", "total", "soma", "minimo", "maximo", "linhas")
+
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES) + 1) # O último é o +Inf
+        self.total = 0
+        self.soma = 0.0
+        self.minimo = float('inf')
+        self.maximo = 0.0
+        self.linhas = None
+
+    def observar(self, segundos, linhas=None):
+        self.contagens[bisect.bisect_left(LIMITES, segundos)] += 1
+        self.total += 1
+        self.soma += segundos
+        if segundos < self.minimo:
+            self.minimo = segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        if linhas is not None:
+            self.linhas = (self.linhas or 0) + linhas
+
+    def quantil(self, q):
+        """Percentil estimado (interpolação dentro do balde, como o histogram_quantile)."""
+        if not self.total:
+            return 0.0
+        alvo = q * self.total
+        acumulado = 0
+        for i, n in enumerate(self.contagens):
+            if n and acumulado + n >= alvo:
+                baixo = LIMITES[i - 1] if i > 0 else 0.0
+                alto = LIMITES[i] if i < len(LIMITES) else self.maximo
+                valor = baixo + (alto - baixo) * (alvo - acumulado) / n
+                return min(max(valor, self.minimo), self.maximo)
+            acumulado += n
+        return self.maximo
+
+# --- ESTADO ---
+
+_ativo = os.environ.get("SENTINELA_METRICAS", "") not in ("", "0")
+_histogramas = {}
+_lock = threading.Lock()
+
+def ativo():
+    return _ativo
+
+def ativar():
+    """Liga a medição. Os comandos SQL só são medidos em conexões abertas depois disso
+    (database.fechar_conexoes() renova as do pool)."""
+    global _ativo
+    _ativo = True
+
+def desativar():
+    global _ativo
+    _ativo = False
+
+def limpar():
+    with _lock:
+        _histogramas.clear()
+
+def registrar(nome, segundos, linhas=None):
+    """Uma observação da operação `nome` (se a medição estiver ligada)."""
+    if not _ativo:
+        return
+    with _lock:
+        histograma = _histogramas.get(nome)
+        if histograma is None:
+            histograma = _histogramas[nome] = Histograma()
+        histograma.observar(segundos, linhas)
+
+# --- PONTOS DE MEDIÇÃO ---
+
+def medido(nome):
+    """Decorador: mede cada chamada da função como a operação `nome`."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                registrar(nome, time.perf_counter() - t0)
+        return medida
+    return decorador
+
+_NULO = nullcontext()
+
+@contextmanager
+def _bloco_medido(nome):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nome, time.perf_counter() - t0)
+
+def bloco(nome):
+    """Context manager: mede o bloco como a operação `nome`. Desligado, não faz nada."""
+    return _bloco_medido(nome) if _ativo else _NULO
+
+def instrumentar_modulo(namespace, prefixo):
+    """Troca cada função pública do módulo (passar globals()) pela versão medida
+    "<prefixo>.<nome>". Ficam de fora geradores e funções já decoradas (ex.: os
+    @contextmanager), em que medir a chamada não mede o trabalho."""
+    modulo = namespace["__name__"]
+    for nome, funcao in list(namespace.items()):
+        if (nome.startswith("_") or not inspect.isfunction(funcao) or funcao.__module__ != modulo
+                or hasattr(funcao, "__wrapped__") or inspect.isgeneratorfunction(funcao)):
+            continue
+        namespace[nome] = medido(f"{prefixo}.{nome}")(funcao)
+
+# --- LEITURA ---
+
+def resumo():
+    """Uma linha por operação (dicts, tempos em segundos), da que mais somou tempo para a que menos."""
+    with _lock:
+        itens = [(nome, h) for nome, h in _histogramas.items()]
+        linhas = [{
+            "operacao": nome,
+            "chamadas": h.total,
+            "total": h.soma,
+            "media": h.soma / h.total,
+            "p50": h.quantil(0.50),
+            "p95": h.quantil(0.95),
+            "p99": h.quantil(0.99),
+            "max": h.maximo,
+            "linhas": h.linhas,
+        } for nome, h in itens]
+    return sorted(linhas, key=lambda l: -l["total"])
+
+def _rotulo(valor):
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def texto_prometheus():
+    """Todas as operações no formato de texto do Prometheus (histograma + contador de linhas)."""
+    metrica = f"{PREFIXO_PROMETHEUS}_operacao_segundos"
+    saida = [f"# HELP {metrica} Tempo de cada operação do app.", f"# TYPE {metrica} histogram"]
+    linhas_sql = []
+    with _lock:
+        for nome, h in sorted(_histogramas.items()):
+            rotulo = f'operacao="{_rotulo(nome)}"'
+            acumulado = 0
+            for i, limite in enumerate(LIMITES):
+                acumulado += h.contagens[i]
+                if i % 4 == 0:
+                    saida.append(f'{metrica}_bucket{{{rotulo},le="{limite:.6g}"}} {acumulado}')
+            saida.append(f'{metrica}_bucket{{{rotulo},le="+Inf"}} {h.total}')
+            saida.append(f"{metrica}_sum{{{rotulo}}} {h.soma:.9g}")
+            saida.append(f"{metrica}_count{{{rotulo}}} {h.total}")
+            if h.linhas is not None:
+                linhas_sql.append(f"{PREFIXO_PROMETHEUS}_linhas_total{{{rotulo}}} {h.linhas}")
+    if linhas_sql:
+        saida += [f"# HELP {PREFIXO_PROMETHEUS}_linhas_total Linhas devolvidas ou alteradas pelos comandos SQL.",
+                  f"# TYPE {PREFIXO_PROMETHEUS}_linhas_total counter", *linhas_sql]
+    return "\n".join(saida) + "\n"
+
+def exportar_prometheus(caminho=ARQUIVO_PROMETHEUS):
+    """Grava texto_prometheus() no arquivo (temporário + os.replace, para o coletor
+    nunca ler pela metade). Retorna o caminho."""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(texto_prometheus())
+    os.replace(temporario, caminho)
+    return caminho
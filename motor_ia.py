@@ -0,0 +1,445 @@
+# motor_ia.py
+# Roda a rede do Sentinela só com NumPy. O TensorFlow só é necessário para TREINAR;
+# para prever, exportamos pesos + parâmetros do MinMaxScaler num .npz pequeno.
+# Opcional: variantes TFLite da rede (int8 por faixa dinâmica e float16), servidas pelo
+# interpretador leve do LiteRT; o scaler continua vindo do .npz.
+#
+# Uso:
+#   python motor_ia.py exportar [--tflite]      (gera sentinela_brain_v3.npz [+ .tflite])
+#   python motor_ia.py paridade [--variante int8]  (compara com o Keras, precisa do TensorFlow)
+import argparse
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+import metricas
+from cache import CacheLRU
+
+ARQUIVO_MODELO = 'sentinela_brain_v3.h5'
+ARQUIVO_SCALER = 'meu_scaler_v3.pkl'
+ARQUIVO_NPZ = 'sentinela_brain_v3.npz'
+ARQUIVO_DADOS = 'historico_estudo_v3.csv'
+
+# Entradas da rede V3, na ordem do treino (é o que o app monta para prever)
+COLUNAS = [
+    'dia_semana', 'hora_dia', 'local', 'ruido',
+    'categoria_tarefa', 'prazo_urgencia', 'dificuldade', 'interesse',
+    'horas_sono', 'horas_jejum', 'tempo_reacao_ms',
+]
+
+# Diferença máxima aceita (em minutos de foco) entre o NumPy e o Keras
+TOLERANCIA_MINUTOS = 0.01
+
+# Variantes TFLite e a diferença máxima aceita de cada uma contra o Keras float32
+VARIANTES_TFLITE = ('int8', 'float16')
+TOLERANCIA_TFLITE_MINUTOS = {'int8': 1.0, 'float16': 0.25}
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+ATIVACOES = {
+    "relu": _relu,
+    "linear": lambda x: x,
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+}
+
+# --- EXPORTAÇÃO (.h5 + .pkl -> .npz) ---
+
+def ler_camadas_h5(caminho_h5):
+    """Lê as camadas Dense de um .h5 do Keras direto com h5py (sem importar TensorFlow).
+
+    Retorna lista de (kernel, bias, ativacao).
+    """
+    import h5py
+
+    camadas = []
+    with h5py.File(caminho_h5, 'r') as f:
+        config = json.loads(f.attrs['model_config'])
+        pesos = f['model_weights']
+        for camada in config['config']['layers']:
+            tipo = camada['class_name']
+            if tipo == 'InputLayer':
+                continue
+            if tipo != 'Dense':
+                raise ValueError(f"Camada não suportada pelo motor NumPy: {tipo}")
+            cfg = camada['config']
+            if cfg['activation'] not in ATIVACOES:
+                raise ValueError(f"Ativação não suportada: {cfg['activation']}")
+            grupo = pesos[cfg['name']]
+            nomes = [n.decode() if isinstance(n, bytes) else n for n in grupo.attrs['weight_names']]
+            kernel = next(grupo[n][()] for n in nomes if 'kernel' in n)
+            bias = next(grupo[n][()] for n in nomes if 'bias' in n)
+            camadas.append((kernel.astype(np.float32), bias.astype(np.float32), cfg['activation']))
+    return camadas
+
+def exportar(caminho_h5=ARQUIVO_MODELO, caminho_scaler=ARQUIVO_SCALER, destino=ARQUIVO_NPZ):
+    """Junta pesos da rede e o MinMaxScaler num único .npz."""
+    import joblib
+
+    camadas = ler_camadas_h5(caminho_h5)
+    scaler = joblib.load(caminho_scaler)
+    if scaler.n_features_in_ != camadas[0][0].shape[0]:
+        raise ValueError("O scaler e o modelo não têm o mesmo número de entradas")
+
+    arrays = {
+        "scaler_scale": scaler.scale_.astype(np.float32),
+        "scaler_min": scaler.min_.astype(np.float32),
+        "scaler_clip": np.array(getattr(scaler, 'clip', False)),
+        "scaler_range": np.array(scaler.feature_range, dtype=np.float32),
+        "ativacoes": np.array([a for _, _, a in camadas]),
+    }
+    nomes = getattr(scaler, 'feature_names_in_', None)
+    if nomes is not None:
+        arrays["colunas"] = np.array(list(nomes))
+    for i, (kernel, bias, _) in enumerate(camadas):
+        arrays[f"kernel_{i}"] = kernel
+        arrays[f"bias_{i}"] = bias
+    # Grava num temporário e troca de uma vez: quem estiver lendo nunca vê arquivo pela metade
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    with open(temporario, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(temporario, destino)
+    return destino
+
+# --- INFERÊNCIA ---
+
+class MotorIA:
+    """Scaler + rede densa em NumPy puro (float32, igual ao Keras)."""
+
+    def __init__(self, camadas, scale, minimo, clip=False, faixa=(0.0, 1.0), colunas=None):
+        self.camadas = camadas
+        self.scale = scale
+        self.minimo = minimo
+        self.clip = clip
+        self.faixa = faixa
+        self.colunas = colunas
+
+    @classmethod
+    def carregar(cls, caminho=ARQUIVO_NPZ):
+        with np.load(caminho) as dados:
+            ativacoes = [str(a) for a in dados["ativacoes"]]
+            camadas = [(dados[f"kernel_{i}"], dados[f"bias_{i}"], ATIVACOES[a]) for i, a in enumerate(ativacoes)]
+            colunas = [str(c) for c in dados["colunas"]] if "colunas" in dados else None
+            return cls(camadas, dados["scaler_scale"], dados["scaler_min"],
+                       clip=bool(dados["scaler_clip"]), faixa=tuple(dados["scaler_range"]), colunas=colunas)
+
+    @property
+    def n_entradas(self):
+        return self.scale.shape[0]
+
+    def normalizar(self, X):
+        """Igual ao MinMaxScaler.transform"""
+        X = np.asarray(X, dtype=np.float32) * self.scale + self.minimo
+        if self.clip:
+            np.clip(X, self.faixa[0], self.faixa[1], out=X)
+        return X
+
+    def prever_normalizado(self, X):
+        """Forward pass em entradas já normalizadas. Retorna array (n,) de minutos."""
+        x = np.asarray(X, dtype=np.float32)
+        for kernel, bias, ativacao in self.camadas:
+            x = ativacao(x @ kernel + bias)
+        return x[:, 0]
+
+    @metricas.medido("ia.motor.prever")
+    def prever(self, X):
+        """X: lista/array (n, 11) no formato do treino. Retorna minutos de foco (n,)."""
+        return self.prever_normalizado(self.normalizar(X))
+
+# --- TFLITE (opcional) ---
+
+def caminho_tflite(caminho_h5, variante):
+    """sentinela_brain_v3.h5 -> sentinela_brain_v3_int8.tflite"""
+    return f"{os.path.splitext(caminho_h5)[0]}_{variante}.tflite"
+
+def exportar_tflite(caminho_h5=ARQUIVO_MODELO, variante='int8', destino=None):
+    """Converte a rede do .h5 para TFLite (precisa do TensorFlow). Só a rede: a entrada
+    já vem normalizada pelo scaler do .npz."""
+    import tensorflow as tf
+
+    if variante not in VARIANTES_TFLITE:
+        raise ValueError(f"Variante desconhecida: {variante}")
+    destino = destino or caminho_tflite(caminho_h5, variante)
+    conversor = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(caminho_h5, compile=False))
+    # int8 por faixa dinâmica: pesos em int8, ativações em float
+    conversor.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variante == 'float16':
+        conversor.target_spec.supported_types = [tf.float16]
+    conteudo = conversor.convert()
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    with open(temporario, 'wb') as f:
+        f.write(conteudo)
+    os.replace(temporario, destino)
+    return destino
+
+def carregar_interpretador(caminho):
+    """Interpretador TFLite mais leve que estiver instalado (o do TensorFlow é o último recurso)."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=caminho, num_threads=1)
+
+class MotorTFLite:
+    """Mesma interface do MotorIA: normaliza com o scaler do .npz e roda a rede no TFLite."""
+
+    def __init__(self, caminho, base):
+        self.caminho = caminho
+        self.base = base
+        self.colunas = base.colunas
+        self._interpretador = carregar_interpretador(caminho)
+        self._entrada = self._interpretador.get_input_details()[0]['index']
+        self._saida = self._interpretador.get_output_details()[0]['index']
+        self._linhas = None
+        self._lock = threading.Lock() # O interpretador não pode ser usado por duas threads
+
+    @property
+    def n_entradas(self):
+        return self.base.n_entradas
+
+    def normalizar(self, X):
+        return self.base.normalizar(X)
+
+    def prever_normalizado(self, X):
+        x = np.ascontiguousarray(X, dtype=np.float32)
+        with self._lock:
+            if x.shape[0] != self._linhas:
+                self._interpretador.resize_tensor_input(self._entrada, x.shape)
+                self._interpretador.allocate_tensors()
+                self._linhas = x.shape[0]
+            self._interpretador.set_tensor(self._entrada, x)
+            self._interpretador.invoke()
+            return self._interpretador.get_tensor(self._saida)[:, 0].copy()
+
+    @metricas.medido("ia.tflite.prever")
+    def prever(self, X):
+        return self.prever_normalizado(self.normalizar(X))
+
+def _mtime(caminho):
+    try:
+        return os.stat(caminho).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def carregar_motor(caminho_npz=ARQUIVO_NPZ, caminho_h5=ARQUIVO_MODELO, caminho_scaler=ARQUIVO_SCALER):
+    """Carrega o .npz. Se ele não existir ou for mais velho que o .h5/.pkl, exporta de novo
+    (também sem TensorFlow)."""
+    t_npz = _mtime(caminho_npz)
+    fontes = [t for t in (_mtime(caminho_h5), _mtime(caminho_scaler)) if t is not None]
+    if t_npz is None or any(t > t_npz for t in fontes):
+        try:
+            exportar(caminho_h5, caminho_scaler, caminho_npz)
+        except Exception as e:
+            # Sem h5py/joblib no servidor: segue com o .npz que já existe
+            if t_npz is None:
+                raise
+            print(f"Aviso: não foi possível reexportar {caminho_npz} ({e}); usando o arquivo atual.")
+    return MotorIA.carregar(caminho_npz)
+
+# --- CACHE DE PREVISÕES ---
+
+# Colunas contínuas do vetor e o passo usado para arredondá-las na chave do cache:
+# 8 = horas_sono, 9 = horas_jejum (em horas), 10 = tempo_reacao_ms (em ms)
+PASSOS_QUANTIZACAO = {8: 0.25, 9: 0.25, 10: 5.0}
+TAMANHO_CACHE_PREVISOES = 4096
+
+class Previsor:
+    """Motor + cache LRU de previsões, compartilhado por todas as sessões do Streamlit.
+
+    A chave é o vetor de 11 features com sono, jejum e reflexo arredondados pelos
+    passos de PASSOS_QUANTIZACAO; a previsão é feita já no vetor arredondado, então
+    todo mundo que cai na mesma chave recebe o mesmo valor.
+    O motor é a versão "atual" do registro (registro_modelos.py). Se o manifesto mudar
+    (só um stat por chamada), a versão nova é carregada e trocada numa atribuição só:
+    previsões em andamento terminam com o motor antigo. Se a versão nova não carregar
+    (checksum errado, arquivo faltando, colunas diferentes de `colunas`), o motor antigo
+    continua no ar.
+    """
+
+    def __init__(self, manifesto=None, passos=None, tamanho_cache=TAMANHO_CACHE_PREVISOES, colunas=COLUNAS,
+                 variante=None):
+        import registro_modelos
+
+        self._registro = registro_modelos
+        self.manifesto = manifesto or registro_modelos.ARQUIVO_MANIFESTO
+        self.variante = variante # None = .npz; 'int8'/'float16' = TFLite da versão
+        self.passos = dict(PASSOS_QUANTIZACAO if passos is None else passos)
+        self.cache = CacheLRU(tamanho_cache)
+        self.recarregamentos = 0
+        self.versao = None
+        self.colunas = colunas
+        # (assinatura do manifesto, motor) trocados juntos numa atribuição só
+        self._estado = (None, None)
+        self._lock = threading.Lock()
+
+    @property
+    def motor(self):
+        return self._estado[1]
+
+    def _garantir_atualizado(self):
+        if self._registro.assinatura(self.manifesto) == self._estado[0]:
+            return self._estado
+        with self._lock:
+            assinatura = self._registro.assinatura(self.manifesto)
+            if assinatura != self._estado[0]:
+                try:
+                    pacote = self._registro.carregar_pacote(caminho=self.manifesto, variante=self.variante)
+                    if self.colunas is not None and pacote.colunas != list(self.colunas):
+                        raise ValueError(f"a versão {pacote.versao} tem outras entradas ({len(pacote.colunas)} colunas)")
+                except Exception as e:
+                    if self._estado[1] is None:
+                        raise
+                    print(f"Aviso: nova versão da IA não carregou ({e}); mantendo a {self.versao}.")
+                    self._estado = (assinatura, self._estado[1])
+                    return self._estado
+                # Assinatura de antes da leitura: se o manifesto mudar no meio, a próxima
+                # chamada recarrega. Sem manifesto, carregar_pacote acabou de criá-lo.
+                self._estado = (assinatura or self._registro.assinatura(self.manifesto), pacote.motor)
+                self.versao = pacote.versao
+                self.cache.limpar()
+                self.recarregamentos += 1
+            return self._estado
+
+    def quantizar(self, vetor):
+        chave = []
+        for i, valor in enumerate(vetor):
+            valor = float(valor)
+            passo = self.passos.get(i)
+            if passo:
+                # O round final tira o ruído de ponto flutuante (0.30000000000000004)
+                valor = round(round(valor / passo) * passo, 6)
+            chave.append(valor)
+        return tuple(chave)
+
+    @metricas.medido("ia.prever")
+    def prever(self, vetor):
+        """Minutos de foco previstos para um vetor de 11 features."""
+        assinatura, motor = self._garantir_atualizado()
+        chave = self.quantizar(vetor)
+        # A assinatura entra na chave: uma previsão calculada com o motor antigo
+        # (durante uma troca) nunca é servida depois da troca
+        chave_cache = (assinatura, chave)
+        return self.cache.get_ou_calcular(chave_cache, lambda: float(motor.prever([chave])[0]))
+
+    @metricas.medido("ia.recomendar")
+    def recomendar(self, *args, **kwargs):
+        """recomendar_horarios() usando o motor atual (mesmas regras de recarga do prever)"""
+        _, motor = self._garantir_atualizado()
+        return recomendar_horarios(motor, *args, **kwargs)
+
+    def estatisticas(self):
+        total = self.cache.acertos + self.cache.falhas
+        return {
+            "acertos": self.cache.acertos,
+            "falhas": self.cache.falhas,
+            "taxa_acerto": self.cache.acertos / total if total else 0.0,
+            "itens": len(self.cache),
+            "recarregamentos": self.recarregamentos,
+            "versao": self.versao,
+            "variante": self.variante or "npz",
+        }
+
+# --- RECOMENDAÇÃO DE HORÁRIOS ---
+
+DIAS_GRADE = tuple(range(7))          # 0=Seg ... 6=Dom
+HORAS_GRADE = tuple(range(6, 24))     # Mesma faixa do gerar_dados.py
+LOCAIS_GRADE = (0, 1, 2)              # Casa, Biblioteca, Café/Rua
+RUIDOS_GRADE = (0, 1, 2)              # Silencioso, Moderado, Barulhento
+
+def montar_grade(categoria, prazo, dificuldade, interesse, sono, jejum, reflexo,
+                 dias=DIAS_GRADE, horas=HORAS_GRADE, locais=LOCAIS_GRADE, ruidos=RUIDOS_GRADE):
+    """Matriz (n, 11) com todas as combinações dia × hora × local × ruído para a mesma tarefa e biologia."""
+    d, h, l, r = np.meshgrid(dias, horas, locais, ruidos, indexing='ij')
+    n = d.size
+    X = np.empty((n, 11), dtype=np.float32)
+    X[:, 0] = d.ravel()
+    X[:, 1] = h.ravel()
+    X[:, 2] = l.ravel()
+    X[:, 3] = r.ravel()
+    X[:, 4:] = (categoria, prazo, dificuldade, interesse, sono, jejum, reflexo)
+    return X
+
+def recomendar_horarios(motor, categoria, prazo, dificuldade, interesse, sono, jejum, reflexo, top=5, **grade):
+    """Pontua a grade inteira numa única passada da rede e devolve os `top` melhores horários.
+
+    Retorna lista de dicts {dia_semana, hora_dia, local, ruido, minutos}, do maior para o menor.
+    """
+    X = montar_grade(categoria, prazo, dificuldade, interesse, sono, jejum, reflexo, **grade)
+    minutos = motor.prever(X)
+    top = min(top, len(minutos))
+    # argpartition acha os top-k sem ordenar a grade toda; depois ordena só esses k
+    melhores = np.argpartition(-minutos, top - 1)[:top]
+    melhores = melhores[np.argsort(-minutos[melhores])]
+    return [{
+        "dia_semana": int(X[i, 0]),
+        "hora_dia": int(X[i, 1]),
+        "local": int(X[i, 2]),
+        "ruido": int(X[i, 3]),
+        "minutos": float(minutos[i]),
+    } for i in melhores]
+
+# --- PARIDADE COM O KERAS ---
+
+def verificar_paridade(X, caminho_npz=ARQUIVO_NPZ, caminho_h5=ARQUIVO_MODELO, caminho_scaler=ARQUIVO_SCALER,
+                       variante=None):
+    """Compara as previsões do motor NumPy (ou da variante TFLite) com o Keras.
+    Retorna a maior diferença em minutos."""
+    import joblib
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(caminho_h5, compile=False)
+    scaler = joblib.load(caminho_scaler)
+    X = np.asarray(X, dtype=np.float64)
+    esperado = model.predict(scaler.transform(X), verbose=0)[:, 0]
+    motor = MotorIA.carregar(caminho_npz)
+    if variante:
+        motor = MotorTFLite(caminho_tflite(caminho_h5, variante), motor)
+    obtido = motor.prever(X)
+    return float(np.max(np.abs(esperado - obtido)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Motor de inferência NumPy do Sentinela")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_exp = sub.add_parser("exportar", help="Gera o .npz a partir do .h5 e do scaler")
+    p_par = sub.add_parser("paridade", help="Confere o .npz contra o Keras nos dados de treino")
+    for p in (p_exp, p_par):
+        p.add_argument("--modelo", default=ARQUIVO_MODELO)
+        p.add_argument("--scaler", default=ARQUIVO_SCALER)
+        p.add_argument("--npz", default=ARQUIVO_NPZ)
+    p_exp.add_argument("--tflite", action="store_true", help="Gera também as variantes TFLite")
+    p_par.add_argument("--dados", default=ARQUIVO_DADOS)
+    p_par.add_argument("--variante", choices=VARIANTES_TFLITE, help="Confere o .tflite em vez do .npz")
+    p_par.add_argument("--tolerancia", type=float, help="Padrão: a da variante")
+    args = parser.parse_args(argv)
+
+    if args.comando == "exportar":
+        exportar(args.modelo, args.scaler, args.npz)
+        print(f"✅ Pesos exportados para {args.npz}")
+        for variante in VARIANTES_TFLITE if args.tflite else ():
+            print(f"✅ Variante {variante} em {exportar_tflite(args.modelo, variante)}")
+        return 0
+
+    import dados_colunares
+    X = dados_colunares.abrir(args.dados).para_dataframe().drop('target', axis=1)
+    tolerancia = args.tolerancia
+    if tolerancia is None:
+        tolerancia = TOLERANCIA_TFLITE_MINUTOS[args.variante] if args.variante else TOLERANCIA_MINUTOS
+    erro = verificar_paridade(X, args.npz, args.modelo, args.scaler, args.variante)
+    ok = erro <= tolerancia
+    nome = f"TFLite {args.variante}" if args.variante else "NumPy"
+    print(f"{'✅' if ok else '❌'} Maior diferença {nome} x Keras: {erro:.6f} min (tolerância {tolerancia})")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
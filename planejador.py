@@ -1,5 +1,23 @@
 # planejador.py
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import Counter
 from datetime import datetime, timedelta
+from math import ceil
+from operator import itemgetter
+
+import database
+import metricas
+from intervalos import datetime_de as _datetime, segundos as _segundos
+
+# Blocos de estudo: entre 30 min e 2h, em múltiplos de 15 min
+BLOCO_MIN = 30
+BLOCO_MAX = 120
+PASSO_BLOCO = 15
+# Janela do dia em que dá para marcar estudo; tenta primeiro a partir das 19h
+HORA_PREFERIDA = 19
+JANELA_INICIO = 8
+JANELA_FIM = 23
 
 def calcular_horas_necessarias(conhecimento_atual, dificuldade_materia, dias_restantes):
     # Gap: quanto falta aprender (0 a 10)
@@ -10,36 +28,290 @@ def calcular_horas_necessarias(conhecimento_atual, dificuldade_materia, dias_res
     teto = dias_restantes * 8
     return min(horas_totais, teto)
 
-def gerar_cronograma_prova(nome_meta, tarefa_base, data_prova, conhecimento, dificuldade, dias_semana_disponiveis):
-    hoje = datetime.now()
+class Ocupacao:
+    """Horários ocupados, como intervalos [inicio, fim) em segundos, ordenados e sem sobreposição.
+
+    Intervalos que se encostam ou se cruzam são fundidos na entrada, então
+    "está livre?" e "primeiro buraco de N minutos" são uma busca binária.
+    """
+
+    def __init__(self, intervalos=()):
+        self.inicios = []
+        self.fins = []
+        # Aceita (inicio, fim) ou as linhas de database.get_intervalos_ocupados (com meta_id no fim)
+        for inicio, fim, *_ in sorted(intervalos, key=itemgetter(0)):
+            if fim <= inicio:
+                continue
+            if self.fins and inicio <= self.fins[-1]:
+                self.fins[-1] = max(self.fins[-1], fim)
+            else:
+                self.inicios.append(inicio)
+                self.fins.append(fim)
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def livre(self, inicio, fim):
+        # Primeiro intervalo que termina depois de `inicio`: se ele começa antes de `fim`, bate
+        i = bisect_right(self.fins, inicio)
+        return i == len(self.inicios) or self.inicios[i] >= fim
+
+    def primeiro_livre(self, desde, ate, duracao):
+        """Início do primeiro buraco de `duracao` segundos dentro de [desde, ate), ou None."""
+        i = bisect_right(self.fins, desde)
+        cursor = desde
+        while cursor + duracao <= ate:
+            if i == len(self.inicios) or self.inicios[i] >= cursor + duracao:
+                return cursor
+            cursor = max(cursor, self.fins[i])
+            i += 1
+        return None
+
+    def ocupar(self, inicio, fim):
+        """Marca [inicio, fim) como ocupado, fundindo com os vizinhos que encostam."""
+        esq = bisect_left(self.fins, inicio)
+        dir_ = bisect_right(self.inicios, fim)
+        if esq < dir_:
+            inicio = min(inicio, self.inicios[esq])
+            fim = max(fim, self.fins[dir_ - 1])
+        self.inicios[esq:dir_] = [inicio]
+        self.fins[esq:dir_] = [fim]
+
+def dias_permitidos(primeiro, ultimo, dias_semana):
+    """Datas entre primeiro e ultimo (inclusive) cujo weekday está em dias_semana.
+
+    Pula direto de um dia permitido para o próximo (no máximo 6 dias de salto),
+    sem passar pelos dias do meio.
+    """
+    dias = sorted(set(dias_semana))
+    if not dias:
+        return
+    # salto[d] = quantos dias do weekday d até o próximo dia permitido (0 se d já é)
+    salto = [min((p - d) % 7 for p in dias) for d in range(7)]
+    dia = primeiro + timedelta(days=salto[primeiro.weekday()])
+    while dia <= ultimo:
+        yield dia
+        dia += timedelta(days=1)
+        dia += timedelta(days=salto[dia.weekday()])
+
+def _contar_dias(primeiro, ultimo, dias_semana):
+    """Quantos dias permitidos há entre primeiro e ultimo, sem iterar (semanas cheias + resto)."""
+    if ultimo < primeiro:
+        return 0
+    total = (ultimo - primeiro).days + 1
+    semanas, resto = divmod(total, 7)
+    dias = set(dias_semana)
+    sobra = sum(1 for k in range(resto) if (primeiro.weekday() + k) % 7 in dias)
+    return semanas * len(dias) + sobra
+
+def _tamanho_bloco(minutos_totais, n_dias):
+    """Duração dos blocos: divide o total pelos dias disponíveis, arredonda para 15 min e
+    limita entre 30 e 120. Se 2h por dia não bastarem, usa mais de um bloco por dia."""
+    blocos_por_dia = max(1, ceil(minutos_totais / (n_dias * BLOCO_MAX)))
+    por_bloco = ceil(minutos_totais / (n_dias * blocos_por_dia) / PASSO_BLOCO) * PASSO_BLOCO
+    return min(BLOCO_MAX, max(BLOCO_MIN, por_bloco)), blocos_por_dia
+
+def _encaixar(ocupacao, dia, duracao_min):
+    """Início (em segundos) de um bloco livre nesse dia: a partir das 19h e, se não couber,
+    o primeiro horário livre da janela do dia."""
+    base = _segundos(datetime.combine(dia, datetime.min.time()))
+    duracao = duracao_min * 60
+    fim_janela = base + JANELA_FIM * 3600
+    inicio = ocupacao.primeiro_livre(base + HORA_PREFERIDA * 3600, fim_janela, duracao)
+    if inicio is None:
+        inicio = ocupacao.primeiro_livre(base + JANELA_INICIO * 3600, base + HORA_PREFERIDA * 3600 + duracao, duracao)
+    return inicio
+
+def gerar_cronograma_prova(nome_meta, tarefa_base, data_prova, conhecimento, dificuldade, dias_semana_disponiveis,
+                           ocupados=(), hoje=None):
+    """Monta as sessões de estudo até a prova, sem bater com o que já está na agenda.
+
+    ocupados: intervalos (inicio_ts, fim_ts) em segundos já ocupados
+    (as linhas de database.get_intervalos_ocupados servem direto).
+    Retorna (True, lista de sessões) ou (False, mensagem de erro).
+    """
+    hoje = hoje or datetime.now()
     dias_restantes = (data_prova - hoje).days
-    
+
     if dias_restantes <= 0:
         return False, "A data deve ser no futuro!"
+    if not dias_semana_disponiveis:
+        return False, "Escolha pelo menos um dia da semana!"
 
     horas_totais = calcular_horas_necessarias(conhecimento, dificuldade, dias_restantes)
-    
+    minutos_totais = int(round(horas_totais * 60))
+
+    primeiro = (hoje + timedelta(days=1)).date() # Começa amanhã
+    ultimo = (data_prova - timedelta(days=1)).date() # Até a véspera
+    n_dias = _contar_dias(primeiro, ultimo, dias_semana_disponiveis)
+    if n_dias == 0 or minutos_totais <= 0:
+        return True, []
+    duracao_bloco, blocos_por_dia = _tamanho_bloco(minutos_totais, n_dias)
+
+    ocupacao = ocupados if isinstance(ocupados, Ocupacao) else Ocupacao(ocupados)
     cronograma = []
-    cursor = hoje + timedelta(days=1) # Começa amanhã
-    horas_agendadas = 0
-    
-    while horas_agendadas < horas_totais and cursor < data_prova:
-        # Se o dia da semana está na lista permitida (0=Seg, 6=Dom)
-        if cursor.weekday() in dias_semana_disponiveis:
-            # Define duração do bloco (entre 30min e 2h)
-            duracao_min = 60 # Padrão 1h
-            
-            inicio = cursor.replace(hour=19, minute=0, second=0) # Padrão 19h
-            fim = inicio + timedelta(minutes=duracao_min)
-            
+    falta = minutos_totais
+    for dia in dias_permitidos(primeiro, ultimo, dias_semana_disponiveis):
+        for _ in range(blocos_por_dia):
+            # O último bloco leva só o que falta (mas nunca menos de 30 min)
+            duracao_min = max(BLOCO_MIN, min(duracao_bloco, falta))
+            inicio = _encaixar(ocupacao, dia, duracao_min)
+            if inicio is None:
+                break
+            fim = inicio + duracao_min * 60
+            ocupacao.ocupar(inicio, fim)
             cronograma.append({
                 "tarefa": f"{tarefa_base} (Rev: {nome_meta})",
-                "inicio": inicio.isoformat(),
-                "fim": fim.isoformat(),
+                "inicio": _datetime(inicio).isoformat(),
+                "fim": _datetime(fim).isoformat(),
                 "minutos": duracao_min
             })
-            horas_agendadas += (duracao_min / 60)
-            
-        cursor += timedelta(days=1)
+            falta -= duracao_min
+            if falta <= 0:
+                return True, cronograma
+
+    if not cronograma:
+        return False, "Não sobrou horário livre nos dias escolhidos até a prova."
+    return True, cronograma
+
+def gerar_roteiro_estudo(minutos_totais):
+    """
+    Quebra o tempo total em blocos de foco e pausa.
+    Retorna uma lista de strings HTML para exibir.
+    """
+    roteiro = []
+    
+    # Se for pouco tempo (menos de 30min), é um tiro só
+    if minutos_totais <= 30:
+        roteiro.append(f"🔥 {minutos_totais} min Foco Total")
+    
+    # Se for tempo médio (entre 30 e 60), quebra em 2
+    elif minutos_totais <= 60:
+        bloco1 = int(minutos_totais * 0.6) # 60% do tempo
+        pausa = 5
+        bloco2 = minutos_totais - bloco1 - pausa
         
-    return True, cronograma
\ No newline at end of file
+        roteiro.append(f"🔥 {bloco1} min Foco Intenso")
+        roteiro.append(f"☕ {pausa} min Descanso")
+        roteiro.append(f"🔥 {bloco2} min Foco Final")
+        
+    # Se for muito tempo (> 60), Pomodoro Clássico Adaptado
+    else:
+        # Tenta fazer blocos de 25 a 30 min
+        blocos = minutos_totais // 30
+        resto = minutos_totais % 30
+        
+        for i in range(blocos):
+            roteiro.append(f"🔥 25 min Foco")
+            roteiro.append(f"☕ 5 min Pausa")
+        
+        if resto > 0:
+            roteiro.append(f"🔥 {resto} min Fechamento")
+            
+    return roteiro
+
+# --- VÁRIAS METAS AO MESMO TEMPO ---
+# Escalonador por prazo (EDF: earliest deadline first). Dia a dia, as metas com prazo
+# mais perto escolhem horário primeiro, cada uma com no máximo um bloco por dia.
+# Como uma meta só disputa tempo com as de prazo MENOR que o dela, mudar uma meta
+# só muda o plano dela e das que vencem depois: as de antes ficam como estão.
+
+MINUTOS_POR_DIA = 240 # Teto de estudo planejado por dia, somando todas as metas
+TODOS_OS_DIAS = tuple(range(7))
+
+def planejar_metas(metas, dias_semana_disponiveis=TODOS_OS_DIAS, ocupados=(), hoje=None,
+                   minutos_por_dia=MINUTOS_POR_DIA):
+    """Distribui as horas de várias metas pelos dias livres, por ordem de prazo.
+
+    metas: dicts no formato de database.get_metas_ativas. Cada meta só recebe sessões
+    nos dias_semana dela; dias_semana_disponiveis vale para as que não têm os dias.
+    ocupados: linhas (inicio_ts, fim_ts, meta_id) já ocupadas; as que têm meta_id
+    (sessões de outras metas) também contam no teto de minutos do dia.
+    Retorna ({meta_id: sessões}, {meta_id: minutos que não couberam até o prazo}).
+    """
+    hoje = hoje or datetime.now()
+    ocupacao = Ocupacao(ocupados)
+    carga = Counter()
+    for inicio, fim, *meta_id in ocupados:
+        if meta_id and meta_id[0] is not None:
+            carga[_datetime(inicio).date()] += (fim - inicio) // 60
+
+    planos = {m['id']: [] for m in metas}
+    restante, titulo, dias_meta = {}, {}, {}
+    fila = [] # (prazo, id)
+    for m in metas:
+        falta = int(round((m['total_horas_estimadas'] or 0) * 60 - (m['minutos_feitos'] or 0)))
+        dias = frozenset(m.get('dias_semana') or dias_semana_disponiveis)
+        if falta > 0:
+            restante[m['id']] = falta
+            titulo[m['id']] = f"{m['tarefa_associada']} (Rev: {m['nome_meta']})"
+            dias_meta[m['id']] = dias
+            fila.append((datetime.fromisoformat(m['data_alvo']).date(), m['id']))
+    heapq.heapify(fila)
+    if not fila:
+        return planos, {}
+
+    faltando = {}
+    ultimo = max(prazo for prazo, _ in fila) - timedelta(days=1)
+    # Passa pelos dias de qualquer meta; em cada um, só disputam as metas daquele weekday
+    for dia in dias_permitidos((hoje + timedelta(days=1)).date(), ultimo, frozenset().union(*dias_meta.values())):
+        # Prazo chegou: o que sobrou não cabe mais
+        while fila and fila[0][0] <= dia:
+            _, meta_id = heapq.heappop(fila)
+            faltando[meta_id] = restante[meta_id]
+        if not fila:
+            break
+        livre_dia = minutos_por_dia - carga[dia]
+        adiadas = []
+        while fila and livre_dia >= BLOCO_MIN:
+            prazo, meta_id = heapq.heappop(fila)
+            if dia.weekday() not in dias_meta[meta_id]:
+                adiadas.append((prazo, meta_id))
+                continue
+            duracao_min = max(BLOCO_MIN, min(BLOCO_MAX, livre_dia, restante[meta_id]))
+            inicio = _encaixar(ocupacao, dia, duracao_min)
+            if inicio is None: # Dia sem buraco desse tamanho
+                adiadas.append((prazo, meta_id))
+                break
+            fim = inicio + duracao_min * 60
+            ocupacao.ocupar(inicio, fim)
+            planos[meta_id].append({
+                "tarefa": titulo[meta_id],
+                "inicio": _datetime(inicio).isoformat(),
+                "fim": _datetime(fim).isoformat(),
+                "minutos": duracao_min
+            })
+            livre_dia -= duracao_min
+            restante[meta_id] -= duracao_min
+            if restante[meta_id] > 0:
+                adiadas.append((prazo, meta_id)) # Volta para a fila só amanhã
+        for item in adiadas:
+            heapq.heappush(fila, item)
+
+    for _, meta_id in fila:
+        faltando[meta_id] = restante[meta_id]
+    return planos, faltando
+
+def replanejar_metas(user_id, dias_semana_disponiveis=TODOS_OS_DIAS, desde_prazo=None, hoje=None,
+                     minutos_por_dia=MINUTOS_POR_DIA):
+    """Refaz as sessões pendentes das metas ativas com prazo a partir de desde_prazo
+    (todas, se None) e grava tudo numa transação.
+
+    Ao criar, mudar ou apagar uma meta, passe o prazo dela (o menor entre o antigo
+    e o novo): só ela e as que vencem depois são mexidas. Cada meta usa os dias da
+    semana guardados nela; dias_semana_disponiveis só vale para as que não têm.
+    Retorna o mesmo par de planejar_metas.
+    """
+    hoje = hoje or datetime.now()
+    metas = database.get_metas_ativas(user_id, hoje)
+    if desde_prazo is not None:
+        metas = [m for m in metas if datetime.fromisoformat(m['data_alvo']) >= desde_prazo]
+    if not metas:
+        return {}, {}
+    fim = max(datetime.fromisoformat(m['data_alvo']) for m in metas)
+    ocupados = database.get_intervalos_ocupados(user_id, hoje, fim, excluir_metas=[m['id'] for m in metas])
+    planos, faltando = planejar_metas(metas, dias_semana_disponiveis, ocupados, hoje, minutos_por_dia)
+    database.substituir_planos(user_id, planos)
+    return planos, faltando
+
+metricas.instrumentar_modulo(globals(), "planejador")
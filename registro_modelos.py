@@ -0,0 +1,270 @@
+# registro_modelos.py
+# Registro das versões da IA. O manifesto (modelos.json) guarda, para cada versão, os
+# arquivos (.h5 do Keras, .pkl do scaler e o .npz do motor NumPy, que junta rede e
+# scaler num pacote só; opcionalmente os .tflite int8/float16), as colunas de entrada
+# e o sha256 de cada arquivo; e qual versão está no ar ("atual").
+# Os arquivos de uma versão nunca são regravados: versão nova = pasta nova em modelos/.
+# Pôr outra versão no ar = regravar o manifesto (temporário + os.replace). O Previsor
+# do app só dá um stat no manifesto a cada previsão e recarrega quando ele muda.
+#
+# Uso:
+#   python registro_modelos.py listar
+#   python registro_modelos.py verificar
+#   python registro_modelos.py ativar v1
+#   python registro_modelos.py registrar v3-meu --modelo x.h5 --scaler x.pkl [--tflite]
+#   python registro_modelos.py tflite v3           (gera os .tflite de uma versão já registrada)
+import argparse
+import hashlib
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+import motor_ia
+
+try:
+    import fcntl
+except ImportError: # Windows: sem trava entre processos
+    fcntl = None
+
+ARQUIVO_MANIFESTO = 'modelos.json'
+PASTA_MODELOS = 'modelos'
+FORMATO = 1
+
+# Versões de antes do registro, com os arquivos soltos na raiz
+LEGADO = {
+    "v1": ("sentinela_brain.h5", "meu_scaler.pkl", "sentinela_brain.npz"),
+    "v3": (motor_ia.ARQUIVO_MODELO, motor_ia.ARQUIVO_SCALER, motor_ia.ARQUIVO_NPZ),
+}
+
+def sha256(caminho):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def assinatura(caminho=ARQUIVO_MANIFESTO):
+    """O que o Previsor compara a cada previsão: um stat só, sem abrir o arquivo.
+    O inode entra porque o manifesto é trocado com os.replace."""
+    try:
+        st = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+@contextmanager
+def _travado(caminho):
+    """Um escritor do manifesto por vez (treino e retreino podem registrar juntos)."""
+    if fcntl is None:
+        yield
+        return
+    with open(caminho + '.lock', 'w') as trava:
+        fcntl.flock(trava, fcntl.LOCK_EX)
+        yield
+
+def _gravar(manifesto, caminho):
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+def _entrada(modelo, scaler, npz, origem):
+    """Dados de uma versão no manifesto. As colunas vêm do próprio .npz."""
+    motor = motor_ia.MotorIA.carregar(npz)
+    return {
+        "modelo": modelo,
+        "scaler": scaler,
+        "npz": npz,
+        "colunas": motor.colunas or [f"x{i}" for i in range(motor.n_entradas)],
+        "sha256": {"modelo": sha256(modelo), "scaler": sha256(scaler), "npz": sha256(npz)},
+        "criado_em": datetime.now().replace(microsecond=0).isoformat(),
+        "origem": origem,
+    }
+
+def _adicionar_tflite(entrada, variantes):
+    """Exporta as variantes TFLite que faltam (ao lado do .h5) e põe na entrada."""
+    for variante in variantes:
+        chave = f"tflite_{variante}"
+        if chave in entrada:
+            continue
+        arquivo = motor_ia.caminho_tflite(entrada["modelo"], variante)
+        if not os.path.exists(arquivo):
+            motor_ia.exportar_tflite(entrada["modelo"], variante, arquivo)
+        entrada[chave] = arquivo
+        entrada["sha256"][chave] = sha256(arquivo)
+    return entrada
+
+def _manifesto_legado():
+    """Manifesto inicial com as versões antigas que existirem na pasta (v3 no ar)."""
+    versoes = {}
+    for versao, (modelo, scaler, npz) in LEGADO.items():
+        if not (os.path.exists(modelo) and os.path.exists(scaler)):
+            continue
+        if not os.path.exists(npz):
+            motor_ia.exportar(modelo, scaler, npz)
+        variantes = [v for v in motor_ia.VARIANTES_TFLITE if os.path.exists(motor_ia.caminho_tflite(modelo, v))]
+        versoes[versao] = _adicionar_tflite(_entrada(modelo, scaler, npz, "legado"), variantes)
+    if not versoes:
+        raise FileNotFoundError("Nenhum modelo encontrado para montar o registro")
+    return {"formato": FORMATO, "atual": max(versoes), "versoes": versoes}
+
+def _ler(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        manifesto = json.load(f)
+    if manifesto.get("formato") != FORMATO:
+        raise ValueError(f"Formato de manifesto desconhecido em {caminho}")
+    return manifesto
+
+def ler_manifesto(caminho=ARQUIVO_MANIFESTO):
+    """Lê o manifesto. Se ele ainda não existir, cria a partir dos arquivos antigos."""
+    if not os.path.exists(caminho):
+        with _travado(caminho):
+            if not os.path.exists(caminho):
+                _gravar(_manifesto_legado(), caminho)
+    return _ler(caminho)
+
+def pasta_versao(versao):
+    """Pasta (nova) para os arquivos de uma versão."""
+    pasta = os.path.join(PASTA_MODELOS, versao)
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+def registrar(versao, modelo, scaler, npz=None, origem="", ativar=True, caminho=ARQUIVO_MANIFESTO, variantes=()):
+    """Adiciona uma versão (e põe no ar, se ativar). Sem npz, exporta ao lado do .h5.
+    `variantes`: TFLite a gerar junto (ex.: motor_ia.VARIANTES_TFLITE; precisa do TensorFlow)."""
+    if npz is None:
+        npz = os.path.splitext(modelo)[0] + '.npz'
+        motor_ia.exportar(modelo, scaler, npz)
+    entrada = _adicionar_tflite(_entrada(modelo, scaler, npz, origem), variantes)
+    ler_manifesto(caminho) # Cria se não existir (fora da trava, que não é reentrante)
+    with _travado(caminho):
+        manifesto = _ler(caminho) # Relido já com a trava: outro processo pode ter registrado
+        if versao in manifesto["versoes"]:
+            raise ValueError(f"A versão {versao} já está registrada")
+        manifesto["versoes"][versao] = entrada
+        if ativar:
+            manifesto["atual"] = versao
+        _gravar(manifesto, caminho)
+    return entrada
+
+def adicionar_tflite(versao, variantes=motor_ia.VARIANTES_TFLITE, caminho=ARQUIVO_MANIFESTO):
+    """Gera as variantes TFLite de uma versão já registrada. Os arquivos antigos não mudam."""
+    info = ler_manifesto(caminho)["versoes"][versao]
+    _adicionar_tflite(info, variantes) # Exporta fora da trava (é a parte demorada)
+    with _travado(caminho):
+        manifesto = _ler(caminho)
+        entrada = manifesto["versoes"][versao]
+        for chave in info["sha256"]:
+            if chave.startswith("tflite_"):
+                entrada[chave] = info[chave]
+                entrada["sha256"][chave] = info["sha256"][chave]
+        _gravar(manifesto, caminho)
+
+def ativar(versao, caminho=ARQUIVO_MANIFESTO):
+    ler_manifesto(caminho)
+    with _travado(caminho):
+        manifesto = _ler(caminho)
+        if versao not in manifesto["versoes"]:
+            raise KeyError(f"Versão desconhecida: {versao}")
+        manifesto["atual"] = versao
+        _gravar(manifesto, caminho)
+
+def verificar(caminho=ARQUIVO_MANIFESTO):
+    """Confere arquivos e checksums de todas as versões. Retorna a lista de problemas."""
+    problemas = []
+    for versao, info in ler_manifesto(caminho)["versoes"].items():
+        for tipo, esperado in info["sha256"].items():
+            arquivo = info[tipo]
+            if not os.path.exists(arquivo):
+                problemas.append(f"{versao}: {arquivo} não existe")
+            elif sha256(arquivo) != esperado:
+                problemas.append(f"{versao}: {arquivo} não bate com o checksum do manifesto")
+    return problemas
+
+class Pacote:
+    """Uma versão carregada: motor (rede + scaler do .npz, ou a rede em TFLite) e os dados do manifesto."""
+
+    def __init__(self, versao, info, motor, variante=None):
+        self.versao = versao
+        self.info = info
+        self.motor = motor
+        self.variante = variante
+
+    @property
+    def colunas(self):
+        return self.info["colunas"]
+
+def _conferir(info, chave, versao):
+    if sha256(info[chave]) != info["sha256"][chave]:
+        raise ValueError(f"{info[chave]} não bate com o checksum da versão {versao}")
+
+def carregar_pacote(versao=None, caminho=ARQUIVO_MANIFESTO, variante=None):
+    """Carrega a versão pedida (padrão: a atual) conferindo checksum e colunas do .npz.
+    Com `variante` ('int8'/'float16'), a rede roda no TFLite; se a versão não tiver essa
+    variante, fica no .npz (com aviso)."""
+    manifesto = ler_manifesto(caminho)
+    versao = versao or manifesto["atual"]
+    info = manifesto["versoes"][versao]
+    _conferir(info, "npz", versao)
+    motor = motor_ia.MotorIA.carregar(info["npz"])
+    if motor.colunas is not None and motor.colunas != info["colunas"]:
+        raise ValueError(f"As colunas de {info['npz']} não batem com o manifesto")
+    if variante and f"tflite_{variante}" not in info:
+        print(f"Aviso: a versão {versao} não tem a variante {variante}; usando o .npz.")
+        variante = None
+    if variante:
+        _conferir(info, f"tflite_{variante}", versao)
+        motor = motor_ia.MotorTFLite(info[f"tflite_{variante}"], motor)
+    return Pacote(versao, info, motor, variante)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registro de versões da IA do Sentinela")
+    parser.add_argument("--manifesto", default=ARQUIVO_MANIFESTO)
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("listar", help="Versões registradas")
+    sub.add_parser("verificar", help="Confere arquivos e checksums")
+    p_ativ = sub.add_parser("ativar", help="Põe uma versão no ar")
+    p_ativ.add_argument("versao")
+    p_reg = sub.add_parser("registrar", help="Registra .h5 + .pkl como versão nova")
+    p_reg.add_argument("versao")
+    p_reg.add_argument("--modelo", required=True)
+    p_reg.add_argument("--scaler", required=True)
+    p_reg.add_argument("--npz", help="Padrão: exporta ao lado do .h5")
+    p_reg.add_argument("--sem-ativar", action="store_true")
+    p_reg.add_argument("--tflite", action="store_true", help="Gera também as variantes TFLite")
+    p_tfl = sub.add_parser("tflite", help="Gera as variantes TFLite de uma versão registrada")
+    p_tfl.add_argument("versao")
+    args = parser.parse_args(argv)
+
+    if args.comando == "listar":
+        manifesto = ler_manifesto(args.manifesto)
+        for versao, info in manifesto["versoes"].items():
+            marca = "*" if versao == manifesto["atual"] else " "
+            tflite = ",".join(c[len("tflite_"):] for c in info["sha256"] if c.startswith("tflite_")) or "-"
+            print(f"{marca} {versao:<24} {len(info['colunas']):>2} entradas  tflite: {tflite:<13} "
+                  f"{info['criado_em']}  {info['origem']}")
+        return 0
+    if args.comando == "verificar":
+        problemas = verificar(args.manifesto)
+        for p in problemas:
+            print(f"❌ {p}")
+        if not problemas:
+            print("✅ Todos os arquivos batem com o manifesto.")
+        return 1 if problemas else 0
+    if args.comando == "ativar":
+        ativar(args.versao, args.manifesto)
+        print(f"✅ Versão {args.versao} no ar.")
+        return 0
+    if args.comando == "tflite":
+        adicionar_tflite(args.versao, caminho=args.manifesto)
+        print(f"✅ Variantes TFLite da versão {args.versao} registradas.")
+        return 0
+    variantes = motor_ia.VARIANTES_TFLITE if args.tflite else ()
+    registrar(args.versao, args.modelo, args.scaler, args.npz, "manual", not args.sem_ativar, args.manifesto, variantes)
+    print(f"✅ Versão {args.versao} registrada.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# relogio.py
+# Relógio do Cronômetro que conta no NAVEGADOR.
+# O servidor só manda quantos segundos já passaram quando a página é desenhada
+# (início, pausa, volta, fim); daí em diante o JavaScript atualiza o número sozinho,
+# sem rerun do script a cada segundo.
+import html as html_lib
+import json
+
+def formatar_mmss(segundos):
+    segundos = max(0, int(segundos))
+    return f"{segundos // 60:02d}:{segundos % 60:02d}"
+
+def html_relogio(segundos_base, rodando, cor, titulo, subtitulo="", padding=30, fundo="#080808"):
+    """HTML + JS do relógio.
+
+    segundos_base: tempo útil já decorrido no momento do render.
+    rodando: se False (pausa), o número fica parado.
+    A contagem usa performance.now() do próprio navegador a partir do render,
+    então diferença de relógio entre servidor e cliente não importa.
+    """
+    titulo = html_lib.escape(titulo)
+    subtitulo = html_lib.escape(subtitulo)
+    sub_html = f'<h2 style="color: #fff; margin:10px 0;">{subtitulo}</h2>' if subtitulo else ''
+    return f"""
+    <div style="text-align: center; padding: {padding}px; background: {fundo}; border: 2px solid {cor}; border-radius: 20px; box-shadow: 0 0 40px {cor}40; font-family: sans-serif;">
+        <h3 style="color: {cor}; margin:0; letter-spacing: 3px; text-transform: uppercase;">{titulo}</h3>
+        {sub_html}
+        <h1 id="relogio" style="font-size: 100px; color: {cor}; margin: 0; font-family: monospace; text-shadow: 0 0 20px {cor};">{formatar_mmss(segundos_base)}</h1>
+    </div>
+    <script>
+        const base = {json.dumps(float(segundos_base))};
+        const rodando = {json.dumps(bool(rodando))};
+        const t0 = performance.now();
+        const el = document.getElementById("relogio");
+        function pad(n) {{ return String(n).padStart(2, "0"); }}
+        function tick() {{
+            const s = Math.max(0, Math.floor(base + (performance.now() - t0) / 1000));
+            el.textContent = pad(Math.floor(s / 60)) + ":" + pad(s % 60);
+        }}
+        if (rodando) {{ tick(); setInterval(tick, 250); }}
+    </script>
+    """
@@ -0,0 +1,235 @@
+# retreino.py
+# Retreino incremental da IA com as sessões reais (cronômetro iniciado depois de uma
+# previsão da "Nova Sessão"). Roda num processo separado: o app só dispara o processo,
+# então o treino nunca disputa CPU/GIL com as páginas do Streamlit.
+#
+# Cada rodada:
+#   1. lê as sessões concluídas com contexto_ia depois da marca d'água (tabela marca_agua);
+#   2. continua o treino da versão no ar (o .h5 dela) a partir dos pesos, com taxa de
+#      aprendizado baixa e um pouco do histórico sintético misturado (para não esquecer).
+#      ~20% das sessões (escolhidas pelo id) ficam de fora, para a comparação do passo 6;
+#   3. anota na marca_agua a versão nova ("<versão>-r<último id>") e até que sessão ela vai;
+#   4. grava e registra a versão (registro_modelos.py, sem pôr no ar), sem transação aberta
+#      no banco (gravar os arquivos leva segundos e o app não pode ficar esperando para escrever);
+#   5. se o app usa uma variante TFLite (SENTINELA_VARIANTE_IA), gera só essa para a versão;
+#   6. põe a versão no ar só se ela errar menos que a atual nas sessões que ficaram de fora;
+#   7. avança a marca d'água (e limpa a anotação do passo 3) numa transação curta: cada
+#      sessão entra em um retreino só.
+# Se o processo cair entre 3 e 7, a próxima rodada pega a versão anotada e as mesmas
+# sessões (nem uma a mais): treina de novo se ela não chegou a ser registrada, ou só
+# refaz os passos 5 a 7.
+# O Previsor do app percebe o manifesto novo pelo mtime e recarrega sozinho.
+#
+# Uso:
+#   python retreino.py                  (fica rodando, uma rodada a cada --intervalo segundos)
+#   python retreino.py --uma-vez
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import database
+from dependencias import np, pd, motor_ia, registro_modelos
+
+try:
+    import fcntl
+except ImportError: # Windows: sem trava, cuidado para não abrir dois
+    fcntl = None
+
+PROCESSO = 'retreino' # Nome na tabela marca_agua
+ARQUIVO_TRAVA = 'retreino.lock'
+ARQUIVO_LOG = 'retreino.log'
+
+INTERVALO_S = 600
+MIN_SESSOES = 20 # Abaixo disso espera juntar mais
+LIMITE_POR_RODADA = 5000
+MIN_MINUTOS = 5 # Sessões mais curtas foram cliques por engano
+LIMITES_TARGET = (10, 120) # Mesma faixa do gerar_dados.py
+EPOCAS = 5
+BATCH = 32
+TAXA_APRENDIZADO = 1e-4
+REPLAY = 4 # Linhas do histórico sintético por sessão real
+PERCENTUAL_VALIDACAO = 20 # Sessões fora do ajuste, só para comparar a versão nova com a no ar
+# Mesma variável do app.py (o processo herda o ambiente de quem o disparou)
+VARIANTE_IA = os.environ.get("SENTINELA_VARIANTE_IA", "")
+
+def montar_exemplos(sessoes):
+    """(ids, X, y) das sessões. Dia e hora vêm do início real da sessão; o resto, do contexto_ia."""
+    ids, X, y = [], [], []
+    for id_, inicio, minutos, contexto in sessoes:
+        if minutos is None or minutos < MIN_MINUTOS or len(contexto) != 11:
+            continue
+        inicio = datetime.fromisoformat(inicio)
+        ids.append(id_)
+        X.append([inicio.weekday(), inicio.hour, *contexto[2:]])
+        y.append(minutos)
+    X = np.array(X, dtype=np.float64).reshape(-1, 11)
+    return np.array(ids, dtype=np.uint64), X, np.clip(np.array(y, dtype=np.float32), *LIMITES_TARGET)
+
+def mascara_validacao(ids, percentual=PERCENTUAL_VALIDACAO):
+    """True nas sessões que ficam fora do ajuste. Depende só do id (como o
+    treinar_modelo.mascara_teste depende só da linha): a divisão não muda entre rodadas."""
+    return pd.util.hash_array(np.asarray(ids, dtype=np.uint64)) % 100 < percentual
+
+def amostra_sintetica(caminho_dados, n, rng):
+    """n linhas aleatórias do histórico sintético (formato colunar), ou None se não houver."""
+    import dados_colunares
+
+    try:
+        tabela = dados_colunares.abrir(caminho_dados)
+    except FileNotFoundError:
+        return None
+    linhas = np.sort(rng.choice(len(tabela), size=min(n, len(tabela)), replace=False))
+    X = np.column_stack([tabela[c][linhas] for c in tabela.colunas if c != 'target']).astype(np.float64)
+    return X, tabela['target'][linhas].astype(np.float32)
+
+def ajustar(X, y, caminho_h5, caminho_scaler, epocas=EPOCAS, semente=None):
+    """Continua o treino da rede salva em caminho_h5 (não começa do zero)."""
+    import joblib
+    import tensorflow as tf
+
+    scaler = joblib.load(caminho_scaler)
+    # Mesma conta do MinMaxScaler.transform (o scaler fica como está: o .npz usa o mesmo)
+    X_scaled = (X * scaler.scale_ + scaler.min_).astype(np.float32)
+    if semente is not None:
+        tf.random.set_seed(semente)
+    model = tf.keras.models.load_model(caminho_h5, compile=False) # Parte dos pesos atuais
+    model.compile(optimizer=tf.keras.optimizers.Adam(TAXA_APRENDIZADO), loss='mean_squared_error')
+    model.fit(X_scaled, y, epochs=epocas, batch_size=BATCH, verbose=0)
+    return model
+
+def nome_versao(base, ultimo_id):
+    """v3 -> v3-r120; v3-r120 -> v3-r250 (não empilha sufixos)."""
+    return f"{re.sub(r'-r[0-9]+$', '', base)}-r{ultimo_id}"
+
+def publicar(model, versao, atual):
+    """Grava .h5 + .npz na pasta da versão nova e registra, sem pôr no ar. O scaler é o da atual."""
+    pasta = registro_modelos.pasta_versao(versao)
+    caminho_h5 = os.path.join(pasta, 'modelo.h5')
+    model.save(caminho_h5)
+    registro_modelos.registrar(versao, caminho_h5, atual["scaler"], origem="retreino", ativar=False)
+
+def concluir(versao, ultimo_id, X_val, y_val, n_sessoes):
+    """Passos 5 a 7 (refeitos do zero se o processo tiver caído no meio deles)."""
+    if VARIANTE_IA in motor_ia.VARIANTES_TFLITE:
+        registro_modelos.adicionar_tflite(versao, (VARIANTE_IA,)) # Não refaz o que já existe
+    manifesto = registro_modelos.ler_manifesto()
+    no_ar = manifesto["atual"]
+    if not len(y_val):
+        situacao = f"registrada, mas {no_ar} continua no ar (nenhuma sessão para comparar)"
+    elif no_ar == versao:
+        situacao = "no ar"
+    else:
+        antes = motor_ia.MotorIA.carregar(manifesto["versoes"][no_ar]["npz"]).prever(X_val)
+        depois = registro_modelos.carregar_pacote(versao).motor.prever(X_val)
+        erro_antes, erro_depois = np.abs(antes - y_val).mean(), np.abs(depois - y_val).mean()
+        if erro_depois <= erro_antes:
+            registro_modelos.ativar(versao)
+            situacao = "no ar"
+        else:
+            situacao = f"registrada, mas {no_ar} continua no ar (errou mais)"
+        situacao += f", erro médio {erro_antes:.1f} -> {erro_depois:.1f} min nas {len(y_val)} sessões de validação"
+    with database.transacao() as conn:
+        database.avancar_marca_agua(conn, PROCESSO, ultimo_id)
+    print(f"{datetime.now():%Y-%m-%d %H:%M} Retreino com {n_sessoes} sessões reais (até o id {ultimo_id}): "
+          f"versão {versao} {situacao}", flush=True)
+
+def rodada(caminho_dados=None, min_sessoes=MIN_SESSOES, epocas=EPOCAS, semente=None):
+    """Uma passada do retreino. Retorna quantas sessões foram consumidas (0 = nada a fazer)."""
+    caminho_dados = caminho_dados or motor_ia.ARQUIVO_DADOS
+    marca = database.get_marca_agua(PROCESSO)
+    # Rodada anterior caiu no meio: mesma versão, com as mesmas sessões
+    pendente = database.get_versao_pendente(PROCESSO)
+    sessoes = database.get_sessoes_para_treino(marca, LIMITE_POR_RODADA, ate_id=pendente and pendente[1])
+    if not sessoes:
+        if pendente: # As sessões dela foram apagadas
+            with database.transacao() as conn:
+                database.avancar_marca_agua(conn, PROCESSO, pendente[1])
+        return 0
+    ids, X, y = montar_exemplos(sessoes)
+    ultimo_id = pendente[1] if pendente else sessoes[-1][0]
+    if len(y) == 0: # Só sessões descartadas
+        with database.transacao() as conn:
+            database.avancar_marca_agua(conn, PROCESSO, ultimo_id)
+        return len(sessoes)
+    validacao = mascara_validacao(ids)
+    X_val, y_val = X[validacao], y[validacao]
+
+    manifesto = registro_modelos.ler_manifesto()
+    versao = pendente[0] if pendente else nome_versao(manifesto["atual"], ultimo_id)
+    if versao in manifesto["versoes"]:
+        concluir(versao, ultimo_id, X_val, y_val, len(y))
+        return len(sessoes)
+    if len(y) < min_sessoes and not pendente:
+        return 0
+    atual = manifesto["versoes"][manifesto["atual"]]
+    if atual["colunas"] != motor_ia.COLUNAS:
+        print(f"A versão no ar ({manifesto['atual']}) não usa as 11 entradas da V3; retreino parado.", flush=True)
+        return 0
+
+    rng = np.random.default_rng(semente)
+    X_treino, y_treino = X[~validacao], y[~validacao]
+    replay = amostra_sintetica(caminho_dados, REPLAY * len(y_treino), rng)
+    if replay is not None:
+        X_treino, y_treino = np.concatenate([X_treino, replay[0]]), np.concatenate([y_treino, replay[1]])
+    ordem = rng.permutation(len(y_treino))
+    model = ajustar(X_treino[ordem], y_treino[ordem], atual["modelo"], atual["scaler"], epocas, semente)
+
+    database.marcar_versao_pendente(PROCESSO, versao, ultimo_id)
+    publicar(model, versao, atual)
+    concluir(versao, ultimo_id, X_val, y_val, len(y))
+    return len(sessoes)
+
+def _travar():
+    """Só um retreino por pasta. Retorna o arquivo travado (manter aberto), ou None se outro já roda."""
+    if fcntl is None:
+        return True
+    arquivo = open(ARQUIVO_TRAVA, 'w')
+    try:
+        fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        arquivo.close()
+        return None
+    return arquivo
+
+def iniciar_em_segundo_plano():
+    """Dispara `python retreino.py` num processo separado e desligado do app (saída em
+    retreino.log). Se já houver um rodando, o novo sai sozinho pela trava."""
+    with open(ARQUIVO_LOG, 'a') as log:
+        return subprocess.Popen(
+            [sys.executable, "-u", os.path.abspath(__file__), "--db", os.path.abspath(database.DB_NAME)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retreino incremental da IA com as sessões reais")
+    parser.add_argument("--db", default=database.DB_NAME, help="Arquivo do banco (padrão: %(default)s)")
+    parser.add_argument("--uma-vez", action="store_true", help="Faz uma rodada e sai")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_S, help="Segundos entre rodadas")
+    parser.add_argument("--min-sessoes", type=int, default=MIN_SESSOES)
+    parser.add_argument("--epocas", type=int, default=EPOCAS)
+    args = parser.parse_args(argv)
+
+    trava = _travar()
+    if trava is None:
+        print("Outro retreino já está rodando.")
+        return 0
+    database.DB_NAME = args.db
+    database.inicializar_db()
+    while True:
+        try:
+            # Rodadas seguidas enquanto houver atraso (mais que LIMITE_POR_RODADA na fila)
+            while rodada(min_sessoes=args.min_sessoes, epocas=args.epocas) >= LIMITE_POR_RODADA:
+                pass
+        except Exception as e:
+            print(f"Erro no retreino: {e}", flush=True)
+            if args.uma_vez:
+                return 1
+        if args.uma_vez:
+            return 0
+        time.sleep(args.intervalo)
+
+if __name__ == "__main__":
+    sys.exit(main())
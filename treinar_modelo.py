@@ -1,46 +1,168 @@
+# treinar_modelo.py
+# Treina a rede V3 lendo o histórico em blocos, sem carregar o arquivo inteiro na memória.
+#   1ª passada: ajusta o MinMaxScaler bloco a bloco (partial_fit)
+#   treino:     os blocos viram lotes num tf.data com prefetch (lê o próximo bloco
+#               enquanto a rede treina no atual)
+# Treino/teste é separado pelo hash do conteúdo da linha: a mesma linha cai sempre do
+# mesmo lado, em qualquer execução e com qualquer tamanho de bloco.
+# Os dados vêm do formato colunar (dados_colunares.py, memmap): passando o .csv, a
+# versão colunar ao lado é usada (e criada na primeira vez).
+#
+# O resultado vira uma versão nova no registro (modelos/<versão>/, registro_modelos.py),
+# com .npz e as variantes TFLite (int8/float16), e entra no ar sem reiniciar o app. Com --modelo/--scaler, só grava nesses arquivos.
+#
+# Uso: python treinar_modelo.py [--dados historico_estudo_v3.csv] [--epocas 100] [--batch 32]
+#                               [--bloco 100000] [--semente 42] [--versao v3-meu]
+import argparse
+import os
+import sys
+from datetime import datetime
+
 import pandas as pd
 import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 from keras import layers
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import MinMaxScaler
 import joblib
 
-# 1. Carregar CSV Novo
-try:
-    df = pd.read_csv('historico_estudo_v3.csv')
-except FileNotFoundError:
-    print("Erro: Rode o 'gerar_dados.py' novo primeiro!")
-    exit()
+import dados_colunares
+import motor_ia
+import registro_modelos
+
+ARQUIVO_DADOS = 'historico_estudo_v3.csv'
+ARQUIVO_SCALER = 'meu_scaler_v3.pkl' # Mudamos o nome pra evitar confusão
+ARQUIVO_MODELO = 'sentinela_brain_v3.h5'
+
+EPOCAS = 100
+BATCH = 32
+CAMADAS = (64, 32) # Neurônios das camadas escondidas
+TAXA_APRENDIZADO = 1e-3 # Padrão do Adam
+TAMANHO_BLOCO = 100_000 # Linhas lidas por vez (é isso que limita a memória)
+PERCENTUAL_TESTE = 20
+SEMENTE = 42
+
+def ler_blocos(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """Blocos (X, y) do histórico, como DataFrames. Aceita o .csv ou a pasta .colunas."""
+    # memmap: cada fatia só é lida do disco quando usada
+    for df in dados_colunares.abrir(caminho).blocos(tamanho_bloco):
+        yield df.drop('target', axis=1), df['target'] # Todas as colunas menos o target
+
+def hash_linhas(X, y):
+    """Hash do conteúdo de cada linha (uint64): a mesma linha dá sempre o mesmo número."""
+    return pd.util.hash_pandas_object(X.assign(target=y), index=False).to_numpy()
+
+def mascara_teste(X, y, percentual=PERCENTUAL_TESTE):
+    """True nas linhas que vão para o teste. Depende só do conteúdo da linha."""
+    return hash_linhas(X, y) % 100 < percentual
+
+def ajustar_scaler(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """1ª passada: MinMaxScaler incremental. Retorna (scaler, linhas de treino, linhas de teste)."""
+    scaler = MinMaxScaler()
+    n_treino = n_teste = 0
+    for X, y in ler_blocos(caminho, tamanho_bloco):
+        scaler.partial_fit(X)
+        teste = int(mascara_teste(X, y).sum())
+        n_teste += teste
+        n_treino += len(X) - teste
+    return scaler, n_treino, n_teste
+
+def _gerador(caminho, scaler, parte, tamanho_bloco, rng=None):
+    """Um bloco já normalizado por vez (float32); embaralha dentro do bloco se tiver rng."""
+    def gerar():
+        for X, y in ler_blocos(caminho, tamanho_bloco):
+            linhas = mascara_teste(X, y) == (parte == 'teste')
+            X_bloco = scaler.transform(X[linhas]).astype(np.float32)
+            y_bloco = y[linhas].to_numpy(np.float32)
+            if rng is not None:
+                ordem = rng.permutation(len(y_bloco))
+                X_bloco, y_bloco = X_bloco[ordem], y_bloco[ordem]
+            yield X_bloco, y_bloco
+    return gerar
+
+def criar_dataset(caminho, scaler, parte, batch=BATCH, tamanho_bloco=TAMANHO_BLOCO, rng=None):
+    """tf.data com os lotes de 'treino' ou 'teste'. O gerador é chamado de novo a cada época."""
+    n = scaler.n_features_in_
+    ds = tf.data.Dataset.from_generator(
+        _gerador(caminho, scaler, parte, tamanho_bloco, rng),
+        output_signature=(tf.TensorSpec((None, n), tf.float32), tf.TensorSpec((None,), tf.float32)))
+    # unbatch/batch rodam no C++ do TensorFlow; prefetch lê o próximo bloco em paralelo
+    return ds.unbatch().batch(batch).prefetch(tf.data.AUTOTUNE)
+
+def criar_modelo(entradas, camadas=CAMADAS, taxa=TAXA_APRENDIZADO):
+    # Nova Arquitetura (Mais neurônios para processar mais dados)
+    model = keras.Sequential([
+        layers.Input(shape=(entradas,)),     # Agora são 11 entradas!
+        *[layers.Dense(n, activation='relu') for n in camadas],
+        layers.Dense(1)
+    ])
+    model.compile(optimizer=keras.optimizers.Adam(taxa), loss='mean_squared_error')
+    return model
+
+def treinar(caminho=ARQUIVO_DADOS, epocas=EPOCAS, batch=BATCH, tamanho_bloco=TAMANHO_BLOCO, semente=SEMENTE,
+            destino_modelo=ARQUIVO_MODELO, destino_scaler=ARQUIVO_SCALER, camadas=CAMADAS, taxa=TAXA_APRENDIZADO):
+    """Treina e salva modelo + scaler. Retorna o MSE no teste, ou None se faltar o arquivo."""
+    try:
+        scaler, n_treino, n_teste = ajustar_scaler(caminho, tamanho_bloco)
+    except FileNotFoundError:
+        print("Erro: Rode o 'gerar_dados.py' novo primeiro!")
+        return None
+    joblib.dump(scaler, destino_scaler)
+
+    tf.random.set_seed(semente)
+    rng = np.random.default_rng(semente)
+    treino = criar_dataset(caminho, scaler, 'treino', batch, tamanho_bloco, rng)
+    teste = criar_dataset(caminho, scaler, 'teste', batch, tamanho_bloco)
+    model = criar_modelo(scaler.n_features_in_, camadas, taxa)
 
-# 2. Separar X (Entradas) e y (Saída)
-X = df.drop('target', axis=1) # Todas as colunas menos o target
-y = df['target']
+    print(f"Treinando Cérebro V3... ({n_treino} linhas de treino, {n_teste} de teste)")
+    model.fit(treino, epochs=epocas, shuffle=False, verbose=0) # já vem embaralhado do gerador
 
-# 3. Normalizar
-scaler = MinMaxScaler()
-X_scaled = scaler.fit_transform(X)
-joblib.dump(scaler, 'meu_scaler_v3.pkl') # Mudamos o nome pra evitar confusão
+    loss = model.evaluate(teste, verbose=0) if n_teste else float('nan')
+    print(f"Erro Final (MSE): {loss:.2f}")
 
-# 4. Divisão
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2)
+    model.save(destino_modelo)
+    return loss
 
-# 5. Nova Arquitetura (Mais neurônios para processar mais dados)
-model = keras.Sequential([
-    layers.Input(shape=(11,)),           # Agora são 11 entradas!
-    layers.Dense(64, activation='relu'), # Camada maior
-    layers.Dense(32, activation='relu'),
-    layers.Dense(1)
-])
+def treinar_versao(versao, origem, caminho=ARQUIVO_DADOS, **parametros):
+    """Treina direto na pasta de uma versão nova do registro e põe no ar. Retorna o MSE ou None."""
+    if versao in registro_modelos.ler_manifesto()["versoes"]:
+        print(f"Erro: a versão {versao} já está registrada.")
+        return None
+    pasta = registro_modelos.pasta_versao(versao)
+    modelo, scaler = os.path.join(pasta, 'modelo.h5'), os.path.join(pasta, 'scaler.pkl')
+    loss = treinar(caminho, destino_modelo=modelo, destino_scaler=scaler, **parametros)
+    if loss is not None:
+        registro_modelos.registrar(versao, modelo, scaler, origem=origem,
+                                   variantes=motor_ia.VARIANTES_TFLITE)
+        print(f"Versão {versao} registrada e no ar.")
+    return loss
 
-model.compile(optimizer='adam', loss='mean_squared_error')
+def nome_versao_padrao(prefixo="v3"):
+    return f"{prefixo}-{datetime.now():%Y%m%d-%H%M%S}"
 
-print("Treinando Cérebro V3...")
-model.fit(X_train, y_train, epochs=100, batch_size=32, verbose=0)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Treina a rede do Sentinela em blocos")
+    parser.add_argument("--dados", default=ARQUIVO_DADOS, help="Histórico .csv ou pasta .colunas")
+    parser.add_argument("--epocas", type=int, default=EPOCAS)
+    parser.add_argument("--batch", type=int, default=BATCH)
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO, help="Linhas lidas por vez")
+    parser.add_argument("--semente", type=int, default=SEMENTE)
+    parser.add_argument("--versao", help="Nome da versão no registro (padrão: v3-<data>-<hora>)")
+    parser.add_argument("--modelo", help="Grava o .h5 aqui, fora do registro")
+    parser.add_argument("--scaler", help="Grava o .pkl aqui, fora do registro")
+    args = parser.parse_args(argv)
 
-loss = model.evaluate(X_test, y_test, verbose=0)
-print(f"Erro Final (MSE): {loss:.2f}")
+    parametros = dict(epocas=args.epocas, batch=args.batch, tamanho_bloco=args.bloco, semente=args.semente)
+    if args.modelo or args.scaler:
+        loss = treinar(args.dados, destino_modelo=args.modelo or ARQUIVO_MODELO,
+                       destino_scaler=args.scaler or ARQUIVO_SCALER, **parametros)
+    else:
+        loss = treinar_versao(args.versao or nome_versao_padrao(), "treinar_modelo.py", args.dados, **parametros)
+    if loss is None:
+        return 1
+    print("✅ IA V3 pronta!")
+    return 0
 
-model.save('sentinela_brain_v3.h5')
-print("✅ IA V3 pronta!")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())